@@ -2,11 +2,13 @@ import streamlit as st
 from streamlit_option_menu import option_menu
 import os
 import sys
-import requests
+import hmac
+import logging
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config.settings import DashboardSettings
+from utils import cache, federation, metrics, polling, profiler, status_api
 # ----------------------------------------------------------------------
 # Initialize Settings in Session State (Critical Fix)
 # ----------------------------------------------------------------------
@@ -14,6 +16,23 @@ if "settings" not in st.session_state:
     st.session_state.settings = DashboardSettings()
 
 settings = st.session_state.settings
+logger = logging.getLogger(__name__)
+
+# The side servers are optional: a port that is already taken must not take the dashboard down
+if settings.METRICS_PORT:
+    try:
+        metrics.start_metrics_server(settings.METRICS_PORT)
+    except OSError as e:
+        logger.warning("Metrics server not started on port %s: %s", settings.METRICS_PORT, e)
+cache.configure(int(settings.CACHE_MAX_MB * 1024 * 1024))
+if settings.STATUS_PORT:
+    try:
+        status_api.start_status_server(settings.STATUS_PORT, status_api.StatusService(
+            federation.instances(settings), list(settings.STAGES.keys()),
+            os.path.join(settings.PIPELINE_DATA_DIR, "train")
+        ))
+    except OSError as e:
+        logger.warning("Status server not started on port %s: %s", settings.STATUS_PORT, e)
 
 st.set_page_config(
     page_title=settings.PAGE_TITLE,
@@ -97,14 +116,15 @@ with st.sidebar:
     st.markdown("---")
     st.markdown("### 📊 Pipeline Stats")
     
-    try:
-        response = requests.get(f"{settings.PIPELINE_API_URL}/health", timeout=5)
-        if response.status_code == 200:
-            st.success("✅ Pipeline API Connected")
+    fleet = federation.instances(settings)
+    for health in federation.map_instances(fleet, federation.check_health):
+        label = f"Pipeline API `{health['name']}`" if len(fleet) > 1 else "Pipeline API"
+        if health['ok']:
+            st.success(f"✅ {label} Connected")
+        elif health['detail'].startswith("HTTP"):
+            st.error(f"❌ {label} Error")
         else:
-            st.error("❌ Pipeline API Error")
-    except Exception as e:
-        st.error(f"❌ Cannot connect to Pipeline API: {str(e)}")
+            st.error(f"❌ Cannot connect to {label}: {health['detail']}")
 
 # Load the selected page
 page_map = {
@@ -116,14 +136,59 @@ page_map = {
     "Settings": "pages/6_⚙️_Settings.py"
 }
 
+# Admin tools — only rendered when an admin token is configured
+if settings.ADMIN_TOKEN:
+    with st.sidebar.expander("🛠️ Admin"):
+        if not st.session_state.get("is_admin"):
+            admin_token = st.text_input("Admin token", type="password")
+            if admin_token and hmac.compare_digest(admin_token, settings.ADMIN_TOKEN):
+                st.session_state.is_admin = True
+                st.rerun()
+        else:
+            profile_page = st.selectbox("Page to profile", options=list(page_map.keys()),
+                                        index=list(page_map.keys()).index(selected))
+            profile_mode = st.radio("Profiler", options=profiler.MODES)
+            if st.button("🔬 Profile next run"):
+                st.session_state.profile_next = {"page": profile_page, "mode": profile_mode}
+            if "profile_next" in st.session_state:
+                st.caption(f"Armed: next run of **{st.session_state.profile_next['page']}**")
+
 if selected in page_map:
     try:
         with open(page_map[selected]) as f:
-            exec(f.read())
+            page_source = f.read()
+        armed_profile = st.session_state.get("profile_next")
+        # Polling pages wait after the render is timed (see utils.polling)
+        with polling.deferred(), metrics.timed("page_render", metrics.PAGE_RENDER, page=selected):
+            if armed_profile and armed_profile["page"] == selected:
+                del st.session_state.profile_next
+                with profiler.PageProfiler(selected, armed_profile["mode"],
+                                           lambda report: st.session_state.__setitem__("last_profile", report)):
+                    exec(page_source)
+            else:
+                exec(page_source)
     except Exception as e:
         st.error(f"Failed to load page: {selected}")
         st.exception(e)
 
+if st.session_state.get("is_admin") and "last_profile" in st.session_state:
+    profile_report = st.session_state.last_profile
+    with st.expander(f"🔬 Profile: {profile_report['page']} — {profile_report['duration_seconds']}s "
+                     f"({profile_report['mode']}, {profile_report['captured'][:19]})"):
+        st.markdown("#### 🔥 Hotspots by cumulative time")
+        st.dataframe(profile_report["hotspots"], use_container_width=True, hide_index=True)
+        if profile_report.get("allocations"):
+            st.markdown(f"#### 🧠 Top allocations still held after the run (peak {profile_report['peak_memory_kb']:,} KB)")
+            st.dataframe(profile_report["allocations"], use_container_width=True, hide_index=True)
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button("📥 Download raw profile", data=profile_report["raw"],
+                               file_name=profile_report["raw_name"], mime="application/octet-stream")
+        with col2:
+            if st.button("✖️ Clear profile"):
+                del st.session_state.last_profile
+                st.rerun()
+
 # Footer
 st.markdown("---")
 st.markdown(
@@ -135,4 +200,7 @@ st.markdown(
     </div>
     """.format(settings.PIPELINE_API_URL, settings.PIPELINE_DATA_DIR),
     unsafe_allow_html=True
-)
\ No newline at end of file
+)
+
+# Auto-refresh, running jobs and log follow: wait for the next run now that the page is timed
+polling.run_pending()
@@ -1,4 +1,5 @@
 # exaPipelineDashboard/config/settings.py
+import json
 import os
 from typing import Dict, List
 
@@ -11,6 +12,12 @@ class DashboardSettings:
     # Unified data directory — matches backend save path
     PIPELINE_DATA_DIR: str = os.getenv("PIPELINE_DATA_DIR", "/app/data")
     
+    # Dashboard-owned state (job files, indexes) — kept out of the stage folders
+    DASHBOARD_STATE_DIR: str = os.getenv("DASHBOARD_STATE_DIR", os.path.join(PIPELINE_DATA_DIR, ".dashboard"))
+    
+    # Dashboard log file shown in Settings › System
+    LOG_FILE: str = os.getenv("DASHBOARD_LOG_FILE", "app.log")
+    
     PAGE_TITLE: str = "Construction AI Pipeline Dashboard"
     PAGE_ICON: str = "🏗️"
     LAYOUT: str = "wide"
@@ -34,5 +41,46 @@ class DashboardSettings:
     EXPORT_FORMATS: Dict[str, str] = {
         "sft": "Supervised Fine-Tuning (SFT)",
         "rlaif": "Reinforcement Learning from AI Feedback (RLAIF)",
-        "rlhf": "Reinforcement Learning from Human Feedback (RLHF)"
-    }
\ No newline at end of file
+        "rlhf": "Reinforcement Learning from Human Feedback (RLHF)",
+        "qwen3": "Qwen3 Chat (messages)"
+    }
+    
+    # Chunk reprocessing — requeue through the pipeline API
+    REPROCESS_ENDPOINT: str = os.getenv("PIPELINE_REPROCESS_ENDPOINT", "/api/v1/reprocess")
+    REPROCESS_MAX_CONCURRENCY: int = int(os.getenv("REPROCESS_MAX_CONCURRENCY", "4"))
+    REPROCESS_RATE_PER_SEC: float = float(os.getenv("REPROCESS_RATE_PER_SEC", "5"))
+    
+    # Background training exports — worker processes
+    EXPORT_MAX_WORKERS: int = int(os.getenv("EXPORT_MAX_WORKERS", "2"))
+    # Processes each export job fans format conversion out to — 1 converts in the job's own process.
+    # Every running job starts its own, so up to EXPORT_MAX_WORKERS × EXPORT_CONVERT_WORKERS
+    # conversion processes; jobs lower it so that product stays within the CPU count
+    EXPORT_CONVERT_WORKERS: int = int(os.getenv("EXPORT_CONVERT_WORKERS", "4"))
+    
+    # Prometheus /metrics endpoint — 0 disables it
+    METRICS_PORT: int = int(os.getenv("METRICS_PORT", "0"))
+    
+    # Unlocks admin tools (page profiler) in the sidebar — empty disables them
+    ADMIN_TOKEN: str = os.getenv("DASHBOARD_ADMIN_TOKEN", "")
+    
+    # Upload-time OCR estimates and splitting of large PDFs
+    OCR_SECONDS_PER_PAGE: float = float(os.getenv("OCR_SECONDS_PER_PAGE", "90"))
+    CLASSIFICATION_SECONDS: float = float(os.getenv("CLASSIFICATION_SECONDS", "30"))
+    OCR_BACKEND_WORKERS: int = int(os.getenv("OCR_BACKEND_WORKERS", "4"))
+    SPLIT_PAGES_PER_PART: int = int(os.getenv("SPLIT_PAGES_PER_PART", "50"))
+    
+    # Process-wide cache of listings and parsed JSON shared by all sessions
+    CACHE_MAX_MB: float = float(os.getenv("DASHBOARD_CACHE_MAX_MB", "256"))
+    
+    # Stuck-document detection — minutes a document may wait for each stage
+    STAGE_STUCK_MINUTES: Dict[str, float] = {
+        "ingested": 60, "classified": 30, "chunks": 15, "annotated": 120, "synthetic": 240, "validated": 120,
+        **json.loads(os.getenv("STAGE_STUCK_MINUTES", "{}"))
+    }
+    BACKLOG_WINDOW_MINUTES: float = float(os.getenv("BACKLOG_WINDOW_MINUTES", "60"))
+    
+    # Federation — JSON list of {"name", "api_url", "data_dir"}; empty means just the instance above
+    PIPELINE_INSTANCES: List[Dict[str, str]] = json.loads(os.getenv("PIPELINE_INSTANCES", "[]"))
+    
+    # Read-only JSON status endpoint (/status, /documents, /exports) — 0 disables it
+    STATUS_PORT: int = int(os.getenv("STATUS_PORT", "0"))
\ No newline at end of file
@@ -2,6 +2,8 @@ import streamlit as st
 import requests
 from datetime import datetime
 
+from utils import metrics, pdf_tools, upload_index
+
 # Safe settings initialization
 if "settings" not in st.session_state:
     from config.settings import DashboardSettings
@@ -20,10 +22,51 @@ with col1:
         accept_multiple_files=True,
         help="Upload construction documents (PDF format)"
     )
+    inspected = []
+    upload_hashes = []
+    duplicate_of = []
+    uploads_index = upload_index.UploadIndex(settings.DASHBOARD_STATE_DIR)
     if uploaded_files:
         st.success(f"📄 Selected {len(uploaded_files)} file(s)")
-        for file in uploaded_files:
-            st.info(f"**{file.name}** - {file.size:,} bytes")
+        # Inspect locally once per selection; reruns reuse the result
+        selection_key = tuple((file.name, file.size) for file in uploaded_files)
+        if st.session_state.get("pdf_inspection_key") != selection_key:
+            with st.spinner("Reading page counts..."):
+                st.session_state.pdf_inspection = pdf_tools.inspect_pdfs(
+                    [(file.name, file.getvalue()) for file in uploaded_files]
+                )
+                st.session_state.upload_hashes = [upload_index.hash_stream(file) for file in uploaded_files]
+            st.session_state.pdf_inspection_key = selection_key
+        inspected = st.session_state.pdf_inspection
+        upload_hashes = st.session_state.upload_hashes
+        known_uploads = uploads_index.lookup(upload_hashes)
+        seen_hashes = set()
+        for info, file_hash in zip(inspected, upload_hashes):
+            if file_hash in known_uploads:
+                known = known_uploads[file_hash]
+                duplicate_of.append(
+                    f"already ingested {known['first_seen'][:10]} as `{known['file_name']}`"
+                    + (f" → doc {', '.join(known['doc_ids'])}" if known['doc_ids'] else "")
+                )
+            elif file_hash in seen_hashes:
+                duplicate_of.append("selected more than once in this batch")
+            else:
+                duplicate_of.append(None)
+            seen_hashes.add(file_hash)
+            if info["error"]:
+                st.warning(f"**{info['name']}** - {info['size']:,} bytes • could not read PDF: {info['error']}")
+            elif duplicate_of[-1]:
+                st.warning(f"♻️ **{info['name']}** - {info['size']:,} bytes • duplicate: {duplicate_of[-1]}")
+            else:
+                st.info(f"**{info['name']}** - {info['size']:,} bytes • {info['pages']} page(s)"
+                        + (" • 🔒 encrypted" if info["encrypted"] else ""))
+    skip_duplicates = True
+    if any(duplicate_of):
+        skip_duplicates = st.radio(
+            "Duplicate files", options=["Skip duplicates", "Upload anyway"], horizontal=True,
+            help="Skipping avoids re-running OCR, annotation and synthesis on content already in the pipeline"
+        ) == "Skip duplicates"
+    send_mask = [not (skip_duplicates and duplicate) for duplicate in duplicate_of]
 
     st.markdown("### ⚙️ Processing Options")
     col1a, col2a = st.columns(2)
@@ -33,25 +76,55 @@ with col1:
     with col2a:
         validate_data = st.checkbox("Validate annotations", value=True)
         auto_classify = st.checkbox("Auto-classify documents", value=True)
+    split_large = st.checkbox("Split large PDFs into page-range parts", value=False,
+                              help="Parts are OCR'd in parallel by the backend instead of as one long job")
+    pages_per_part = st.number_input("Pages per part", min_value=1, max_value=1000,
+                                     value=settings.SPLIT_PAGES_PER_PART, disabled=not split_large)
+    parts_per_file = []
+    for info, send in zip(inspected, send_mask):
+        pages = (info["pages"] or 0) if send else 0
+        ranges = pdf_tools.page_ranges(pages, int(pages_per_part)) if split_large and pages else [(0, pages)]
+        parts_per_file.append([end - start for start, end in ranges])
 
-    if st.button("🚀 Start Processing", type="primary", disabled=not uploaded_files):
+    if uploaded_files and not any(send_mask):
+        st.info("♻️ Every selected file has already been ingested — nothing new to process")
+    if st.button("🚀 Start Processing", type="primary", disabled=not uploaded_files or not any(send_mask)):
         with st.spinner("Processing documents..."):
             try:
                 files = []
-                for uploaded_file in uploaded_files:
-                    files.append(('files', (uploaded_file.name, uploaded_file.getvalue(), 'application/pdf')))
-                response = requests.post(
-                    f"{settings.PIPELINE_API_URL}/api/v1/ingest",
+                sent = []  # (uploaded file, hash, number of parts posted)
+                for uploaded_file, file_hash, parts, send in zip(uploaded_files, upload_hashes, parts_per_file, send_mask):
+                    if not send:
+                        continue
+                    if len(parts) > 1:
+                        file_parts = pdf_tools.split_pdf(uploaded_file.name, uploaded_file.getvalue(), int(pages_per_part))
+                    else:
+                        file_parts = [(uploaded_file.name, uploaded_file.getvalue())]
+                    for part_name, part_data in file_parts:
+                        files.append(('files', (part_name, part_data, 'application/pdf')))
+                    sent.append((uploaded_file, file_hash, len(file_parts)))
+                response = metrics.api_call(
+                    requests, "post", f"{settings.PIPELINE_API_URL}/api/v1/ingest", "ingest",
                     files=files
                 )
                 if response.status_code == 200:
                     result = response.json()
+                    file_ids = result.get('file_ids', [])
+                    # file_ids follow the order of the posted parts
+                    offset = 0
+                    for uploaded_file, file_hash, part_count in sent:
+                        uploads_index.record(file_hash, uploaded_file.size, uploaded_file.name,
+                                             [str(i) for i in file_ids[offset:offset + part_count]])
+                        offset += part_count
                     st.session_state.last_upload = {
                         'timestamp': datetime.now().isoformat(),
-                        'file_count': len(uploaded_files),
-                        'file_ids': result.get('file_ids', [])
+                        'file_count': len(sent),
+                        'file_ids': file_ids
                     }
-                    st.success(f"✅ Successfully queued {len(uploaded_files)} file(s) for processing!")
+                    split_note = f" as {len(files)} part(s)" if len(files) != len(sent) else ""
+                    skipped = len(uploaded_files) - len(sent)
+                    skip_note = f" ({skipped} duplicate(s) skipped)" if skipped else ""
+                    st.success(f"✅ Successfully queued {len(sent)} file(s){split_note} for processing!{skip_note}")
                     st.json(result)
                     st.markdown("### Next Steps")
                     st.markdown("""
@@ -78,10 +151,23 @@ with col2:
         st.metric("Documents in Pipeline", "N/A")
 
     st.markdown("#### ℹ️ Pipeline Info")
-    st.markdown("""
+    if any(send_mask):
+        estimate = pdf_tools.estimate_batch(
+            [info for info, send in zip(inspected, send_mask) if send], parts_per_file, settings.OCR_SECONDS_PER_PAGE,
+            settings.CLASSIFICATION_SECONDS, settings.OCR_BACKEND_WORKERS
+        )
+        st.metric("Pages to OCR", f"{estimate['pages']:,}")
+        st.metric("Estimated OCR + classification", f"{estimate['parallel_seconds'] / 60:,.0f} min",
+                  help=f"{estimate['parts']} job(s) over {settings.OCR_BACKEND_WORKERS} backend OCR worker(s); "
+                       f"{estimate['serial_seconds'] / 60:,.0f} min if processed one after another")
+        if any(info["error"] for info in inspected):
+            st.caption("Unreadable files are not included in the estimate")
+        if not all(send_mask):
+            st.caption("Skipped duplicates are not included in the estimate")
+    st.markdown(f"""
     **Expected Processing Time:**
-    - OCR: 1-2 minutes per page
-    - Classification: ~30 seconds
+    - OCR: ~{settings.OCR_SECONDS_PER_PAGE / 60:.1f} minutes per page
+    - Classification: ~{settings.CLASSIFICATION_SECONDS:.0f} seconds
     - Chunking: Instant
     - Annotation: ~1 minute per chunk
     - Synthesis: ~2 minutes per chunk
@@ -5,6 +5,8 @@ import json
 import pandas as pd
 import plotly.graph_objects as go
 
+from utils import backlog, cache, federation, metrics, polling
+
 # Safe settings initialization
 if "settings" not in st.session_state:
     from config.settings import DashboardSettings
@@ -29,39 +31,54 @@ with col3:
     if st.button("🗑️ Clear Completed"):
         st.info("This feature is coming soon!")
 
-pipeline_dir = settings.PIPELINE_DATA_DIR
+fleet = federation.instances(settings)
+federated = len(fleet) > 1
+if federated:
+    selected_instances = st.multiselect("Pipeline instances", options=[i['name'] for i in fleet],
+                                        default=[i['name'] for i in fleet])
+    fleet = [i for i in fleet if i['name'] in selected_instances]
+    if not fleet:
+        st.info("Select at least one pipeline instance")
+        st.stop()
 
-if not os.path.exists(pipeline_dir):
-    st.error(f"❌ Pipeline data directory not found: {pipeline_dir}")
+missing = [i for i in fleet if not os.path.exists(i['data_dir'])]
+if len(missing) == len(fleet):
+    for instance in missing:
+        st.error(f"❌ Pipeline data directory not found: {instance['data_dir']}")
     st.info("Make sure the pipeline is running and data directory is mounted correctly")
     st.stop()
+for instance in missing:
+    st.warning(f"⚠️ Skipping `{instance['name']}` — data directory not found: {instance['data_dir']}")
+fleet = [i for i in fleet if i not in missing]
 
 st.markdown("## 📈 Pipeline Overview")
-stats = {}
-stage_data = []
-for stage_key, stage_info in settings.STAGES.items():
-    stage_dir = os.path.join(pipeline_dir, stage_key)
-    if os.path.exists(stage_dir):
-        if stage_key in ["train"]:
-            files = [f for f in os.listdir(stage_dir) if f.endswith('.jsonl')]
-            doc_count = len(files)
-        else:
-            doc_count = len([d for d in os.listdir(stage_dir) if os.path.isdir(os.path.join(stage_dir, d))])
-    else:
-        doc_count = 0
-    stats[stage_key] = doc_count
-    stage_data.append({
-        'Stage': stage_info['name'],
-        'Icon': stage_info['icon'],
-        'Documents': doc_count,
-        'Color': stage_info['color'],
-        'Key': stage_key
-    })
+with metrics.timed("stage_scan"):
+    instance_counts = federation.map_instances(
+        fleet, lambda instance: federation.stage_counts(instance, list(settings.STAGES.keys()))
+    )
+    stats = {}
+    stage_data = []
+    for stage_key, stage_info in settings.STAGES.items():
+        doc_count = sum(counts[stage_key] for counts in instance_counts)
+        stats[stage_key] = doc_count
+        stage_data.append({
+            'Stage': stage_info['name'],
+            'Icon': stage_info['icon'],
+            'Documents': doc_count,
+            'Color': stage_info['color'],
+            'Key': stage_key
+        })
 
 cols = st.columns(len(stage_data))
 for idx, stage in enumerate(stage_data):
     with cols[idx]:
         st.metric(label=f"{stage['Icon']} {stage['Stage']}", value=stage['Documents'])
+if federated:
+    with st.expander("🌐 By instance"):
+        st.dataframe(pd.DataFrame([
+            {"Instance": instance['name'], **{settings.STAGES[k]['name']: v for k, v in counts.items()}}
+            for instance, counts in zip(fleet, instance_counts)
+        ]), use_container_width=True, hide_index=True)
 
 st.markdown("## 📊 Processing Pipeline")
 fig = go.Figure()
@@ -89,41 +106,108 @@ fig.update_layout(
 )
 st.plotly_chart(fig, use_container_width=True)
 
+st.markdown("## ⏱️ Backlog & Stuck Documents")
+def scan_backlog(instance):
+    stage_index = backlog.update_stage_index(
+        instance['data_dir'], federation.instance_state_dir(settings.DASHBOARD_STATE_DIR, instance, fleet)
+    )
+    return (backlog.dwell_times(stage_index, settings.STAGE_STUCK_MINUTES),
+            backlog.chunk_backlog(instance['data_dir'], settings.BACKLOG_WINDOW_MINUTES))
+
+with metrics.timed("backlog_scan"):
+    instance_backlogs = federation.map_instances(fleet, scan_backlog)
+    dwell_rows = sorted(
+        ({**row, 'instance': instance['name']} for instance, (rows, _) in zip(fleet, instance_backlogs) for row in rows),
+        key=lambda row: row['dwell_minutes'], reverse=True
+    )
+    chunk_backlog = backlog.merge_chunk_backlogs(
+        {instance['name']: result for instance, (_, result) in zip(fleet, instance_backlogs)}
+    )
+dwell_by_doc = {(row['instance'], row['doc_id']): row for row in dwell_rows}
+stuck_rows = [row for row in dwell_rows if row['stuck']]
+
+def format_minutes(minutes):
+    if minutes is None:
+        return "—"
+    return f"{minutes:.0f} min" if minutes < 120 else f"{minutes / 60:.1f} h"
+
+col1, col2, col3, col4 = st.columns(4)
+with col1:
+    st.metric("⚠️ Stuck Documents", len(stuck_rows), help="Waiting longer than the stage's threshold")
+with col2:
+    st.metric("Chunks Awaiting Annotation", f"{chunk_backlog['steps']['annotation']['waiting']:,}",
+              help=f"{chunk_backlog['counts']['chunks']:,} chunked vs {chunk_backlog['counts']['annotated']:,} annotated")
+with col3:
+    st.metric("Chunks Awaiting Validation", f"{chunk_backlog['steps']['validation']['waiting']:,}",
+              help=f"{chunk_backlog['counts']['annotated']:,} annotated vs {chunk_backlog['counts']['validated']:,} validated")
+with col4:
+    eta = chunk_backlog['eta_minutes']
+    st.metric("ETA to Drain", format_minutes(eta) if eta is not None else "stalled",
+              help=f"From throughput over the last {chunk_backlog['window_minutes']:.0f} minutes")
+
+st.dataframe(pd.DataFrame([{
+    "Step": step.title(),
+    "Waiting": info['waiting'],
+    f"Done (last {chunk_backlog['window_minutes']:.0f} min)": info['done_in_window'],
+    "Chunks / hour": info['per_hour'],
+    "ETA": format_minutes(info['eta_minutes']) if info['waiting'] else "—"
+} for step, info in chunk_backlog['steps'].items()]), use_container_width=True, hide_index=True)
+
+if stuck_rows:
+    with st.expander(f"⚠️ Stuck documents ({len(stuck_rows)})", expanded=True):
+        st.dataframe(pd.DataFrame([{
+            **({"Instance": row['instance']} if federated else {}),
+            "Document ID": row['doc_id'],
+            "In Stage": settings.STAGES[row['current_stage']]['name'],
+            "Waiting For": settings.STAGES[row['waiting_for']]['name'],
+            "Since": row['entered'],
+            "Dwell": format_minutes(row['dwell_minutes']),
+            "Threshold": format_minutes(row['threshold_minutes'])
+        } for row in stuck_rows]), use_container_width=True, hide_index=True)
+if chunk_backlog['documents']:
+    with st.expander(f"📚 Documents with queued chunks ({len(chunk_backlog['documents'])})"):
+        st.dataframe(pd.DataFrame(chunk_backlog['documents']), use_container_width=True, hide_index=True)
+
 st.markdown("## 📄 Processed Documents")
-doc_ids = set()
-for stage_key in settings.STAGES.keys():
-    stage_dir = os.path.join(pipeline_dir, stage_key)
-    if os.path.exists(stage_dir):
-        for item in os.listdir(stage_dir):
-            if os.path.isdir(os.path.join(stage_dir, item)):
-                doc_ids.add(item)
-
-if doc_ids:
+with metrics.timed("document_scan"):
+    instance_doc_ids = federation.map_instances(
+        fleet, lambda instance: federation.document_ids(instance, list(settings.STAGES.keys()))
+    )
+doc_refs = [(instance, doc_id) for instance, doc_ids in zip(fleet, instance_doc_ids) for doc_id in doc_ids]
+doc_dirs = {}
+
+if doc_refs:
     documents = []
-    for doc_id in list(doc_ids)[:50]:
-        doc_info = {'Document ID': doc_id}
+    for instance, doc_id in doc_refs[:50]:
+        doc_info = {'Instance': instance['name'], 'Document ID': doc_id} if federated else {'Document ID': doc_id}
+        doc_label = f"{instance['name']}/{doc_id}" if federated else doc_id
+        doc_dirs[doc_label] = (instance['data_dir'], doc_id)
         for stage_key, stage_info in settings.STAGES.items():
-            stage_dir = os.path.join(pipeline_dir, stage_key, doc_id)
+            stage_dir = os.path.join(instance['data_dir'], stage_key, doc_id)
             if os.path.exists(stage_dir):
                 metadata_file = os.path.join(stage_dir, 'metadata.json')
                 if os.path.exists(metadata_file):
-                    try:
-                        with open(metadata_file, 'r') as f:
-                            metadata = json.load(f)
-                            doc_info[stage_info['name']] = '✅'
-                            if 'doc_type' in metadata and 'Document Type' not in doc_info:
-                                doc_info['Document Type'] = metadata['doc_type']
-                    except:
+                    with metrics.timed("metadata_read"):
+                        metadata = cache.read_json(metadata_file)
+                    if isinstance(metadata, dict):
+                        doc_info[stage_info['name']] = '✅'
+                        if 'doc_type' in metadata and 'Document Type' not in doc_info:
+                            doc_info['Document Type'] = metadata['doc_type']
+                    else:
                         doc_info[stage_info['name']] = '⚠️'
                 else:
                     doc_info[stage_info['name']] = '✅'
             else:
                 doc_info[stage_info['name']] = '⏳'
+        dwell = dwell_by_doc.get((instance['name'], doc_id))
+        if dwell:
+            doc_info['Waiting For'] = settings.STAGES[dwell['waiting_for']]['name']
+            doc_info['Dwell'] = ("⚠️ " if dwell['stuck'] else "") + format_minutes(dwell['dwell_minutes'])
         documents.append(doc_info)
     if documents:
         df = pd.DataFrame(documents)
         stage_names = [info['name'] for info in settings.STAGES.values()]
-        column_order = ['Document ID', 'Document Type'] + stage_names
+        column_order = ['Instance', 'Document ID', 'Document Type', 'Waiting For', 'Dwell'] + stage_names
         available_columns = [col for col in column_order if col in df.columns]
         df = df[available_columns]
         st.dataframe(
@@ -135,14 +219,15 @@ if doc_ids:
                 "Document Type": st.column_config.TextColumn(width="small")
             }
         )
-        selected_doc = st.selectbox("Select document for detailed view", options=df['Document ID'].tolist())
+        selected_doc = st.selectbox("Select document for detailed view", options=list(doc_dirs.keys()))
         if selected_doc:
+            selected_data_dir, selected_doc_id = doc_dirs[selected_doc]
             st.markdown(f"### 📋 Details for: `{selected_doc}`")
             cols = st.columns(3)
             for idx, (stage_key, stage_info) in enumerate(settings.STAGES.items()):
                 col_idx = idx % 3
                 with cols[col_idx]:
-                    stage_dir = os.path.join(pipeline_dir, stage_key, selected_doc)
+                    stage_dir = os.path.join(selected_data_dir, stage_key, selected_doc_id)
                     if os.path.exists(stage_dir):
                         files = [f for f in os.listdir(stage_dir) if not f.endswith('.json')]
                         json_files = [f for f in os.listdir(stage_dir) if f.endswith('.json')]
@@ -165,7 +250,5 @@ else:
     st.info("No documents found in the pipeline. Upload some documents to get started!")
 
 if auto_refresh:
-    import time
-    time.sleep(30)
     st.session_state.refresh_counter += 1
-    st.rerun()
\ No newline at end of file
+    polling.rerun_after(30)
\ No newline at end of file
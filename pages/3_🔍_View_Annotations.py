@@ -4,6 +4,8 @@ import os
 import json
 import pandas as pd
 
+from utils import cache, chunk_search, doc_view, entity_stats, metrics, polling, reprocess
+
 # Safe settings initialization
 if "settings" not in st.session_state:
     from config.settings import DashboardSettings
@@ -21,20 +23,12 @@ if not os.path.exists(annotated_dir):
     st.stop()
 
 documents = []
-for doc_id in os.listdir(annotated_dir):
-    doc_path = os.path.join(annotated_dir, doc_id)
-    if os.path.isdir(doc_path):
-        annotation_files = [f for f in os.listdir(doc_path) if f.endswith('_annotations.json')]
+with metrics.timed("annotation_scan"):
+    for doc_id in cache.subdirs(annotated_dir):
+        doc_path = os.path.join(annotated_dir, doc_id)
+        annotation_files = cache.files(doc_path, '_annotations.json')
         if annotation_files:
-            metadata_path = os.path.join(pipeline_dir, "classified", doc_id, "metadata.json")
-            doc_type = "Unknown"
-            if os.path.exists(metadata_path):
-                try:
-                    with open(metadata_path, 'r') as f:
-                        metadata = json.load(f)
-                        doc_type = metadata.get('doc_type', 'Unknown')
-                except:
-                    pass
+            doc_type = cache.doc_metadata(pipeline_dir, doc_id).get('doc_type', 'Unknown')
             documents.append({
                 'doc_id': doc_id,
                 'type': doc_type,
@@ -59,107 +53,168 @@ if selected_doc_key:
     with col3:
         st.metric("Chunks", selected_doc['chunks'])
 
-    annotation_files = sorted([f for f in os.listdir(selected_doc['path']) if f.endswith('_annotations.json')])
-    st.markdown("## 📝 Select Chunk")
-    chunk_files = {f"Chunk {i+1}": f for i, f in enumerate(annotation_files)}
-    selected_chunk_key = st.selectbox("Choose a chunk to view", options=list(chunk_files.keys()))
-    if selected_chunk_key:
-        selected_file = chunk_files[selected_chunk_key]
-        file_path = os.path.join(selected_doc['path'], selected_file)
-        try:
-            with open(file_path, 'r') as f:
-                annotation_data = json.load(f)
-            tab1, tab2, tab3 = st.tabs(["📋 Content", "🏷️ Annotations", "📊 Summary"])
-            with tab1:
-                st.markdown("### Original Content")
-                content = annotation_data.get('content', '')
-                st.text_area("Document Content", value=content, height=300, disabled=True)
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.metric("Characters", len(content))
-                with col2:
-                    st.metric("Words", len(content.split()))
-                with col3:
-                    st.metric("Lines", len(content.split('\n')))
-            with tab2:
-                st.markdown("### Extracted Annotations")
-                annotations = annotation_data.get('annotations', {})
-                if annotations and 'error' not in annotations:
-                    cols = st.columns(2)
-                    with cols[0]:
-                        if 'dates' in annotations and annotations['dates']:
-                            with st.expander(f"📅 Dates ({len(annotations['dates'])})", expanded=True):
-                                for date in annotations['dates']:
-                                    st.code(date)
-                        if 'companies' in annotations and annotations['companies']:
-                            with st.expander(f"🏢 Companies ({len(annotations['companies'])})", expanded=True):
-                                for company in annotations['companies']:
-                                    st.code(company)
-                    with cols[1]:
-                        if 'people' in annotations and annotations['people']:
-                            with st.expander(f"👥 People ({len(annotations['people'])})", expanded=True):
-                                for person in annotations['people']:
-                                    st.code(person)
-                        if 'amounts' in annotations and annotations['amounts']:
-                            with st.expander(f"💰 Amounts ({len(annotations['amounts'])})", expanded=True):
-                                for amount in annotations['amounts']:
-                                    st.code(amount)
-                    if 'compliance_status' in annotations and annotations['compliance_status']:
-                        st.markdown("#### 📋 Compliance Status")
-                        st.info(annotations['compliance_status'])
-                    if 'action_items' in annotations and annotations['action_items']:
-                        st.markdown("#### ✅ Action Items")
-                        for i, item in enumerate(annotations['action_items'], 1):
-                            st.checkbox(f"{i}. {item}", value=False)
-                    if 'tables' in annotations and annotations['tables']:
-                        st.markdown("#### 📊 Tables")
-                        for i, table in enumerate(annotations['tables'], 1):
-                            with st.expander(f"Table {i}"):
-                                if isinstance(table, list):
-                                    df = pd.DataFrame(table)
-                                    st.dataframe(df, use_container_width=True)
-                                else:
-                                    st.json(table)
-                    with st.expander("📦 Raw JSON"):
-                        st.json(annotations)
-                else:
-                    st.warning("No annotations found or annotation failed")
-                    if 'error' in annotations:
-                        st.error(f"Error: {annotations['error']}")
-            with tab3:
-                st.markdown("### Annotation Summary")
-                summary_stats = {}
-                if 'annotations' in annotation_data:
-                    ann = annotation_data['annotations']
-                    summary_stats = {
-                        "Total Entities": sum(len(ann.get(k, [])) for k in ['dates', 'companies', 'people', 'amounts']),
-                        "Dates Found": len(ann.get('dates', [])),
-                        "Companies Found": len(ann.get('companies', [])),
-                        "People Found": len(ann.get('people', [])),
-                        "Amounts Found": len(ann.get('amounts', [])),
-                        "Has Compliance": bool(ann.get('compliance_status')),
-                        "Action Items": len(ann.get('action_items', [])),
-                        "Tables Extracted": len(ann.get('tables', []))
-                    }
-                cols = st.columns(4)
-                for i, (key, value) in enumerate(summary_stats.items()):
-                    with cols[i % 4]:
-                        st.metric(key, value)
-                quality_score = min(100, summary_stats.get("Total Entities", 0) * 10)
-                st.progress(quality_score / 100, text=f"Extraction Quality: {quality_score}%")
-                if quality_score < 50:
-                    st.warning("**Suggestions for improvement:** Document might be poorly formatted")
+    annotation_files = cache.files(selected_doc['path'], '_annotations.json')
+    view_mode = st.radio("View", ["Whole document", "Single chunk"], horizontal=True,
+                         help="Whole document merges every chunk's annotations into one deduplicated set")
+    if view_mode == "Whole document":
+        st.markdown("## 📚 Consolidated Annotations")
+        merged = doc_view.consolidated(pipeline_dir, settings.DASHBOARD_STATE_DIR, selected_doc['doc_id'])
+        st.caption(f"{merged['chunk_count']} chunk(s), {merged['failed_chunks']} failed • merged "
+                   f"{merged['merged_at'][:19]}{'' if merged['built'] else ' (cached)'}")
+        cols = st.columns(len(entity_stats.ENTITY_TYPES))
+        for col, entity_type in zip(cols, entity_stats.ENTITY_TYPES):
+            with col:
+                st.metric(f"Unique {entity_type.title()}", len(merged['entities'][entity_type]))
+        entity_tabs = st.tabs([entity_type.title() for entity_type in entity_stats.ENTITY_TYPES])
+        for entity_tab, entity_type in zip(entity_tabs, entity_stats.ENTITY_TYPES):
+            with entity_tab:
+                values = merged['entities'][entity_type]
+                if values:
+                    st.dataframe(pd.DataFrame([{
+                        "Value": v['value'], "Mentions": v['mentions'], "Chunks": len(v['chunks']),
+                        "Found In": ", ".join(v['chunks'])
+                    } for v in values]), use_container_width=True, hide_index=True)
                 else:
-                    st.success("Good extraction quality!")
-        except Exception as e:
-            st.error(f"Error loading annotation: {str(e)}")
+                    st.info(f"No {entity_type} extracted")
+        if merged['compliance']:
+            st.markdown("#### 📋 Compliance Status")
+            st.dataframe(pd.DataFrame(merged['compliance']), use_container_width=True, hide_index=True)
+        if merged['action_items']:
+            st.markdown("#### ✅ Action Items")
+            st.dataframe(pd.DataFrame([{"Action Item": a['item'], "Found In": ", ".join(a['chunks'])}
+                                       for a in merged['action_items']]), use_container_width=True, hide_index=True)
+        if merged['tables'] or merged['other_tables']:
+            st.markdown("#### 📊 Combined Tables")
+            for i, table in enumerate(merged['tables'], 1):
+                chunk_ids = sorted({row['Chunk'] for row in table['rows']})
+                with st.expander(f"Table group {i}: {', '.join(table['columns'])} "
+                                 f"({len(table['rows'])} rows from {len(chunk_ids)} chunk(s))"):
+                    st.dataframe(pd.DataFrame(table['rows']), use_container_width=True, hide_index=True)
+            for table in merged['other_tables']:
+                with st.expander(f"{table['chunk']} — table {table['table']}"):
+                    st.json(table['data'])
+        with st.expander(f"🧩 Chunks ({merged['chunk_count']})"):
+            st.dataframe(pd.DataFrame(merged['chunks']), use_container_width=True, hide_index=True)
+    else:
+        st.markdown("## 📝 Select Chunk")
+        chunk_files = {f"Chunk {i+1}": f for i, f in enumerate(annotation_files)}
+        selected_chunk_key = st.selectbox("Choose a chunk to view", options=list(chunk_files.keys()))
+        if selected_chunk_key:
+            selected_file = chunk_files[selected_chunk_key]
+            file_path = os.path.join(selected_doc['path'], selected_file)
+            try:
+                annotation_data = cache.read_json(file_path)
+                if not isinstance(annotation_data, dict):
+                    raise ValueError("unreadable annotation file")
+                tab1, tab2, tab3 = st.tabs(["📋 Content", "🏷️ Annotations", "📊 Summary"])
+                with tab1:
+                    st.markdown("### Original Content")
+                    content = annotation_data.get('content', '')
+                    st.text_area("Document Content", value=content, height=300, disabled=True)
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        st.metric("Characters", len(content))
+                    with col2:
+                        st.metric("Words", len(content.split()))
+                    with col3:
+                        st.metric("Lines", len(content.split('\n')))
+                with tab2:
+                    st.markdown("### Extracted Annotations")
+                    annotations = annotation_data.get('annotations', {})
+                    if annotations and 'error' not in annotations:
+                        cols = st.columns(2)
+                        with cols[0]:
+                            if 'dates' in annotations and annotations['dates']:
+                                with st.expander(f"📅 Dates ({len(annotations['dates'])})", expanded=True):
+                                    for date in annotations['dates']:
+                                        st.code(date)
+                            if 'companies' in annotations and annotations['companies']:
+                                with st.expander(f"🏢 Companies ({len(annotations['companies'])})", expanded=True):
+                                    for company in annotations['companies']:
+                                        st.code(company)
+                        with cols[1]:
+                            if 'people' in annotations and annotations['people']:
+                                with st.expander(f"👥 People ({len(annotations['people'])})", expanded=True):
+                                    for person in annotations['people']:
+                                        st.code(person)
+                            if 'amounts' in annotations and annotations['amounts']:
+                                with st.expander(f"💰 Amounts ({len(annotations['amounts'])})", expanded=True):
+                                    for amount in annotations['amounts']:
+                                        st.code(amount)
+                        if 'compliance_status' in annotations and annotations['compliance_status']:
+                            st.markdown("#### 📋 Compliance Status")
+                            st.info(annotations['compliance_status'])
+                        if 'action_items' in annotations and annotations['action_items']:
+                            st.markdown("#### ✅ Action Items")
+                            for i, item in enumerate(annotations['action_items'], 1):
+                                st.checkbox(f"{i}. {item}", value=False)
+                        if 'tables' in annotations and annotations['tables']:
+                            st.markdown("#### 📊 Tables")
+                            for i, table in enumerate(annotations['tables'], 1):
+                                with st.expander(f"Table {i}"):
+                                    if isinstance(table, list):
+                                        df = pd.DataFrame(table)
+                                        st.dataframe(df, use_container_width=True)
+                                    else:
+                                        st.json(table)
+                        with st.expander("📦 Raw JSON"):
+                            st.json(annotations)
+                    else:
+                        st.warning("No annotations found or annotation failed")
+                        if 'error' in annotations:
+                            st.error(f"Error: {annotations['error']}")
+                with tab3:
+                    st.markdown("### Annotation Summary")
+                    summary_stats = {}
+                    if 'annotations' in annotation_data:
+                        ann = annotation_data['annotations']
+                        summary_stats = {
+                            "Total Entities": sum(len(ann.get(k, [])) for k in ['dates', 'companies', 'people', 'amounts']),
+                            "Dates Found": len(ann.get('dates', [])),
+                            "Companies Found": len(ann.get('companies', [])),
+                            "People Found": len(ann.get('people', [])),
+                            "Amounts Found": len(ann.get('amounts', [])),
+                            "Has Compliance": bool(ann.get('compliance_status')),
+                            "Action Items": len(ann.get('action_items', [])),
+                            "Tables Extracted": len(ann.get('tables', []))
+                        }
+                    cols = st.columns(4)
+                    for i, (key, value) in enumerate(summary_stats.items()):
+                        with cols[i % 4]:
+                            st.metric(key, value)
+                    quality_score = min(100, summary_stats.get("Total Entities", 0) * 10)
+                    st.progress(quality_score / 100, text=f"Extraction Quality: {quality_score}%")
+                    if quality_score < 50:
+                        st.warning("**Suggestions for improvement:** Document might be poorly formatted")
+                    else:
+                        st.success("Good extraction quality!")
+            except Exception as e:
+                st.error(f"Error loading annotation: {str(e)}")
 
     st.markdown("---")
     st.markdown("## 🔄 Batch Operations")
     col1, col2 = st.columns(2)
     with col1:
+        reprocess_scope = st.selectbox("Reprocess scope", options=[
+            "Selected document — all chunks",
+            "Selected document — failed chunks only",
+            "All documents — failed chunks only"
+        ])
         if st.button("🔄 Reprocess All Chunks", type="secondary"):
-            st.info("This would requeue all chunks for reprocessing")
+            scope_docs = None if reprocess_scope.startswith("All documents") else [selected_doc['doc_id']]
+            only_errors = reprocess_scope.endswith("failed chunks only")
+            items = reprocess.find_chunks(annotated_dir, scope_docs, only_errors)
+            if items:
+                description = reprocess_scope if scope_docs is None else f"{selected_doc['doc_id']} ({reprocess_scope.split('— ')[1]})"
+                job = reprocess.create_job(settings.DASHBOARD_STATE_DIR, items, description)
+                reprocess.start_job(
+                    settings.DASHBOARD_STATE_DIR, job['job_id'], settings.PIPELINE_API_URL,
+                    settings.REPROCESS_ENDPOINT, settings.REPROCESS_MAX_CONCURRENCY,
+                    settings.REPROCESS_RATE_PER_SEC
+                )
+                st.success(f"Queued {len(items)} chunk(s) for reprocessing")
+            else:
+                st.info("No chunks match the selected scope")
     with col2:
         if st.button("📥 Export All Annotations", type="primary"):
             all_annotations = []
@@ -182,39 +237,153 @@ if selected_doc_key:
             else:
                 st.warning("No annotations to export")
 
+reprocess_jobs = reprocess.list_jobs(settings.DASHBOARD_STATE_DIR)
+if reprocess_jobs:
+    st.markdown("### 📋 Reprocessing Jobs")
+    for job in reprocess_jobs[:10]:
+        progress = reprocess.job_progress(job)
+        done = progress[reprocess.SUBMITTED] + progress[reprocess.FAILED]
+        running = reprocess.is_running(job['job_id'])
+        state = "running" if running else ("interrupted" if job.get('state') == "running" else job.get('state', 'queued'))
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.progress(
+                done / progress['total'] if progress['total'] else 1.0,
+                text=f"{job['description']} — {done}/{progress['total']} "
+                     f"(✅ {progress[reprocess.SUBMITTED]}, ❌ {progress[reprocess.FAILED]}) • {state}"
+            )
+        with col2:
+            if running:
+                if st.button("⏸️ Pause", key=f"pause_{job['job_id']}"):
+                    reprocess.pause_job(job['job_id'])
+                    st.rerun()
+            elif progress[reprocess.PENDING]:
+                if st.button("▶️ Resume", key=f"resume_{job['job_id']}"):
+                    reprocess.start_job(
+                        settings.DASHBOARD_STATE_DIR, job['job_id'], settings.PIPELINE_API_URL,
+                        settings.REPROCESS_ENDPOINT, settings.REPROCESS_MAX_CONCURRENCY,
+                        settings.REPROCESS_RATE_PER_SEC
+                    )
+                    st.rerun()
+            elif progress[reprocess.FAILED]:
+                if st.button("🔁 Retry Failed", key=f"retry_{job['job_id']}"):
+                    reprocess.retry_failed(settings.DASHBOARD_STATE_DIR, job['job_id'])
+                    reprocess.start_job(
+                        settings.DASHBOARD_STATE_DIR, job['job_id'], settings.PIPELINE_API_URL,
+                        settings.REPROCESS_ENDPOINT, settings.REPROCESS_MAX_CONCURRENCY,
+                        settings.REPROCESS_RATE_PER_SEC
+                    )
+                    st.rerun()
+        failed_items = [item for item in job['items'] if item.get('status') == reprocess.FAILED]
+        if failed_items:
+            with st.expander(f"❌ Failed submissions ({len(failed_items)})"):
+                st.dataframe(pd.DataFrame(failed_items), use_container_width=True, hide_index=True)
+
 st.markdown("---")
-st.markdown("## 🔍 Search Annotations")
-search_query = st.text_input("Search across all annotations (dates, companies, amounts, etc.)")
-if search_query:
-    results = []
-    for doc in documents:
-        doc_path = doc['path']
-        for ann_file in os.listdir(doc_path):
-            if ann_file.endswith('_annotations.json'):
-                file_path = os.path.join(doc_path, ann_file)
-                try:
-                    with open(file_path, 'r') as f:
-                        data = json.load(f)
-                        annotations = data.get('annotations', {})
-                        found = any(search_query.lower() in str(v).lower() for vals in annotations.values() if isinstance(vals, (list, str)) for v in (vals if isinstance(vals, list) else [vals]))
-                        if found:
-                            results.append({
-                                'Document': doc['doc_id'],
-                                'Type': doc['type'],
-                                'File': ann_file,
-                                'Path': file_path
-                            })
-                except:
-                    pass
-    if results:
-        st.success(f"Found {len(results)} results")
-        for result in results:
-            with st.expander(f"{result['Document']} - {result['File']}"):
-                try:
-                    with open(result['Path'], 'r') as f:
-                        data = json.load(f)
-                        st.json(data.get('annotations', {}))
-                except:
-                    st.error("Could not load annotation")
-    else:
-        st.info("No results found")
\ No newline at end of file
+st.markdown("## 📈 Corpus Entity Analytics")
+analytics = entity_stats.get_analytics(pipeline_dir, settings.DASHBOARD_STATE_DIR)
+col1, col2 = st.columns([3, 1])
+with col2:
+    rebuild = st.button("🔄 Rebuild", help="Re-read every chunk instead of only new or changed ones")
+analytics_summary = analytics.refresh(full=True) if rebuild else analytics.latest()
+with col1:
+    st.caption(f"{analytics_summary['documents']} documents • {analytics_summary['chunks']} chunks "
+               f"({analytics_summary['failed_chunks']} failed) • updated {analytics_summary['refreshed'][:19]}, "
+               f"{analytics_summary['parsed_chunks']} chunk(s) re-read in {analytics_summary['duration_seconds']}s")
+density = analytics.density()
+if density:
+    st.markdown("#### Extraction density by document type")
+    st.dataframe(pd.DataFrame(density), use_container_width=True, hide_index=True)
+    analytics_doc_type = st.selectbox("Document type", options=["All"] + analytics_summary['doc_types'],
+                                      key="analytics_doc_type")
+    entity_tabs = st.tabs([entity_type.title() for entity_type in entity_stats.ENTITY_TYPES])
+    for entity_tab, entity_type in zip(entity_tabs, entity_stats.ENTITY_TYPES):
+        with entity_tab:
+            rows = analytics.frequencies(entity_type, None if analytics_doc_type == "All" else analytics_doc_type)
+            if rows:
+                st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+            else:
+                st.info(f"No {entity_type} extracted")
+
+st.markdown("---")
+st.markdown("## 🔍 Search")
+search_mode = st.radio("Search in", ["Chunk content", "Annotation values"], horizontal=True,
+                       help="Chunk content is a ranked full-text search over the OCR text of every chunk")
+if search_mode == "Chunk content":
+    search_index = chunk_search.get_index(pipeline_dir, settings.DASHBOARD_STATE_DIR)
+    col1, col2, col3 = st.columns([4, 2, 1])
+    with col3:
+        rebuild_index = st.button("🔄 Rebuild index", help="Re-read every chunk, including files rewritten in place")
+    with st.spinner("Updating search index..."):
+        try:
+            index_summary = search_index.refresh(full=True) if rebuild_index else search_index.latest()
+        except Exception as e:
+            # Search what is already indexed rather than losing the whole section
+            st.warning(f"⚠️ Could not update the search index: {e}")
+            index_summary = search_index.last_summary or {
+                "refreshed": "never", "duration_seconds": 0, "documents": 0, "chunks": 0,
+                "rescanned_documents": 0, "parsed_chunks": 0, "doc_types": []
+            }
+    with col1:
+        content_query = st.text_input("Search chunk text",
+                                      help='Words must all match; "quoted words" match as a phrase, prefix* '
+                                           'matches word starts, OR / NOT combine terms')
+    with col2:
+        search_doc_type = st.selectbox("Document type", options=["All"] + index_summary['doc_types'],
+                                       key="search_doc_type")
+    st.caption(f"{index_summary['chunks']:,} chunks from {index_summary['documents']} documents indexed • "
+               f"updated {index_summary['refreshed'][:19]}, {index_summary['parsed_chunks']} chunk(s) "
+               f"re-read in {index_summary['duration_seconds']}s")
+    if content_query:
+        found = search_index.search(content_query, None if search_doc_type == "All" else search_doc_type, limit=25)
+        if found['results']:
+            if found['capped']:
+                st.success(f"More than {found['total']:,} matching chunks — top {len(found['results'])} by "
+                           f"relevance among the {found['total']:,} most recently indexed")
+            else:
+                st.success(f"{found['total']:,} matching chunks — top {len(found['results'])} by relevance")
+            for result in found['results']:
+                st.markdown(f"**{result['doc_id']}** · `{result['chunk_file']}` · {result['doc_type']} · "
+                            f"score {result['score']:.2f}")
+                st.markdown(chunk_search.highlight_markdown(result['snippet']))
+        else:
+            st.info("No results found")
+else:
+    search_query = st.text_input("Search across all annotations (dates, companies, amounts, etc.)")
+    if search_query:
+        results = []
+        for doc in documents:
+            doc_path = doc['path']
+            for ann_file in os.listdir(doc_path):
+                if ann_file.endswith('_annotations.json'):
+                    file_path = os.path.join(doc_path, ann_file)
+                    try:
+                        with open(file_path, 'r') as f:
+                            data = json.load(f)
+                            annotations = data.get('annotations', {})
+                            found = any(search_query.lower() in str(v).lower() for vals in annotations.values() if isinstance(vals, (list, str)) for v in (vals if isinstance(vals, list) else [vals]))
+                            if found:
+                                results.append({
+                                    'Document': doc['doc_id'],
+                                    'Type': doc['type'],
+                                    'File': ann_file,
+                                    'Path': file_path
+                                })
+                    except:
+                        pass
+        if results:
+            st.success(f"Found {len(results)} results")
+            for result in results:
+                with st.expander(f"{result['Document']} - {result['File']}"):
+                    try:
+                        with open(result['Path'], 'r') as f:
+                            data = json.load(f)
+                            st.json(data.get('annotations', {}))
+                    except:
+                        st.error("Could not load annotation")
+        else:
+            st.info("No results found")
+
+# Live progress for running reprocess jobs
+if any(reprocess.is_running(job['job_id']) for job in reprocess_jobs):
+    polling.rerun_after(2)
\ No newline at end of file
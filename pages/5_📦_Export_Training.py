@@ -4,9 +4,9 @@ import os
 import json
 import pandas as pd
 from datetime import datetime
-import zipfile
 import random
-from collections import defaultdict
+
+from utils import cache, export, export_diff, export_jobs, federation, polling
 
 # Safe settings initialization
 if "settings" not in st.session_state:
@@ -24,35 +24,24 @@ st.markdown("Export processed data in formats ready for model training")
 
 os.makedirs(train_dir, exist_ok=True)
 
-if not os.path.exists(validated_dir):
+fleet = federation.instances(settings)
+if not any(os.path.exists(os.path.join(instance['data_dir'], "validated")) for instance in fleet):
     st.error("❌ No validated data found. Need to process and validate documents first.")
     st.stop()
+# Federated deployments can export from several pipeline instances at once
+if len(fleet) > 1:
+    export_instances = st.multiselect("Export from pipeline instances", options=[i['name'] for i in fleet],
+                                      default=[i['name'] for i in fleet],
+                                      help=f"Exports are written to {train_dir}")
+    fleet = [i for i in fleet if i['name'] in export_instances]
+sample_sources = federation.sample_sources(fleet)
 
 # Statistics
 st.markdown("## 📊 Available Data Statistics")
-stats = {
-    "Validated Documents": 0,
-    "Validated Chunks": 0,
-    "Synthetic Samples": 0,
-    "Total Training Samples": 0
-}
-
-if os.path.exists(validated_dir):
-    validated_docs = [d for d in os.listdir(validated_dir) if os.path.isdir(os.path.join(validated_dir, d))]
-    stats["Validated Documents"] = len(validated_docs)
-    for doc_id in validated_docs:
-        doc_path = os.path.join(validated_dir, doc_id)
-        validated_files = [f for f in os.listdir(doc_path) if f.endswith('_validated.json')]
-        stats["Validated Chunks"] += len(validated_files)
-
-if os.path.exists(synthetic_dir):
-    for doc_id in os.listdir(synthetic_dir):
-        doc_path = os.path.join(synthetic_dir, doc_id)
-        if os.path.isdir(doc_path):
-            synthetic_files = [f for f in os.listdir(doc_path) if f.endswith('.json') and 'syn' in f]
-            stats["Synthetic Samples"] += len(synthetic_files)
-
-stats["Total Training Samples"] = stats["Validated Chunks"] + stats["Synthetic Samples"]
+stats = {"Validated Documents": 0, "Validated Chunks": 0, "Synthetic Samples": 0, "Total Training Samples": 0}
+for source in sample_sources:
+    for key, value in cache.dataset_stats(source['validated_dir'], source['synthetic_dir']).items():
+        stats[key] = stats.get(key, 0) + value
 
 cols = st.columns(4)
 for i, (key, value) in enumerate(stats.items()):
@@ -88,63 +77,14 @@ if os.path.exists(qwen_path):
         for sample in preview:
             st.json(sample)
 else:
-    st.info("No Qwen3 dataset yet — generated automatically after validation completes")
+    st.info("No Qwen3 dataset from the pipeline yet — generated automatically after validation completes")
+st.caption("To build one here with your own system prompt, user template and quality filter, "
+           "choose **Qwen3 Chat (messages)** as the export format below.")
 
 # === Advanced Export (Your existing code) ===
 st.markdown("---")
 st.markdown("## 🎛️ Advanced Export (SFT/RLAIF/RLHF)")
 
-# Helper function to load samples
-def load_samples(min_quality=0.7, include_synthetic=True):
-    """Load all samples from validated and optionally synthetic directories"""
-    samples = []
-    
-    if os.path.exists(validated_dir):
-        for doc_id in os.listdir(validated_dir):
-            doc_path = os.path.join(validated_dir, doc_id)
-            if os.path.isdir(doc_path):
-                for file in os.listdir(doc_path):
-                    if file.endswith('_validated.json'):
-                        file_path = os.path.join(doc_path, file)
-                        try:
-                            with open(file_path, 'r') as f:
-                                data = json.load(f)
-                                quality_score = data.get('validation', {}).get('score', 0)
-                                if quality_score >= min_quality:
-                                    samples.append({
-                                        **data,
-                                        'source': 'validated',
-                                        'doc_id': doc_id,
-                                        'file_name': file,
-                                        'quality': quality_score
-                                    })
-                        except Exception as e:
-                            st.warning(f"Could not load {file_path}: {e}")
-    
-    if include_synthetic and os.path.exists(synthetic_dir):
-        for doc_id in os.listdir(synthetic_dir):
-            doc_path = os.path.join(synthetic_dir, doc_id)
-            if os.path.isdir(doc_path):
-                for file in os.listdir(doc_path):
-                    if file.endswith('.json') and 'syn' in file:
-                        file_path = os.path.join(doc_path, file)
-                        try:
-                            with open(file_path, 'r') as f:
-                                data = json.load(f)
-                                quality_score = data.get('validation', {}).get('score', 0.7)
-                                if quality_score >= min_quality:
-                                    samples.append({
-                                        **data,
-                                        'source': 'synthetic',
-                                        'doc_id': doc_id,
-                                        'file_name': file,
-                                        'quality': quality_score
-                                    })
-                        except Exception as e:
-                            st.warning(f"Could not load synthetic {file_path}: {e}")
-    
-    return samples
-
 # Export Configuration
 st.markdown("## ⚙️ Export Configuration")
 col1, col2 = st.columns(2)
@@ -168,6 +108,15 @@ with col2:
     
     st.info(f"Split: Train {split_train*100:.0f}%, Val {split_val*100:.0f}%, Test {split_test*100:.0f}%")
     batch_size = st.number_input("Samples per file", min_value=1, max_value=10000, value=1000)
+    shard_output = st.checkbox("Shard output files", value=False,
+                               help="Write each split as numbered files of at most \"Samples per file\" "
+                                    "lines (train-00000.jsonl, ...) instead of one file per split")
+    stratify = st.checkbox("Stratify splits by document type and source", value=True,
+                           help="Every document type keeps the same train/val/test proportions, "
+                                "so rare types still appear in validation and test")
+    max_per_type = st.number_input("Max samples per document type (0 = no cap)", min_value=0,
+                                   max_value=1000000, value=0,
+                                   help="Dominant types are down-sampled uniformly at random")
 
 # Format-specific settings
 st.markdown("## 🎛️ Format Settings")
@@ -212,13 +161,64 @@ elif export_format == "rlhf":
                                    0.0, 0.5, 0.1,
                                    help="Minimum difference between chosen and rejected")
 
+elif export_format == "qwen3":
+    system_prompt = st.text_area("System message", value=export.QWEN3_SYSTEM_PROMPT,
+                                 help="Leave empty to train without a system message")
+    user_template = st.text_area("User message template", value=export.QWEN3_USER_TEMPLATE,
+                                 help="Placeholders: {content}, {doc_type}, {doc_id}, {source}")
+    col1, col2 = st.columns(2)
+    with col1:
+        simplify_annotations = st.checkbox("Simplify annotations", value=True,
+                                          help="Convert complex annotation structures to simpler JSON")
+    with col2:
+        include_metadata = st.checkbox("Include metadata in output", value=True,
+                                       help="Adds source, quality and document fields next to messages")
+    if "{content}" not in user_template:
+        st.warning("The user template has no {content} placeholder — the document text will not be included")
+
 # Preview data
 st.markdown("## 👁️ Data Preview")
+col1, col2 = st.columns(2)
+with col1:
+    preview_mode = st.radio("Preview mode", ["Quick (sampled)", "Full scan"], horizontal=True,
+                            help="Quick parses a random sample of files and estimates the rest; "
+                                 "a full scan reads every sample file")
+with col2:
+    preview_size = st.number_input("Files to sample", min_value=20, max_value=5000, value=200,
+                                   disabled=preview_mode != "Quick (sampled)")
 if st.button("🔍 Load and Preview Samples", type="secondary"):
     with st.spinner("Loading samples..."):
-        all_samples = load_samples(min_quality, include_synthetic)
+        load_warnings = []
+        if preview_mode == "Quick (sampled)":
+            preview = export.preview_samples(sample_sources, min_quality, include_synthetic,
+                                             int(preview_size), warnings=load_warnings)
+            all_samples = preview['samples']
+        else:
+            preview = None
+            all_samples = export.load_samples(sample_sources, min_quality,
+                                              include_synthetic, warnings=load_warnings)
+        for warning in load_warnings:
+            st.warning(warning)
         
-        if all_samples:
+        if preview is not None and preview['parsed']:
+            low, high = preview['estimated_samples_ci']
+            st.success(f"✅ Estimated ~{preview['estimated_samples']:,} samples with quality ≥ {min_quality} "
+                       f"(95% CI {low:,}–{high:,}) from {preview['parsed']} of {preview['files']:,} files")
+            
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                mean_low, mean_high = preview['mean_quality_ci']
+                st.metric("Mean Quality", f"{preview['mean_quality']:.2f}",
+                          help=f"95% CI {mean_low:.2f}–{mean_high:.2f}")
+            for column, source in zip((col2, col3), ('validated', 'synthetic')):
+                info = preview['sources'].get(source)
+                if info:
+                    with column:
+                        low, high = info['estimated_samples_ci']
+                        st.metric(source.title(), f"~{info['estimated_samples'] or 0:,}",
+                                  help=f"{info['files']:,} files, {info['parsed']} parsed; "
+                                       f"95% CI {low:,}–{high:,} passing the quality filter")
+        elif all_samples:
             st.success(f"✅ Loaded {len(all_samples)} samples (quality ≥ {min_quality})")
             
             # Show distribution
@@ -233,12 +233,14 @@ if st.button("🔍 Load and Preview Samples", type="secondary"):
             with col3:
                 if include_synthetic:
                     st.metric("Synthetic", source_counts.get('synthetic', 0))
-            
+        
+        if all_samples:
             # Show sample preview
             preview_samples = random.sample(all_samples, min(5, len(all_samples)))
             preview_data = []
             for sample in preview_samples:
                 preview_data.append({
+                    **({'Instance': sample['instance']} if settings.PIPELINE_INSTANCES else {}),
                     'Source': sample['source'],
                     'Document': sample['doc_id'],
                     'Content Preview': sample.get('content', '')[:100] + '...',
@@ -247,7 +249,14 @@ if st.button("🔍 Load and Preview Samples", type="secondary"):
                 })
             
             st.dataframe(pd.DataFrame(preview_data), use_container_width=True)
-            
+        
+        if preview is not None and preview['parsed']:
+            st.subheader("📈 Estimated Quality Distribution")
+            df_hist = pd.DataFrame(preview['histogram'])
+            st.bar_chart(df_hist.set_index('Quality')['Share'])
+            st.dataframe(df_hist.style.format({'Share': '{:.1%}', 'Low': '{:.1%}', 'High': '{:.1%}'}),
+                         use_container_width=True, hide_index=True)
+        elif all_samples:
             # Show quality distribution
             st.subheader("📈 Quality Distribution")
             qualities = [s.get('quality', 0) for s in all_samples]
@@ -257,341 +266,141 @@ if st.button("🔍 Load and Preview Samples", type="secondary"):
         else:
             st.warning("No samples found matching criteria")
 
-# Helper functions for format conversion
-def convert_to_sft_format(sample, instruction_template, simplify=True):
-    """Convert a sample to SFT format"""
-    content = sample.get('content', '')
-    annotations = sample.get('annotations', {})
-    
-    # Simplify annotations if requested
-    if simplify and annotations:
-        simplified = {}
-        for key, value in annotations.items():
-            if isinstance(value, dict):
-                # Extract simple values
-                if 'value' in value:
-                    simplified[key] = value['value']
-                elif 'text' in value:
-                    simplified[key] = value['text']
-                else:
-                    simplified[key] = str(value)
-            else:
-                simplified[key] = value
-        annotations = simplified
-    
-    return {
-        "instruction": instruction_template,
-        "input": content,
-        "output": json.dumps(annotations, ensure_ascii=False),
-        "source": sample.get('source', 'unknown'),
-        "quality": sample.get('quality', 0),
-        "metadata": sample.get('metadata', {})
-    }
-
-def convert_to_rlaif_format(sample, score_field='quality'):
-    """Convert a sample to RLAIF format"""
-    content = sample.get('content', '')
-    
-    # Determine score
-    if score_field == 'quality':
-        score = sample.get('quality', 0)
-    elif score_field == 'validation_score':
-        score = sample.get('validation', {}).get('score', 0)
-    elif score_field == 'composite':
-        # Composite score calculation
-        quality = sample.get('quality', 0)
-        validation_score = sample.get('validation', {}).get('score', 0)
-        completeness = sample.get('validation', {}).get('completeness', 0.5)
-        score = (0.5 * quality + 0.3 * validation_score + 0.2 * completeness)
-    else:
-        score = sample.get(score_field, 0)
-    
-    return {
-        "prompt": f"Extract information from: {content[:200]}...",
-        "response": json.dumps(sample.get('annotations', {}), ensure_ascii=False),
-        "score": float(score),
-        "source": sample.get('source', 'unknown'),
-        "metadata": sample.get('metadata', {})
-    }
-
-def convert_to_rlhf_format(samples, method='quality', min_diff=0.1):
-    """Convert samples to RLHF comparison format"""
-    comparisons = []
-    
-    # Group by document for fair comparisons
-    doc_groups = defaultdict(list)
-    for sample in samples:
-        doc_groups[sample['doc_id']].append(sample)
-    
-    for doc_id, doc_samples in doc_groups.items():
-        if len(doc_samples) < 2:
-            continue
-        
-        # Sort by quality
-        doc_samples.sort(key=lambda x: x.get('quality', 0), reverse=True)
-        
-        # Create comparisons
-        for i in range(min(len(doc_samples), 5)):
-            for j in range(i + 1, min(len(doc_samples), 5)):
-                chosen = doc_samples[i]
-                rejected = doc_samples[j]
-                
-                # Check quality difference
-                if chosen.get('quality', 0) - rejected.get('quality', 0) >= min_diff:
-                    comparisons.append({
-                        "prompt": f"Extract information from this construction document",
-                        "chosen": json.dumps(chosen.get('annotations', {}), ensure_ascii=False),
-                        "rejected": json.dumps(rejected.get('annotations', {}), ensure_ascii=False),
-                        "chosen_quality": chosen.get('quality', 0),
-                        "rejected_quality": rejected.get('quality', 0),
-                        "doc_id": doc_id
-                    })
-    
-    return comparisons
-
 # Export Button
 st.markdown("## 🚀 Generate Export")
-if st.button("🚀 Generate Training Dataset", type="primary"):
-    with st.spinner("Generating training dataset..."):
-        try:
-            # Load all samples
-            all_samples = load_samples(min_quality, include_synthetic)
-            
-            if not all_samples:
-                st.error("❌ No samples found matching criteria")
-                st.stop()
-            
-            # Shuffle samples
-            random.shuffle(all_samples)
-            
-            # Create splits
-            n_samples = len(all_samples)
-            train_end = int(n_samples * split_train)
-            val_end = train_end + int(n_samples * split_val)
-            
-            train_samples = all_samples[:train_end]
-            val_samples = all_samples[train_end:val_end]
-            test_samples = all_samples[val_end:]
-            
-            # Convert to selected format
-            st.info(f"Converting {n_samples} samples to {export_format.upper()} format...")
-            
-            if export_format == "sft":
-                train_data = [convert_to_sft_format(s, instruction_template, simplify_annotations) 
-                            for s in train_samples]
-                val_data = [convert_to_sft_format(s, instruction_template, simplify_annotations) 
-                          for s in val_samples]
-                test_data = [convert_to_sft_format(s, instruction_template, simplify_annotations) 
-                           for s in test_samples]
-                
-            elif export_format == "rlaif":
-                train_data = [convert_to_rlaif_format(s, score_field) for s in train_samples]
-                val_data = [convert_to_rlaif_format(s, score_field) for s in val_samples]
-                test_data = [convert_to_rlaif_format(s, score_field) for s in test_samples]
-                
-            elif export_format == "rlhf":
-                # RLHF requires comparisons
-                train_data = convert_to_rlhf_format(train_samples, comparison_method, min_quality_diff)
-                val_data = convert_to_rlhf_format(val_samples, comparison_method, min_quality_diff)
-                test_data = convert_to_rlhf_format(test_samples, comparison_method, min_quality_diff)
-            else:
-                # Default format (keep original)
-                train_data = train_samples
-                val_data = val_samples
-                test_data = test_samples
-            
-            # Create export directory
-            export_name_base = f"{export_format}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            export_dir = os.path.join(train_dir, export_name_base)
-            os.makedirs(export_dir, exist_ok=True)
-            
-            # Save datasets
-            def save_dataset(data, filename):
-                path = os.path.join(export_dir, filename)
-                with open(path, 'w', encoding='utf-8') as f:
-                    for item in data:
-                        f.write(json.dumps(item, ensure_ascii=False) + '\n')
-                return path
-            
-            train_path = save_dataset(train_data, "train.jsonl")
-            val_path = save_dataset(val_data, "validation.jsonl")
-            test_path = save_dataset(test_data, "test.jsonl")
-            
-            # Create metadata
-            metadata = {
-                "export_name": export_name_base,
-                "format": export_format,
-                "created": datetime.now().isoformat(),
-                "statistics": {
-                    "total_samples": n_samples,
-                    "train_samples": len(train_data),
-                    "validation_samples": len(val_data),
-                    "test_samples": len(test_data),
-                    "validated_samples": stats["Validated Chunks"],
-                    "synthetic_samples": stats["Synthetic Samples"]
-                },
-                "configuration": {
-                    "include_synthetic": include_synthetic,
-                    "min_quality": min_quality,
-                    "split_train": split_train,
-                    "split_val": split_val,
-                    "split_test": split_test,
-                    "batch_size": batch_size,
-                    "format_settings": {
-                        "export_format": export_format,
-                        **({"max_length": max_length} if export_format == "sft" else {}),
-                        **({"score_field": score_field} if export_format == "rlaif" else {}),
-                        **({"comparison_method": comparison_method} if export_format == "rlhf" else {})
-                    }
-                },
-                "files": {
-                    "train": "train.jsonl",
-                    "validation": "validation.jsonl",
-                    "test": "test.jsonl"
-                }
-            }
-            
-            metadata_path = os.path.join(export_dir, "metadata.json")
-            with open(metadata_path, 'w') as f:
-                json.dump(metadata, f, indent=2)
-            
-            # Create README
-            readme_content = f"""# Training Data Export: {export_name_base}
-
-## Summary
-- **Format**: {export_format.upper()} ({settings.EXPORT_FORMATS.get(export_format, export_format)})
-- **Created**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-- **Total Samples**: {n_samples}
-- **Train/Val/Test Split**: {len(train_data)}/{len(val_data)}/{len(test_data)}
-
-## Contents
-1. `train.jsonl` - Training dataset ({len(train_data)} samples)
-2. `validation.jsonl` - Validation dataset ({len(val_data)} samples)
-3. `test.jsonl` - Test dataset ({len(test_data)} samples)
-4. `metadata.json` - Complete metadata and configuration
+if st.button("🚀 Generate Training Dataset", type="primary", disabled=not sample_sources):
+    export_config = {
+        "export_format": export_format,
+        "include_synthetic": include_synthetic,
+        "min_quality": min_quality,
+        "split_train": split_train,
+        "split_val": split_val,
+        "split_test": split_test,
+        "batch_size": batch_size,
+        "shard_size": int(batch_size) if shard_output else None,
+        "stratify": stratify,
+        "instances": [source['instance'] for source in sample_sources] if settings.PIPELINE_INSTANCES else None,
+        "max_per_type": int(max_per_type) or None,
+        "max_length": max_length if export_format == "sft" else None,
+        "instruction_template": instruction_template if export_format == "sft" else None,
+        "simplify_annotations": simplify_annotations if export_format in ("sft", "qwen3") else None,
+        "system_prompt": system_prompt if export_format == "qwen3" else None,
+        "user_template": user_template if export_format == "qwen3" else None,
+        "include_metadata": include_metadata if export_format == "qwen3" else None,
+        "score_field": score_field if export_format == "rlaif" else None,
+        "comparison_method": comparison_method if export_format == "rlhf" else None,
+        "min_quality_diff": min_quality_diff if export_format == "rlhf" else None
+    }
+    job = export_jobs.submit_export(
+        settings.DASHBOARD_STATE_DIR,
+        {"train_dir": train_dir, "validated_dir": validated_dir, "synthetic_dir": synthetic_dir,
+         "classified_dir": os.path.join(pipeline_dir, "classified"),
+         # Federated: always export from the selected instances' directories, even when only one is selected
+         **({"sources": sample_sources} if settings.PIPELINE_INSTANCES else {})},
+        export_config,
+        stats,
+        settings.EXPORT_FORMATS.get(export_format, export_format),
+        settings.EXPORT_MAX_WORKERS,
+        settings.EXPORT_CONVERT_WORKERS
+    )
+    st.success(f"✅ Export `{job['export_name']}` submitted — it keeps running if you leave this page")
 
-## Statistics
-- Validated documents: {stats['Validated Documents']}
-- Validated chunks: {stats['Validated Chunks']}
-- Synthetic samples: {stats['Synthetic Samples']}
-- Minimum quality score: {min_quality}
+# Export Jobs
+export_job_list = export_jobs.list_export_jobs(settings.DASHBOARD_STATE_DIR)
+latest_export = next((job for job in export_job_list if job['state'] == "completed"), None)
+if latest_export:
+    # Save to session state for later use
+    st.session_state.last_export = {
+        "name": latest_export['export_name'],
+        "path": latest_export['export_dir'],
+        "metadata": latest_export['metadata']
+    }
+if export_job_list:
+    st.markdown("### ⏱️ Export Jobs")
+    for job in export_job_list[:10]:
+        state_icon = {"queued": "🕒", "running": "⚙️", "completed": "✅", "failed": "❌",
+                      "cancelled": "🚫", "interrupted": "⚠️"}.get(job['state'], "•")
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            st.progress(job.get('progress', 0) / 100,
+                        text=f"{state_icon} {job['export_name']} — {job.get('phase', '')} ({job.get('progress', 0)}%)")
+        with col2:
+            if job['state'] in ("queued", "running"):
+                if st.button("🚫 Cancel", key=f"cancel_{job['job_id']}"):
+                    export_jobs.cancel_export(settings.DASHBOARD_STATE_DIR, job['job_id'])
+                    st.rerun()
+            elif st.button("🗑️ Dismiss", key=f"dismiss_{job['job_id']}"):
+                export_jobs.remove_export_job(settings.DASHBOARD_STATE_DIR, job['job_id'])
+                st.rerun()
+        if job['state'] == "failed":
+            st.error(f"❌ Export failed: {job.get('error', 'unknown error')}")
+        if job.get('warnings'):
+            with st.expander(f"⚠️ Warnings ({len(job['warnings'])})"):
+                for warning in job['warnings']:
+                    st.warning(warning)
+        if job['state'] == "completed" and os.path.exists(job.get('export_dir', '')):
+            export_dir = job['export_dir']
+            stats_done = job['metadata']['statistics']
+            with st.expander(f"📋 Export Summary — {job['export_name']}"):
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.metric("Total Samples", stats_done['total_samples'])
+                with col2:
+                    st.metric("Train Samples", stats_done['train_samples'])
+                with col3:
+                    st.metric("Validation Samples", stats_done['validation_samples'])
+                if job['metadata'].get('strata'):
+                    st.markdown("#### 🧮 Split by stratum")
+                    st.dataframe(pd.DataFrame.from_dict(job['metadata']['strata'], orient='index'),
+                                 use_container_width=True)
 
-## Usage
-This dataset is ready for training with:
-- Transformers library for SFT/RLAIF
-- TRL library for RLHF
-- Custom training scripts
-
-## Notes
-- Data is shuffled before splitting
-- Quality filtering applied: ≥ {min_quality}
-- Synthetic data included: {include_synthetic}
-"""
-            
-            readme_path = os.path.join(export_dir, "README.md")
-            with open(readme_path, 'w') as f:
-                f.write(readme_content)
-            
-            # Create ZIP archive
-            zip_path = os.path.join(train_dir, f"{export_name_base}.zip")
-            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for file in ["train.jsonl", "validation.jsonl", "test.jsonl", "metadata.json", "README.md"]:
-                    file_path = os.path.join(export_dir, file)
-                    if os.path.exists(file_path):
-                        zipf.write(file_path, file)
-            
-            # Prepare download
-            with open(zip_path, 'rb') as f:
-                zip_data = f.read()
-            
-            st.success("✅ Export generated successfully!")
-            
-            # Show summary
-            st.markdown("### 📋 Export Summary")
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.metric("Total Samples", n_samples)
-            with col2:
-                st.metric("Train Samples", len(train_data))
-            with col3:
-                st.metric("Validation Samples", len(val_data))
-            
-            # Download buttons
-            st.markdown("### 📥 Download Options")
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.download_button(
-                    "📦 Download Complete ZIP",
-                    data=zip_data,
-                    file_name=f"{export_name_base}.zip",
-                    mime="application/zip"
-                )
-            with col2:
-                with open(train_path, 'r', encoding='utf-8') as f:
-                    train_data_text = f.read()
-                st.download_button(
-                    "📄 Download Train Set",
-                    data=train_data_text,
-                    file_name="train.jsonl",
-                    mime="application/jsonl"
-                )
-            with col3:
-                with open(metadata_path, 'r') as f:
-                    metadata_text = json.dumps(json.load(f), indent=2)
-                st.download_button(
-                    "📋 Download Metadata",
-                    data=metadata_text,
-                    file_name="metadata.json",
-                    mime="application/json"
-                )
-            
-            # Show preview
-            with st.expander("👁️ Preview Train Data (first 3 samples)"):
-                for i, sample in enumerate(train_data[:3]):
-                    st.json(sample)
-            
-            # Save to session state for later use
-            st.session_state.last_export = {
-                "name": export_name_base,
-                "path": export_dir,
-                "metadata": metadata
-            }
-            
-        except Exception as e:
-            st.error(f"❌ Export failed: {str(e)}")
-            import traceback
-            with st.expander("Error Details"):
-                st.code(traceback.format_exc())
+                st.markdown("#### 📥 Download Options")
+                col1, col2, col3 = st.columns(3)
+                zip_path = os.path.join(train_dir, f"{job['export_name']}.zip")
+                with col1:
+                    if os.path.exists(zip_path):
+                        with open(zip_path, 'rb') as f:
+                            st.download_button(
+                                "📦 Download Complete ZIP",
+                                data=f,
+                                file_name=f"{job['export_name']}.zip",
+                                mime="application/zip",
+                                key=f"zip_{job['job_id']}"
+                            )
+                with col2:
+                    train_files = export.split_files(export_dir, "train")
+                    if len(train_files) == 1:
+                        with open(os.path.join(export_dir, train_files[0]), 'rb') as f:
+                            st.download_button(
+                                "📄 Download Train Set",
+                                data=f,
+                                file_name=train_files[0],
+                                mime="application/jsonl",
+                                key=f"train_{job['job_id']}"
+                            )
+                    else:
+                        st.caption(f"Train set is in {len(train_files)} shards — download the ZIP")
+                with col3:
+                    st.download_button(
+                        "📋 Download Metadata",
+                        data=json.dumps(job['metadata'], indent=2),
+                        file_name="metadata.json",
+                        mime="application/json",
+                        key=f"meta_{job['job_id']}"
+                    )
 
 # Previous Exports
 st.markdown("---")
 st.markdown("## 📚 Previous Exports")
 
 if os.path.exists(train_dir):
-    # Find export directories
-    export_dirs = []
-    for item in os.listdir(train_dir):
-        item_path = os.path.join(train_dir, item)
-        if os.path.isdir(item_path):
-            metadata_path = os.path.join(item_path, "metadata.json")
-            if os.path.exists(metadata_path):
-                try:
-                    with open(metadata_path, 'r') as f:
-                        metadata = json.load(f)
-                        export_dirs.append({
-                            'name': item,
-                            'path': item_path,
-                            'metadata': metadata
-                        })
-                except:
-                    pass
+    export_dirs = export.list_exports(train_dir)
     
     if export_dirs:
-        # Sort by creation time
-        export_dirs.sort(key=lambda x: x['metadata'].get('created', ''), reverse=True)
-        
+        verification = st.session_state.setdefault("export_verification", {})
         # Display as dataframe
         export_info = []
+        status_icons = {"ok": "✅ ok", "corrupted": "❌ corrupted", "unverified": "⚪ no manifest"}
         for exp in export_dirs:
             meta = exp['metadata']
             stats = meta.get('statistics', {})
@@ -601,11 +410,25 @@ if os.path.exists(train_dir):
                 'Samples': stats.get('total_samples', 'N/A'),
                 'Train/Val/Test': f"{stats.get('train_samples', 0)}/{stats.get('validation_samples', 0)}/{stats.get('test_samples', 0)}",
                 'Created': meta.get('created', 'N/A')[:10],
-                'Quality ≥': meta.get('configuration', {}).get('min_quality', 'N/A')
+                'Quality ≥': meta.get('configuration', {}).get('min_quality', 'N/A'),
+                'Integrity': status_icons.get(verification.get(exp['name'], {}).get('status'), 'not checked')
             })
         
         df_exports = pd.DataFrame(export_info)
         st.dataframe(df_exports, use_container_width=True)
+        if st.button("🛡️ Verify All Exports", help="Check sizes, line counts and hashes against each manifest "
+                                                  "and parse every JSONL line"):
+            with st.spinner(f"Verifying {len(export_dirs)} export(s)..."):
+                for result in export.verify_exports([exp['path'] for exp in export_dirs]):
+                    verification[result['name']] = result
+            st.rerun()
+        corrupted = [result for result in verification.values() if result['status'] == "corrupted"]
+        if corrupted:
+            st.error(f"❌ {len(corrupted)} corrupted export(s) — do not train on them")
+            for result in corrupted:
+                with st.expander(f"❌ {result['name']}"):
+                    for problem in result['problems']:
+                        st.write(f"- {problem}")
         
         # Load previous export
         selected_export = st.selectbox(
@@ -621,20 +444,33 @@ if os.path.exists(train_dir):
             with st.expander("Metadata"):
                 st.json(selected_export['metadata'])
             
+            if st.button("🛡️ Verify This Export", key="verify_selected"):
+                with st.spinner("Verifying..."):
+                    result = export.verify_export(selected_export['path'])
+                verification[result['name']] = result
+                if result['status'] == "ok":
+                    st.success(f"✅ {result['files']} file(s) match the manifest; {result['lines']:,} JSONL lines parsed")
+                elif result['status'] == "unverified":
+                    st.info(f"⚪ No manifest (exported before checksums were recorded); "
+                            f"{result['lines']:,} JSONL lines parsed without errors")
+                else:
+                    st.error("❌ Export is corrupted:\n" + "\n".join(f"- {p}" for p in result['problems']))
+            
             # Show file sizes
             col1, col2, col3 = st.columns(3)
-            files = ["train.jsonl", "validation.jsonl", "test.jsonl"]
-            for i, file in enumerate(files):
-                file_path = os.path.join(selected_export['path'], file)
-                if os.path.exists(file_path):
-                    size_kb = os.path.getsize(file_path) / 1024
+            for i, split in enumerate(("train", "validation", "test")):
+                files = export.split_files(selected_export['path'], split)
+                if files:
+                    size_kb = sum(os.path.getsize(os.path.join(selected_export['path'], file)) for file in files) / 1024
                     with [col1, col2, col3][i]:
-                        st.metric(f"{file}", f"{size_kb:.1f} KB")
+                        st.metric(files[0] if len(files) == 1 else f"{split} ({len(files)} shards)",
+                                  f"{size_kb:.1f} KB")
             
             # Preview data
             if st.button("Preview Train Data", key="preview_previous"):
-                train_path = os.path.join(selected_export['path'], "train.jsonl")
-                if os.path.exists(train_path):
+                train_files = export.split_files(selected_export['path'], "train")
+                if train_files:
+                    train_path = os.path.join(selected_export['path'], train_files[0])
                     samples = []
                     with open(train_path, 'r') as f:
                         for i, line in enumerate(f):
@@ -647,6 +483,51 @@ if os.path.exists(train_dir):
                         st.json(sample)
                 else:
                     st.warning("Train file not found")
+            
+            # Compare against another export
+            other_exports = [exp for exp in export_dirs if exp['name'] != selected_export['name']]
+            if other_exports:
+                st.markdown("#### 🔀 Compare with another export")
+                older = [exp for exp in other_exports
+                         if exp['metadata'].get('created', '') < selected_export['metadata'].get('created', '')]
+                baseline = st.selectbox(
+                    "Baseline export",
+                    options=other_exports,
+                    index=other_exports.index(older[0]) if older else 0,
+                    format_func=lambda x: f"{x['name']} ({x['metadata'].get('statistics', {}).get('total_samples', 0)} samples)"
+                )
+                if st.button("🔀 Diff Samples", key="diff_exports"):
+                    status = st.empty()
+                    with st.spinner("Hashing and comparing samples..."):
+                        st.session_state.export_diff = {
+                            "old": baseline['name'],
+                            "new": selected_export['name'],
+                            "result": export_diff.diff_exports(
+                                baseline['path'], selected_export['path'],
+                                os.path.join(settings.DASHBOARD_STATE_DIR, "export_diff"),
+                                progress=lambda text: status.caption(text)
+                            )
+                        }
+                    status.empty()
+                diff = st.session_state.get("export_diff")
+                if diff and diff['new'] == selected_export['name'] and diff['old'] == baseline['name']:
+                    result = diff['result']
+                    st.caption(f"`{diff['old']}` ({result['old_lines']:,} lines) → "
+                               f"`{diff['new']}` ({result['new_lines']:,} lines)")
+                    col1, col2, col3, col4 = st.columns(4)
+                    for column, change in zip((col1, col2, col3, col4), ("added", "removed", "moved", "unchanged")):
+                        with column:
+                            st.metric(change.title(), f"{result['totals'][change]:,}")
+                    if result['groups']:
+                        st.markdown("##### By document type and source")
+                        st.dataframe(pd.DataFrame(result['groups']), use_container_width=True, hide_index=True)
+                    if result['moves']:
+                        st.markdown("##### Moved between splits")
+                        st.dataframe(pd.DataFrame(result['moves']), use_container_width=True, hide_index=True)
+                    for change, rows in result['examples'].items():
+                        if rows:
+                            with st.expander(f"Examples — {change} ({len(rows)} shown)"):
+                                st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
     
     else:
         st.info("No previous exports found. Generate your first export!")
@@ -715,4 +596,8 @@ with st.expander("📚 Export Formats Guide"):
     **Model Training**: Use with Hugging Face Transformers/TRL
     **Evaluation**: Test on held-out test set
     **Iteration**: Refine based on model performance
-    """)
\ No newline at end of file
+    """)
+
+# Live progress while exports are running in the worker pool
+if export_jobs.has_active_jobs():
+    polling.rerun_after(2)
\ No newline at end of file
@@ -5,8 +5,12 @@ import json
 import platform
 import sys
 import shutil
+import pandas as pd
+import plotly.graph_objects as go
 from datetime import datetime
 
+from utils import backup, cache, cleanup, disk_usage, log_tail, metrics, polling
+
 # Safe settings initialization — MUST be at top of EVERY page
 if "settings" not in st.session_state:
     from config.settings import DashboardSettings
@@ -17,7 +21,7 @@ settings = st.session_state.settings
 st.markdown("# ⚙️ Settings")
 st.markdown("Configure the dashboard and pipeline settings")
 
-tab1, tab2, tab3, tab4 = st.tabs(["Dashboard", "Pipeline", "Data", "System"])
+tab1, tab2, tab3, tab4, tab5 = st.tabs(["Dashboard", "Pipeline", "Data", "System", "Diagnostics"])
 
 with tab1:
     st.markdown("## 🎨 Dashboard Settings")
@@ -60,20 +64,99 @@ with tab3:
         "Temporary files", "Failed processing results", "Low quality synthetic data", "Old exports (>30 days)"
     ])
     days_to_keep = st.slider("Keep data newer than (days)", 1, 365, 30)
+    cleanup_min_quality = st.slider("Minimum synthetic quality to keep", 0, 100, 70,
+                                    disabled="Low quality synthetic data" not in cleanup_options) / 100
     if st.button("🚮 Run Cleanup", type="secondary"):
         if cleanup_options:
-            st.warning(f"This will delete selected data older than {days_to_keep} days")
+            with st.spinner("Scanning pipeline data (dry run)..."):
+                st.session_state.cleanup_plan = cleanup.plan_cleanup(
+                    settings.PIPELINE_DATA_DIR, list(settings.STAGES.keys()), cleanup_options,
+                    days_to_keep, cleanup_min_quality
+                )
         else:
             st.info("Select cleanup options first")
+    cleanup_plan = st.session_state.get("cleanup_plan")
+    if cleanup_plan:
+        st.markdown("#### 🔎 Dry Run Results")
+        st.dataframe(pd.DataFrame([
+            {"Category": category, "Files": summary["files"], "Reclaimable": cleanup.format_bytes(summary["bytes"])}
+            for category, summary in cleanup_plan.items()
+        ]), use_container_width=True, hide_index=True)
+        total_files = sum(summary["files"] for summary in cleanup_plan.values())
+        total_bytes = sum(summary["bytes"] for summary in cleanup_plan.values())
+        with st.expander("Files to be removed"):
+            for category, summary in cleanup_plan.items():
+                for item in summary["items"][:200]:
+                    st.text(f"[{category}] {item['path']}")
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button(f"🗑️ Delete {total_files:,} files ({cleanup.format_bytes(total_bytes)})",
+                         type="primary", disabled=total_files == 0):
+                progress_bar = st.progress(0.0, text="Deleting...")
+                result = cleanup.apply_cleanup(
+                    settings.PIPELINE_DATA_DIR, cleanup_plan,
+                    progress=lambda done, total: progress_bar.progress(done / total, text=f"Deleting... {done}/{total}")
+                )
+                del st.session_state.cleanup_plan
+                st.success(f"Removed {result['deleted']:,} files, reclaimed {cleanup.format_bytes(result['bytes'])}")
+                if result["errors"]:
+                    st.warning(f"{result['errors']} item(s) could not be removed")
+        with col2:
+            if st.button("✖️ Discard Plan"):
+                del st.session_state.cleanup_plan
+                st.rerun()
     st.markdown("### 📤 Export Configuration")
     export_format = st.selectbox("Default export format", options=list(settings.EXPORT_FORMATS.keys()), format_func=lambda x: settings.EXPORT_FORMATS[x], index=0)
     auto_export = st.checkbox("Auto-export after processing", value=False)
     export_location = st.text_input("Default export location", value="./exports")
     st.markdown("### 💾 Backup")
+    backup_location = st.text_input("Backup location", value="./backups", key="backup_location_input")
     if st.button("📀 Create Backup", type="secondary"):
-        st.info("Creating backup of all pipeline data...")
-    backup_location = st.text_input("Backup location", value="./backups")
-    auto_backup = st.checkbox("Auto-backup daily", value=False)
+        progress_bar = st.progress(0.0, text="Creating backup of all pipeline data...")
+        try:
+            snapshot = backup.create_backup(
+                settings.PIPELINE_DATA_DIR, backup_location,
+                progress=lambda done, total: progress_bar.progress(done / total, text=f"Hashing changed files... {done}/{total}")
+            )
+            snapshot_stats = snapshot["statistics"]
+            progress_bar.progress(1.0, text="Backup complete")
+            st.success(
+                f"✅ Snapshot `{snapshot['snapshot_id']}`: {snapshot_stats['files']:,} files, "
+                f"{snapshot_stats['hashed_files']:,} changed, {snapshot_stats['copied_files']:,} new "
+                f"({cleanup.format_bytes(snapshot_stats['copied_bytes'])} copied) in {snapshot_stats['duration_seconds']}s"
+            )
+        except Exception as e:
+            st.error(f"❌ Backup failed: {str(e)}")
+    auto_backup = st.checkbox(
+        "Auto-backup daily", value=backup.auto_backup_status() is not None, key="auto_backup",
+        on_change=lambda: backup.set_auto_backup(
+            st.session_state.auto_backup, settings.PIPELINE_DATA_DIR, st.session_state.get("backup_location_input", backup_location)
+        )
+    )
+    auto_runner = backup.auto_backup_status()
+    if auto_runner is not None and auto_runner.last_error:
+        st.warning(f"Last auto-backup failed: {auto_runner.last_error}")
+    snapshots = backup.list_snapshots(backup_location)
+    if snapshots:
+        with st.expander(f"🗂️ Snapshots ({len(snapshots)})"):
+            st.dataframe(pd.DataFrame([{
+                "Snapshot": snap["snapshot_id"],
+                "Created": snap["created"][:19],
+                "Files": snap["statistics"]["files"],
+                "Size": cleanup.format_bytes(snap["statistics"]["bytes"]),
+                "New Data": cleanup.format_bytes(snap["statistics"]["copied_bytes"])
+            } for snap in snapshots]), use_container_width=True, hide_index=True)
+            restore_id = st.selectbox("Snapshot to restore", options=[snap["snapshot_id"] for snap in snapshots])
+            restore_target = st.text_input("Restore into directory", value=os.path.join(backup_location, "restore", restore_id))
+            if st.button("♻️ Restore Snapshot"):
+                progress_bar = st.progress(0.0, text="Restoring...")
+                result = backup.restore_snapshot(
+                    backup_location, restore_id, restore_target,
+                    progress=lambda done, total: progress_bar.progress(done / total, text=f"Restoring... {done}/{total}")
+                )
+                st.success(f"Restored {result['restored']:,} files into `{restore_target}`")
+                if result["missing"] or result["corrupt"]:
+                    st.error(f"{result['missing']} missing and {result['corrupt']} corrupt object(s) were skipped")
     if st.button("💾 Save Data Settings", type="primary"):
         st.success("Data settings saved!")
 
@@ -91,7 +174,7 @@ with tab4:
         st.text_input(key, value, disabled=True, key=f"sys_{key}")
     st.markdown("### 📊 Disk Usage")
     try:
-        total, used, free = shutil.disk_usage("/")
+        total, used, free = shutil.disk_usage(settings.PIPELINE_DATA_DIR if os.path.exists(settings.PIPELINE_DATA_DIR) else "/")
         col1, col2, col3 = st.columns(3)
         with col1:
             st.metric("Total", f"{total // (2**30):,} GB")
@@ -103,17 +186,70 @@ with tab4:
         st.progress(usage_percent / 100, text=f"Disk Usage: {usage_percent:.1f}%")
     except:
         st.warning("Could not retrieve disk usage information")
+    st.markdown("#### 🗂️ Pipeline Data Breakdown")
+    if os.path.exists(settings.PIPELINE_DATA_DIR):
+        scanner = disk_usage.get_scanner(settings.PIPELINE_DATA_DIR, list(settings.STAGES.keys()), settings.DASHBOARD_STATE_DIR)
+        full_rescan = st.button("🔄 Full Rescan", help="Re-read every directory, ignoring cached mtimes")
+        usage = scanner.scan(full=True) if full_rescan else scanner.latest()
+        st.caption(f"{cleanup.format_bytes(usage['total_bytes'])} in {usage['total_files']:,} files • "
+                   f"scanned {usage['scanned'][:19]} in {usage['duration_seconds']}s")
+        stage_usage = pd.DataFrame([{
+            "Stage": f"{settings.STAGES[stage]['icon']} {settings.STAGES[stage]['name']}",
+            "Bytes": info["bytes"],
+            "Size": cleanup.format_bytes(info["bytes"]),
+            "Files": info["files"],
+            "Documents": info["documents"],
+            "Color": settings.STAGES[stage]["color"]
+        } for stage, info in usage["stages"].items()])
+        fig = go.Figure(go.Bar(
+            x=stage_usage["Stage"], y=stage_usage["Bytes"] / 2**20, marker_color=stage_usage["Color"],
+            text=stage_usage["Size"], textposition="outside"
+        ))
+        fig.update_layout(title="Disk usage by stage", yaxis_title="MB", height=350, margin=dict(l=20, r=20, t=40, b=20))
+        st.plotly_chart(fig, use_container_width=True)
+        if usage["documents"]:
+            with st.expander("📄 Largest documents"):
+                top_docs = sorted(usage["documents"], key=lambda d: d["bytes"], reverse=True)[:25]
+                st.dataframe(pd.DataFrame([{
+                    "Stage": settings.STAGES[d["stage"]]["name"], "Document": d["doc_id"],
+                    "Files": d["files"], "Size": cleanup.format_bytes(d["bytes"])
+                } for d in top_docs]), use_container_width=True, hide_index=True)
+        history = scanner.history()
+        if len(history) > 1:
+            trend = go.Figure()
+            for stage in settings.STAGES.keys():
+                trend.add_trace(go.Scatter(
+                    x=[h["timestamp"] for h in history], y=[h["stages"].get(stage, 0) / 2**20 for h in history],
+                    name=settings.STAGES[stage]["name"], stackgroup="usage",
+                    line=dict(color=settings.STAGES[stage]["color"])
+                ))
+            trend.update_layout(title="Growth over time", yaxis_title="MB", height=350, margin=dict(l=20, r=20, t=40, b=20))
+            st.plotly_chart(trend, use_container_width=True)
     st.markdown("### 📋 Application Logs")
     log_level = st.selectbox("Log Level", ["DEBUG", "INFO", "WARNING", "ERROR"])
     show_logs = st.checkbox("Show recent logs", value=False)
+    follow_logs = False
     if show_logs:
-        log_file = "app.log"
+        log_file = settings.LOG_FILE
         if os.path.exists(log_file):
+            col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
+            with col1:
+                log_lines = st.number_input("Lines per page", min_value=10, max_value=1000, value=50, step=10)
+            with col2:
+                follow_logs = st.checkbox("Follow", value=False, help="Keep showing new lines as they are written")
+            log_cursor = None if follow_logs else st.session_state.get("log_cursor")
             try:
-                with open(log_file, 'r') as f:
-                    lines = f.readlines()[-50:]
-                    st.code(''.join(lines))
-            except:
+                lines, older_cursor = log_tail.get_reader(log_file).tail(int(log_lines), log_level, before=log_cursor)
+                with col3:
+                    if st.button("⬅️ Older", disabled=older_cursor is None or follow_logs):
+                        st.session_state.log_cursor = older_cursor
+                        st.rerun()
+                with col4:
+                    if st.button("⏭️ Latest", disabled=log_cursor is None):
+                        st.session_state.log_cursor = None
+                        st.rerun()
+                st.code('\n'.join(lines) if lines else f"No {log_level}+ entries")
+            except OSError:
                 st.error("Could not read log file")
         else:
             st.info("No log file found")
@@ -148,6 +284,51 @@ with tab4:
     Built with Streamlit • Connected to: Construction AI Pipeline
     """)
 
+with tab5:
+    st.markdown("## 🩺 Diagnostics")
+    st.markdown("Timings collected by this dashboard process since it started")
+    metric_rows = metrics.summary()
+    if metric_rows:
+        st.dataframe(pd.DataFrame(metric_rows), use_container_width=True, hide_index=True)
+    else:
+        st.info("No timings recorded yet — browse a few pages first")
+    if metrics.OPERATION_ERRORS.series:
+        st.markdown("#### ❌ Operation Errors")
+        st.dataframe(pd.DataFrame([
+            {"Operation": dict(key).get("operation", ""), "Errors": int(value)}
+            for key, value in metrics.OPERATION_ERRORS.series.items()
+        ]), use_container_width=True, hide_index=True)
+    st.markdown("#### 🗃️ Shared Cache")
+    cache_stats = cache.get_cache().stats()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Entries", f"{cache_stats['entries']:,}")
+    with col2:
+        st.metric("Memory", cleanup.format_bytes(cache_stats['bytes']),
+                  help=f"Cap: {cleanup.format_bytes(cache_stats['max_bytes'])}")
+    with col3:
+        lookups = cache_stats['hits'] + cache_stats['misses']
+        st.metric("Hit Rate", f"{100 * cache_stats['hits'] / lookups:.0f}%" if lookups else "N/A")
+    with col4:
+        st.metric("Evictions", f"{cache_stats['evictions']:,}")
+    if cache_stats['by_kind']:
+        st.dataframe(pd.DataFrame([
+            {"Kind": kind, "Entries": info["entries"], "Memory": cleanup.format_bytes(info["bytes"])}
+            for kind, info in cache_stats['by_kind'].items()
+        ]), use_container_width=True, hide_index=True)
+    if st.button("🧽 Clear Shared Cache"):
+        cache.get_cache().clear()
+        st.rerun()
+    prometheus_text = metrics.render_prometheus()
+    if settings.METRICS_PORT:
+        st.caption(f"Prometheus endpoint: `http://<dashboard-host>:{settings.METRICS_PORT}/metrics`")
+    with st.expander("📈 Prometheus exposition"):
+        st.code(prometheus_text)
+    st.download_button("📥 Download metrics", data=prometheus_text, file_name="dashboard_metrics.prom", mime="text/plain")
+
 if st.button("💾 Save All Settings", type="primary"):
     st.success("All settings saved successfully!")
-    st.info("Some settings may require a restart to take effect")
\ No newline at end of file
+    st.info("Some settings may require a restart to take effect")
+
+if follow_logs:
+    polling.rerun_after(2)
\ No newline at end of file
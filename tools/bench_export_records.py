@@ -0,0 +1,139 @@
+# exaPipelineDashboard/tools/bench_export_records.py
+"""Memory and CPU of holding one export split as dicts vs ``SampleRecord``s.
+
+Writes N synthetic validated samples (same shape the pipeline produces)
+to a temporary directory, then loads them both ways and reports, per
+100k samples, the peak traced memory and the CPU time of decoding and of
+SFT conversion.
+
+    python tools/bench_export_records.py [--samples 100000]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import export  # noqa: E402
+
+DOC_TYPES = ["Contract", "Invoice", "Change Order", "RFI", "Submittal", "Daily Report"]
+
+
+def make_sample(rng: random.Random, i: int) -> dict:
+    content = " ".join(rng.choice(["concrete", "steel", "beam", "invoice", "payment", "schedule",
+                                   "contractor", "owner", "delay", "inspection"]) for _ in range(120))
+    annotations = {
+        "companies": [{"text": f"Company {rng.randint(1, 500)}", "confidence": rng.random()} for _ in range(3)],
+        "people": [{"text": f"Person {rng.randint(1, 900)}", "confidence": rng.random()} for _ in range(2)],
+        "amounts": [{"value": round(rng.uniform(100, 1e6), 2), "currency": "USD"}],
+        "summary": {"text": content[:160]}
+    }
+    return {
+        "chunk_id": f"chunk_{i:06d}",
+        "content": content,
+        "original_chunk": {"text": content, "page": rng.randint(1, 40), "offset": i * 1024},
+        "annotations": annotations,
+        "raw_response": json.dumps(annotations) * 2,
+        "validation": {"score": round(rng.uniform(0.5, 1.0), 3), "completeness": round(rng.random(), 3),
+                       "issues": ["missing date"] if rng.random() < 0.3 else [], "validator": "qwen3"},
+        "metadata": {"doc_type": rng.choice(DOC_TYPES), "page": rng.randint(1, 40)}
+    }
+
+
+def write_corpus(root: str, n: int, per_doc: int = 50) -> list:
+    rng = random.Random(0)
+    refs = []
+    for i in range(n):
+        doc_id = f"doc_{i // per_doc:05d}"
+        doc_dir = os.path.join(root, "validated", doc_id)
+        os.makedirs(doc_dir, exist_ok=True)
+        name = f"chunk_{i:06d}_validated.json"
+        path = os.path.join(doc_dir, name)
+        with open(path, "w") as f:
+            json.dump(make_sample(rng, i), f)
+        refs.append({"source": "validated", "doc_id": doc_id, "file_name": name, "path": path,
+                     "doc_type": "Unknown", "instance": None})
+    return refs
+
+
+def read_sample(source: str, doc_id: str, file: str, path: str) -> dict:
+    """The previous loader: the whole sample dict, with provenance and score attached."""
+    with open(path, "r") as f:
+        data = json.load(f)
+    default_score = 0 if source == "validated" else 0.7
+    return {**data, "source": source, "doc_id": doc_id, "file_name": file,
+            "quality": (data.get("validation") or {}).get("score", default_score)}
+
+
+def load_dicts(refs: list) -> list:
+    """The previous export path: full sample dicts from ``read_sample``."""
+    return [read_sample(r["source"], r["doc_id"], r["file_name"], r["path"]) for r in refs]
+
+
+def convert_dicts(samples: list) -> list:
+    out = []
+    for s in samples:
+        annotations = s.get("annotations", {})
+        out.append({"instruction": "Extract", "input": s.get("content", ""),
+                    "output": json.dumps(annotations, ensure_ascii=False), "source": s.get("source"),
+                    "quality": s.get("quality", 0), "metadata": s.get("metadata", {})})
+    return out
+
+
+def measure(label: str, load, convert, refs: list, scale: float) -> dict:
+    # CPU is timed without tracemalloc, which slows allocation-heavy code a lot
+    cpu = time.process_time()
+    samples = load(refs)
+    decode_cpu = time.process_time() - cpu
+    cpu = time.process_time()
+    convert(samples)
+    convert_cpu = time.process_time() - cpu
+    del samples
+
+    tracemalloc.start()
+    samples = load(refs)
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del samples
+    return {"path": label, "held_mb": held * scale / 2**20, "peak_mb": peak * scale / 2**20,
+            "decode_cpu_s": decode_cpu * scale, "convert_cpu_s": convert_cpu * scale}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=100_000)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix=".tmp_bench_")
+    try:
+        print(f"Writing {args.samples:,} samples to {root} ...")
+        refs = write_corpus(root, args.samples)
+        # Warm the page cache so both paths read from memory
+        load_dicts(refs)
+        scale = 100_000 / args.samples
+        config = {"export_format": "sft", "instruction_template": "Extract", "simplify_annotations": False}
+        results = [
+            measure("dict (read_sample)", load_dicts, convert_dicts, refs, scale),
+            measure(f"SampleRecord ({'orjson' if export.orjson else 'json'})", export.load_refs,
+                    lambda records: export.convert_samples(records, config), refs, scale),
+        ]
+        print("\nPer 100k samples:")
+        print(f"{'path':<24}{'held MB':>10}{'peak MB':>10}{'decode s':>10}{'convert s':>11}")
+        for r in results:
+            print(f"{r['path']:<24}{r['held_mb']:>10.1f}{r['peak_mb']:>10.1f}"
+                  f"{r['decode_cpu_s']:>10.2f}{r['convert_cpu_s']:>11.2f}")
+        before, after = results
+        print(f"\nHeld memory: {1 - after['held_mb'] / before['held_mb']:.0%} less; "
+              f"decode CPU: {before['decode_cpu_s'] / max(after['decode_cpu_s'], 1e-9):.1f}x faster")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+# exaPipelineDashboard/tools/bench_upload.py
+"""End-to-end upload throughput and memory for batches of generated PDFs.
+
+Each batch goes through the same steps as "Start Processing" on the
+Upload page: page-count inspection, content hashing, optional
+page-range splitting and one multipart POST to ``/api/v1/ingest``. The
+stub API (``tools/stub_api.py``) runs in a separate process, so the
+memory figures cover only the dashboard side. It can be made slow, flaky
+or bandwidth-limited.
+
+For every (file size, file count) combination the report gives the
+median wall time over the successful ones of ``--repeat`` runs, MB/s,
+files/s, failed runs out of all runs (the memory run included), and the
+peak traced memory of one run relative to the batch size. Failed runs
+(e.g. fast 503s from ``--failure-rate``) are left out of the timings.
+
+    python tools/bench_upload.py --sizes-mb 0.5,5,25 --counts 1,5,20 --bandwidth-mbps 200
+"""
+import argparse
+import io
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import metrics, pdf_tools, upload_index  # noqa: E402
+
+
+def make_pdf(size_bytes: int, page_kb: int = 100, seed: int = 0) -> bytes:
+    """A valid PDF of roughly ``size_bytes`` with ``page_kb`` of text per page."""
+    rng = random.Random(seed)
+    pages = max(1, round(size_bytes / (page_kb * 1024)))
+    per_page = max(64, size_bytes // pages - 200)
+    alphabet = b"abcdefghijklmnopqrstuvwxyz0123456789 "
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for _ in range(pages):
+        text = bytes(rng.choice(alphabet) for _ in range(min(per_page, 4096)))
+        text = (text * (per_page // len(text) + 1))[:per_page]
+        stream = b"BT /F1 10 Tf 72 720 Td (" + text + b") Tj ET"
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects))
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % k for k in kids) + b"] /Count %d >>" % pages
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    out.write(b"".join(b"%010d 00000 n \n" % offset for offset in offsets))
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def upload_batch(api_url: str, files: List[Tuple[str, bytes]], pages_per_part: int = 0) -> Dict:
+    """What the Upload page does for a selection of files, minus Streamlit."""
+    inspected = pdf_tools.inspect_pdfs(files)
+    hashes = [upload_index.hash_stream(io.BytesIO(data)) for _, data in files]
+    parts = []
+    for (name, data), info in zip(files, inspected):
+        if pages_per_part and (info["pages"] or 0) > pages_per_part:
+            parts += pdf_tools.split_pdf(name, data, pages_per_part)
+        else:
+            parts.append((name, data))
+    response = metrics.api_call(
+        requests, "post", f"{api_url}/api/v1/ingest", "ingest",
+        files=[('files', (name, data, 'application/pdf')) for name, data in parts]
+    )
+    file_ids = response.json().get("file_ids", []) if response.status_code == 200 else []
+    return {"status": response.status_code, "parts": len(parts), "file_ids": len(file_ids), "hashes": len(hashes)}
+
+
+def start_stub(args) -> Tuple[subprocess.Popen, str]:
+    stub = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stub_api.py")
+    port = args.port
+    process = subprocess.Popen([
+        sys.executable, stub, "--port", str(port), "--latency-ms", str(args.latency_ms),
+        "--failure-rate", str(args.failure_rate), "--bandwidth-mbps", str(args.bandwidth_mbps), "--seed", "0"
+    ], stdout=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f"{url}/_stub/stats", timeout=1)
+            return process, url
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    process.kill()
+    raise SystemExit("stub API did not start")
+
+
+def bench(api_url: str, size_mb: float, count: int, repeat: int, page_kb: int,
+          pages_per_part: int) -> Dict:
+    files = [(f"bench_{size_mb}mb_{i:03d}.pdf", make_pdf(int(size_mb * 2**20), page_kb, seed=i)) for i in range(count)]
+    batch_bytes = sum(len(data) for _, data in files)
+    times, failures, result = [], 0, {}
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = upload_batch(api_url, files, pages_per_part)
+        if result["status"] == 200:
+            times.append(time.perf_counter() - started)
+        else:
+            failures += 1
+    tracemalloc.start()
+    result = upload_batch(api_url, files, pages_per_part)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    failures += result["status"] != 200
+    wall = statistics.median(times) if times else None
+    return {
+        "size_mb": size_mb, "files": count, "parts": result.get("parts", count),
+        "batch_mb": round(batch_bytes / 2**20, 2),
+        "median_s": round(wall, 3) if wall else None,
+        "mb_per_s": round(batch_bytes / 2**20 / wall, 1) if wall else None,
+        "files_per_s": round(count / wall, 1) if wall else None,
+        "runs": repeat + 1,
+        "failed": failures,
+        "peak_mb": round(peak / 2**20, 1),
+        "peak_x_batch": round(peak / batch_bytes, 2)
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes-mb", default="0.5,5,25", help="PDF sizes to generate")
+    parser.add_argument("--counts", default="1,5,20", help="Files per batch")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--page-kb", type=int, default=100, help="Text per generated page")
+    parser.add_argument("--split-pages", type=int, default=0, help="Split parts of this many pages (0 = off)")
+    parser.add_argument("--api-url", help="Benchmark against this API instead of a local stub")
+    parser.add_argument("--port", type=int, default=8765, help="Port for the local stub")
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--failure-rate", type=float, default=0)
+    parser.add_argument("--bandwidth-mbps", type=float, default=0)
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    process: Optional[subprocess.Popen] = None
+    api_url = args.api_url
+    if not api_url:
+        process, api_url = start_stub(args)
+    try:
+        rows = []
+        print(f"{'size MB':>8}{'files':>7}{'parts':>7}{'batch MB':>10}{'median s':>10}{'MB/s':>8}"
+              f"{'files/s':>9}{'failed':>8}{'peak MB':>9}{'x batch':>9}")
+        for size_mb in [float(s) for s in args.sizes_mb.split(",")]:
+            for count in [int(c) for c in args.counts.split(",")]:
+                row = bench(api_url, size_mb, count, args.repeat, args.page_kb, args.split_pages)
+                rows.append(row)
+                timings = [value if value is not None else "-" for value in
+                           (row['median_s'], row['mb_per_s'], row['files_per_s'])]
+                print(f"{row['size_mb']:>8}{row['files']:>7}{row['parts']:>7}{row['batch_mb']:>10}"
+                      f"{timings[0]:>10}{timings[1]:>8}{timings[2]:>9}{row['failed']:>4}/{row['runs']:<3}"
+                      f"{row['peak_mb']:>9}{row['peak_x_batch']:>9}")
+        if process is not None:
+            print(f"\nStub: {json.dumps(requests.get(f'{api_url}/_stub/stats', timeout=5).json())}")
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump({"api_url": api_url, "stub": vars(args), "results": rows}, f, indent=2)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
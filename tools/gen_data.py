@@ -0,0 +1,118 @@
+# exaPipelineDashboard/tools/gen_data.py
+"""Generate a synthetic pipeline data directory for load tests and benchmarks.
+
+Every stage directory is filled the way the pipeline fills it: one
+directory per document, ``classified/<doc>/metadata.json`` with a
+doc_type, ``chunk_NNNN.json`` chunks, ``_annotations.json``,
+``_validated.json`` and ``_syn_K.json`` files. The content is random
+construction-document text.
+
+    python tools/gen_data.py /tmp/pipeline_data --documents 200 --chunks 40
+"""
+import argparse
+import json
+import os
+import random
+import sys
+from typing import Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import DashboardSettings  # noqa: E402
+
+WORDS = ["concrete", "steel", "beam", "invoice", "payment", "schedule", "contractor", "owner", "delay",
+         "inspection", "submittal", "change", "order", "section", "clause", "retainage", "lien", "waiver",
+         "foundation", "rebar", "drywall", "HVAC", "permit", "warranty", "subcontractor", "payroll"]
+COMPANIES = ["ACME Construction", "Bedrock Builders", "Summit Steel", "Keystone Concrete", "Northwind HVAC",
+             "Granite Partners", "Ironclad Framing", "Bluewater Plumbing", "Atlas Electric", "Crestline Roofing"]
+PEOPLE = ["Jane Doe", "John Smith", "Maria Garcia", "Wei Chen", "Aisha Khan", "Tom Brown", "Olga Petrova"]
+
+
+def _text(rng: random.Random, words: int) -> str:
+    lines = []
+    for _ in range(max(1, words // 12)):
+        line = " ".join(rng.choice(WORDS) for _ in range(12))
+        if rng.random() < 0.2:
+            line += f" change order CO-{rng.randint(100, 999)} section {rng.randint(1, 33):02d} {rng.randint(10, 99)} 00"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def _annotations(rng: random.Random) -> Dict:
+    return {
+        "dates": [f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}" for _ in range(rng.randint(0, 3))],
+        "companies": rng.sample(COMPANIES, rng.randint(1, 3)),
+        "people": rng.sample(PEOPLE, rng.randint(0, 2)),
+        "amounts": [f"${rng.randint(100, 250000):,}.00" for _ in range(rng.randint(0, 3))],
+        "compliance_status": rng.choice(["", "", "Compliant", "Missing signature", "Pending review"]),
+        "action_items": rng.sample(["Submit RFI", "Approve change order", "Send lien waiver",
+                                    "Schedule inspection"], rng.randint(0, 2)),
+        "tables": [[{"item": rng.choice(WORDS), "qty": rng.randint(1, 500),
+                     "unit_price": round(rng.uniform(1, 900), 2)} for _ in range(3)]] if rng.random() < 0.2 else []
+    }
+
+
+def _write(path: str, data) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def generate(data_dir: str, documents: int = 50, chunks: int = 20, synthetic: int = 2,
+             words: int = 180, failure_rate: float = 0.02, seed: int = 0) -> Dict[str, int]:
+    """Write ``documents`` documents through every stage; returns file counts per stage."""
+    rng = random.Random(seed)
+    counts = {stage: 0 for stage in DashboardSettings.STAGES}
+    for stage in counts:
+        os.makedirs(os.path.join(data_dir, stage), exist_ok=True)
+    for d in range(documents):
+        doc_id = f"doc_{d:05d}"
+        doc_type = rng.choice(DashboardSettings.DOCUMENT_TYPES)
+        dirs = {stage: os.path.join(data_dir, stage, doc_id) for stage in counts if stage != "train"}
+        for path in dirs.values():
+            os.makedirs(path, exist_ok=True)
+        with open(os.path.join(dirs["uploads"], f"{doc_id}.pdf"), "wb") as f:
+            f.write(b"%PDF-1.4\n% generated\n")
+        _write(os.path.join(dirs["ingested"], "ocr.json"), {"doc_id": doc_id, "pages": rng.randint(1, 60)})
+        _write(os.path.join(dirs["classified"], "metadata.json"),
+               {"doc_id": doc_id, "doc_type": doc_type, "confidence": round(rng.uniform(0.6, 1.0), 3)})
+        counts["uploads"] += 1
+        counts["ingested"] += 1
+        counts["classified"] += 1
+        for c in range(chunks):
+            chunk = f"chunk_{c:04d}"
+            content = _text(rng, words)
+            _write(os.path.join(dirs["chunks"], f"{chunk}.json"), {"chunk_id": chunk, "content": content})
+            annotations = {"error": "annotation timed out"} if rng.random() < failure_rate else _annotations(rng)
+            _write(os.path.join(dirs["annotated"], f"{chunk}_annotations.json"),
+                   {"chunk_id": chunk, "content": content, "annotations": annotations})
+            counts["chunks"] += 1
+            counts["annotated"] += 1
+            if "error" in annotations:
+                continue
+            metadata = {"doc_type": doc_type, "chunk_id": chunk}
+            validation = {"score": round(rng.uniform(0.4, 1.0), 3), "completeness": round(rng.random(), 3)}
+            _write(os.path.join(dirs["validated"], f"{chunk}_validated.json"),
+                   {"content": content, "annotations": annotations, "validation": validation, "metadata": metadata})
+            counts["validated"] += 1
+            for k in range(synthetic):
+                _write(os.path.join(dirs["synthetic"], f"{chunk}_syn_{k}.json"),
+                       {"content": _text(rng, words), "annotations": _annotations(rng), "metadata": metadata})
+                counts["synthetic"] += 1
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("data_dir")
+    parser.add_argument("--documents", type=int, default=50)
+    parser.add_argument("--chunks", type=int, default=20, help="Chunks per document")
+    parser.add_argument("--synthetic", type=int, default=2, help="Synthetic variations per chunk")
+    parser.add_argument("--words", type=int, default=180, help="Words per chunk")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    counts = generate(args.data_dir, args.documents, args.chunks, args.synthetic, args.words, seed=args.seed)
+    print(json.dumps(counts, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,406 @@
+# exaPipelineDashboard/tools/load_test.py
+"""Drive concurrent simulated dashboard sessions and report how the pages hold up.
+
+Each simulated user is a thread holding its own Streamlit ``AppTest``
+sessions. It repeatedly picks one of the page flows below, steps through
+it and pauses for a think time between steps:
+
+    status       open Pipeline Status, then refresh it twice
+    browse       open View Annotations, pick a document, switch to single
+                 chunks, pick a chunk
+    search       search chunk text for a random term, then switch to
+                 annotation values and search those
+    export       open Export Training and load a quick preview
+
+Every run does what ``app.py`` does around the page: configure the shared
+cache and health-check each Pipeline API instance. All sessions share one
+process, as they do in the dashboard container, so the shared cache,
+singletons and the GIL are contended the same way.
+
+By default a data directory is generated (``tools/gen_data.py``) and a
+stub API is started (``tools/stub_api.py``). For each concurrency level
+the report gives per-step latency percentiles, script CPU per run,
+throughput, process CPU and peak RSS.
+
+    python tools/load_test.py --concurrency 1,4,8,16 --duration 30
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PAGES = {
+    "Pipeline Status": os.path.join(ROOT, "pages", "2_📊_Pipeline_Status.py"),
+    "View Annotations": os.path.join(ROOT, "pages", "3_🔍_View_Annotations.py"),
+    "Export Training": os.path.join(ROOT, "pages", "5_📦_Export_Training.py"),
+}
+SEARCH_TERMS = ["ACME", "Summit Steel", "2024-03", "$1", "Jane Doe", "inspection", "Keystone"]
+CONTENT_SEARCH_TERMS = ["concrete", "retainage", "lien waiver", '"change order"', "sub*", "permit OR warranty"]
+
+# Mirrors the per-run work app.py does around the selected page
+SESSION_SCRIPT = """
+import sys, time
+sys.path.insert(0, {root!r})
+import streamlit as st
+from config.settings import DashboardSettings
+from utils import cache, federation
+if "settings" not in st.session_state:
+    st.session_state.settings = DashboardSettings()
+_wall, _cpu = time.perf_counter(), time.thread_time()
+try:
+    cache.configure(int(st.session_state.settings.CACHE_MAX_MB * 1024 * 1024))
+    federation.map_instances(federation.instances(st.session_state.settings), federation.check_health)
+    with open({page!r}, encoding="utf-8") as _f:
+        exec(compile(_f.read(), {page!r}, "exec"))
+finally:
+    st.session_state["_load_test_timing"] = (time.perf_counter() - _wall, time.thread_time() - _cpu)
+"""
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of unsorted ``values``."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered) + 0.5)) - 1))]
+
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        # ru_maxrss is KiB on Linux; it is only a high-water mark
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def share_test_runtime() -> None:
+    """Let AppTest runs overlap.
+
+    Each ``AppTest.run()`` installs a mock ``Runtime`` and clears it when it
+    finishes, so a run that ends pulls the runtime out from under every
+    other session still running; keep serving the last installed mock (they
+    are interchangeable). The page list is also cached process-wide for
+    whichever main script asked first, which would make sessions run each
+    other's pages; resolve it per script instead.
+    """
+    from streamlit import source_util
+    from streamlit.runtime import Runtime
+    last = {}
+
+    def instance(cls):
+        if cls._instance is not None:
+            last["runtime"] = cls._instance
+            return cls._instance
+        if "runtime" not in last:
+            raise RuntimeError("Runtime hasn't been created!")
+        return last["runtime"]
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(lambda cls: cls._instance is not None or "runtime" in last)
+
+    get_pages = source_util.get_pages
+
+    def pages_for(main_script_path: str):
+        with source_util._pages_cache_lock:
+            source_util._cached_pages = None
+            return get_pages(main_script_path)
+
+    source_util.get_pages = pages_for
+
+
+def _widget(widgets, label: str):
+    for widget in widgets:
+        if widget.label == label:
+            return widget
+    raise LookupError(f"no widget labelled {label!r}")
+
+
+class FlowAborted(Exception):
+    pass
+
+
+def _pin_formatted_selectboxes(at) -> None:
+    """AppTest cannot rerun a selectbox with ``format_func`` from its stored value
+    (it looks the raw value up among the formatted labels); the flows never
+    change those, so pin them to their default index."""
+    for selectbox in at.selectbox:
+        if selectbox.value is not None and str(selectbox.value) not in selectbox.options:
+            selectbox.select_index(selectbox.proto.default)
+
+
+class SimulatedUser:
+    """One browser: a lazily created AppTest per page, with its own session state."""
+
+    def __init__(self, rng: random.Random, record: Callable[[Dict], None], timeout: float,
+                 think_seconds: float = 0.0):
+        self.rng = rng
+        self.record = record
+        self.timeout = timeout
+        self.think_seconds = think_seconds
+        self.apps = {}
+        self.opened = set()
+
+    def app(self, page: str):
+        from streamlit.testing.v1 import AppTest
+        if page not in self.apps:
+            self.apps[page] = AppTest.from_string(SESSION_SCRIPT.format(root=ROOT, page=PAGES[page]),
+                                                  default_timeout=self.timeout)
+        return self.apps[page]
+
+    def step(self, page: str, action: str, interact: Optional[Callable] = None) -> None:
+        at = self.app(page)
+        if interact is not None:
+            if page not in self.opened:
+                self.step(page, "open")
+            try:
+                interact(at)
+            except LookupError as e:
+                # The previous run did not render the widget; the rest of the flow cannot go on
+                self.record({"page": page, "action": action, "seconds": 0.0, "cpu": None, "error": str(e)})
+                raise FlowAborted() from e
+        if page in self.opened:
+            _pin_formatted_selectboxes(at)
+        started = time.perf_counter()
+        error = None
+        try:
+            at.run()
+            if at.exception:
+                error = at.exception[0].message
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        seconds = time.perf_counter() - started
+        try:
+            # Timed inside the script: AppTest only polls for completion every 100 ms
+            seconds, cpu = at.session_state["_load_test_timing"]
+        except (KeyError, AttributeError):
+            cpu = None
+        self.opened.add(page)
+        self.record({"page": page, "action": action, "seconds": seconds, "cpu": cpu, "error": error})
+
+    # ------------------------------------------------------------------
+    # Page flows
+    # ------------------------------------------------------------------
+    def status(self) -> None:
+        self.step("Pipeline Status", "open")
+        for _ in range(2):
+            self.think()
+            self.step("Pipeline Status", "refresh")
+
+    def browse(self) -> None:
+        page = "View Annotations"
+        self.step(page, "open")
+        self.think()
+        self.step(page, "select document", lambda at: self._choose(at, "Choose a document to review"))
+        self.think()
+        self.step(page, "single chunk view", lambda at: _widget(at.radio, "View").set_value("Single chunk"))
+        self.think()
+        self.step(page, "select chunk", lambda at: self._choose(at, "Choose a chunk to view"))
+
+    def search(self) -> None:
+        page = "View Annotations"
+        self._search_in(page, "Chunk content", "chunk mode")
+        term = self.rng.choice(CONTENT_SEARCH_TERMS)
+        self.step(page, "search chunks", lambda at: _widget(at.text_input, "Search chunk text").input(term))
+        self.think()
+        self._search_in(page, "Annotation values", "annotation mode")
+        self.think()
+        label = "Search across all annotations (dates, companies, amounts, etc.)"
+        term = self.rng.choice(SEARCH_TERMS)
+        self.step(page, "search annotations", lambda at: _widget(at.text_input, label).input(term))
+
+    def export(self) -> None:
+        page = "Export Training"
+        self.step(page, "open")
+        self.think()
+        self.step(page, "quick preview", lambda at: _widget(at.button, "🔍 Load and Preview Samples").click())
+
+    def _search_in(self, page: str, mode: str, action: str) -> None:
+        """Switch the search mode radio, unless the page is already showing ``mode``."""
+        if page not in self.opened:
+            self.step(page, "open")
+        try:
+            current = _widget(self.app(page).radio, "Search in").value
+        except LookupError as e:
+            self.record({"page": page, "action": action, "seconds": 0.0, "cpu": None, "error": str(e)})
+            raise FlowAborted() from e
+        if current != mode:
+            self.step(page, action, lambda at: _widget(at.radio, "Search in").set_value(mode))
+
+    def _choose(self, at, label: str) -> None:
+        widget = _widget(at.selectbox, label)
+        widget.set_value(self.rng.choice(widget.options))
+
+    def think(self) -> None:
+        if self.think_seconds:
+            time.sleep(self.rng.uniform(0.5, 1.5) * self.think_seconds)
+
+
+FLOWS = {"status": SimulatedUser.status, "browse": SimulatedUser.browse,
+         "search": SimulatedUser.search, "export": SimulatedUser.export}
+
+
+def run_level(concurrency: int, duration: float, flows: Dict[str, float], think: float,
+              timeout: float, seed: int) -> Dict:
+    """Run ``concurrency`` users for ``duration`` seconds; returns the level's summary."""
+    samples: List[Dict] = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+    stop = threading.Event()
+
+    def record(sample: Dict) -> None:
+        with lock:
+            samples.append(sample)
+
+    def user_loop(index: int) -> None:
+        rng = random.Random(seed * 1000 + index)
+        user = SimulatedUser(rng, record, timeout, think)
+        names, weights = list(flows), list(flows.values())
+        while time.monotonic() < deadline:
+            try:
+                FLOWS[rng.choices(names, weights)[0]](user)
+            except FlowAborted:
+                pass
+            user.think()
+
+    peak_rss = [rss_bytes()]
+
+    def sample_rss() -> None:
+        while not stop.wait(0.2):
+            peak_rss[0] = max(peak_rss[0], rss_bytes())
+
+    sampler = threading.Thread(target=sample_rss, daemon=True)
+    sampler.start()
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    rss_before = rss_bytes()
+    started = time.monotonic()
+    users = [threading.Thread(target=user_loop, args=(i,), name=f"user-{i}") for i in range(concurrency)]
+    for thread in users:
+        thread.start()
+    for thread in users:
+        thread.join()
+    wall = time.monotonic() - started
+    stop.set()
+    sampler.join()
+    after = resource.getrusage(resource.RUSAGE_SELF)
+    cpu = (after.ru_utime - usage.ru_utime) + (after.ru_stime - usage.ru_stime)
+
+    steps = defaultdict(list)
+    for sample in samples:
+        steps[(sample["page"], sample["action"])].append(sample)
+    rows = []
+    for (page, action), items in sorted(steps.items()):
+        seconds = [s["seconds"] for s in items]
+        cpus = [s["cpu"] for s in items if s["cpu"] is not None]
+        rows.append({
+            "page": page, "action": action, "runs": len(items),
+            "errors": sum(1 for s in items if s["error"]),
+            "p50_ms": round(percentile(seconds, 50) * 1000, 1),
+            "p95_ms": round(percentile(seconds, 95) * 1000, 1),
+            "p99_ms": round(percentile(seconds, 99) * 1000, 1),
+            "max_ms": round(max(seconds) * 1000, 1),
+            "cpu_ms": round(sum(cpus) / len(cpus) * 1000, 1) if cpus else None,
+            "runs_per_s": round(len(items) / wall, 2)
+        })
+    errors = [s["error"] for s in samples if s["error"]]
+    return {
+        "concurrency": concurrency,
+        "wall_seconds": round(wall, 2),
+        "runs": len(samples),
+        "runs_per_s": round(len(samples) / wall, 2) if wall else 0.0,
+        "cpu_seconds": round(cpu, 2),
+        "cpu_percent": round(cpu / wall * 100, 1) if wall else 0.0,
+        "rss_mb": round(rss_before / 2**20, 1),
+        "peak_rss_mb": round(peak_rss[0] / 2**20, 1),
+        "steps": rows,
+        "errors": sorted(set(errors))[:10]
+    }
+
+
+def print_level(level: Dict) -> None:
+    print(f"\n=== {level['concurrency']} concurrent session(s): {level['runs']} runs in {level['wall_seconds']}s "
+          f"({level['runs_per_s']}/s), process CPU {level['cpu_percent']}% of one core, "
+          f"RSS {level['rss_mb']} -> peak {level['peak_rss_mb']} MB")
+    header = f"{'page':<18}{'action':<20}{'runs':>6}{'err':>5}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}" \
+             f"{'max ms':>9}{'cpu ms':>9}"
+    print(header)
+    for row in level["steps"]:
+        cpu = "-" if row["cpu_ms"] is None else f"{row['cpu_ms']:.1f}"
+        print(f"{row['page']:<18}{row['action']:<20}{row['runs']:>6}{row['errors']:>5}{row['p50_ms']:>9.1f}"
+              f"{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['max_ms']:>9.1f}{cpu:>9}")
+    for error in level["errors"]:
+        print(f"  ! {error}")
+
+
+def parse_flows(spec: str) -> Dict[str, float]:
+    """``status=3,browse=2,search=1,export=1`` -> weights"""
+    flows = {}
+    for item in spec.split(","):
+        name, _, weight = item.partition("=")
+        if name.strip() not in FLOWS:
+            raise SystemExit(f"unknown flow {name!r}; choose from {', '.join(FLOWS)}")
+        flows[name.strip()] = float(weight or 1)
+    return flows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", default="1,2,4,8", help="Comma-separated session counts")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds per concurrency level")
+    parser.add_argument("--flows", default="status=3,browse=3,search=2,export=1", help="Flow weights")
+    parser.add_argument("--think", type=float, default=1.0, help="Mean pause between steps (seconds)")
+    parser.add_argument("--timeout", type=float, default=120, help="Per-run script timeout (seconds)")
+    parser.add_argument("--data-dir", help="Existing pipeline data dir (default: generate one)")
+    parser.add_argument("--documents", type=int, default=100, help="Documents to generate")
+    parser.add_argument("--chunks", type=int, default=30, help="Chunks per generated document")
+    parser.add_argument("--api-url", help="Pipeline API to use instead of the local stub")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix=".tmp_load_test_")
+    try:
+        api_url = args.api_url
+        if not api_url:
+            from tools.stub_api import start_stub_api
+            server = start_stub_api()
+            api_url = f"http://127.0.0.1:{server.server_port}"
+            print(f"Stub Pipeline API on {api_url}")
+        data_dir = args.data_dir or os.path.join(work_dir, "data")
+        # Settings are read from the environment when config.settings is first imported
+        os.environ["PIPELINE_DATA_DIR"] = data_dir
+        os.environ["PIPELINE_API_URL"] = api_url
+        os.environ["DASHBOARD_STATE_DIR"] = os.path.join(work_dir, "state")
+        os.environ.pop("PIPELINE_INSTANCES", None)
+        if not args.data_dir:
+            from tools.gen_data import generate
+            print(f"Generating {args.documents} documents x {args.chunks} chunks in {data_dir} ...")
+            generate(data_dir, args.documents, args.chunks, seed=args.seed)
+
+        flows = parse_flows(args.flows)
+        share_test_runtime()
+        levels = []
+        for concurrency in [int(c) for c in args.concurrency.split(",")]:
+            level = run_level(concurrency, args.duration, flows, args.think, args.timeout, args.seed)
+            print_level(level)
+            levels.append(level)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump({"data_dir": data_dir, "api_url": api_url, "flows": flows, "levels": levels}, f, indent=2)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+# exaPipelineDashboard/tools/stub_api.py
+"""Local stand-in for the exaPipeline API, for load tests and offline benchmarks.
+
+    GET  /health             {"status": "ok"}
+    POST /api/v1/ingest      multipart ``files``; returns one ``file_id`` per part
+    POST /api/v1/reprocess   accepts any JSON body
+    GET  /_stub/stats        request, failure and byte counters
+
+Nothing is processed; requests are only counted. To stand in for a slow
+or flaky backend, every API route can be given extra latency (with
+jitter) and a failure rate. Request bodies can be read no faster than a
+bandwidth limit.
+
+    python tools/stub_api.py --port 8000 --latency-ms 200 --failure-rate 0.05 --bandwidth-mbps 100
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+
+class StubConfig:
+    """Simulated backend behaviour; the defaults answer immediately and never fail."""
+
+    def __init__(self, latency_ms: float = 0, jitter_ms: float = 0, failure_rate: float = 0,
+                 failure_status: int = 503, bandwidth_mbps: float = 0, seed: Optional[int] = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        # Megabits per second for reading request bodies; 0 = unlimited
+        self.bandwidth_mbps = bandwidth_mbps
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+
+    def delay(self) -> float:
+        with self.rng_lock:
+            jitter = self.rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+    def fails(self) -> bool:
+        if not self.failure_rate:
+            return False
+        with self.rng_lock:
+            return self.rng.random() < self.failure_rate
+
+
+class StubState:
+    """Request counters shared by the handler threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests: Dict[str, int] = {}
+        self.failures: Dict[str, int] = {}
+        self.files = 0
+        self.bytes = 0
+
+    def count(self, route: str, files: int = 0, size: int = 0) -> None:
+        with self.lock:
+            self.requests[route] = self.requests.get(route, 0) + 1
+            self.files += files
+            self.bytes += size
+
+    def fail(self, route: str) -> None:
+        with self.lock:
+            self.failures[route] = self.failures.get(route, 0) + 1
+
+    def snapshot(self) -> Dict:
+        with self.lock:
+            return {"requests": dict(self.requests), "failures": dict(self.failures),
+                    "files": self.files, "bytes": self.bytes}
+
+
+def read_throttled(stream, length: int, bandwidth_mbps: float, block: int = 64 * 1024) -> bytes:
+    """Read ``length`` bytes, sleeping as needed to stay under ``bandwidth_mbps``."""
+    if not bandwidth_mbps:
+        return stream.read(length)
+    bytes_per_second = bandwidth_mbps * 1e6 / 8
+    chunks, received = [], 0
+    started = time.monotonic()
+    while received < length:
+        chunk = stream.read(min(block, length - received))
+        if not chunk:
+            break
+        chunks.append(chunk)
+        received += len(chunk)
+        ahead = received / bytes_per_second - (time.monotonic() - started)
+        if ahead > 0:
+            time.sleep(ahead)
+    return b"".join(chunks)
+
+
+def count_parts(body: bytes, content_type: str) -> int:
+    """Number of file parts in a multipart body."""
+    boundary = next((p.split("=", 1)[1].strip('"') for p in content_type.split(";")
+                     if p.strip().startswith("boundary=")), None)
+    if not boundary:
+        return 0
+    return sum(1 for part in body.split(b"--" + boundary.encode())
+               if b"filename=" in part.split(b"\r\n\r\n", 1)[0])
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    state: StubState = None
+    config: StubConfig = None
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        route = self.path.rstrip("/")
+        if route == "/_stub/stats":
+            self._send_json(200, self.state.snapshot())
+        elif route == "/health":
+            if self._simulate("health"):
+                self.state.count("health")
+                self._send_json(200, {"status": "ok"})
+        else:
+            self._send_json(404, {"detail": "Not Found"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0) or 0)
+        body = read_throttled(self.rfile, length, self.config.bandwidth_mbps)
+        route = self.path.rstrip("/")
+        if route == "/api/v1/ingest":
+            if self._simulate("ingest"):
+                parts = count_parts(body, self.headers.get("Content-Type", ""))
+                self.state.count("ingest", parts, len(body))
+                self._send_json(200, {"status": "queued", "file_ids": [str(uuid.uuid4()) for _ in range(parts)]})
+        elif route == "/api/v1/reprocess":
+            if self._simulate("reprocess"):
+                self.state.count("reprocess")
+                self._send_json(200, {"status": "queued"})
+        else:
+            self._send_json(404, {"detail": "Not Found"})
+
+    def _simulate(self, route: str) -> bool:
+        """Apply the configured latency; send the failure response and return False if this request fails."""
+        delay = self.config.delay()
+        if delay:
+            time.sleep(delay)
+        if self.config.fails():
+            self.state.fail(route)
+            self._send_json(self.config.failure_status, {"detail": "Simulated failure"})
+            return False
+        return True
+
+    def _send_json(self, status: int, payload: Dict) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_api(port: int = 0, host: str = "127.0.0.1", state: Optional[StubState] = None,
+                   config: Optional[StubConfig] = None) -> ThreadingHTTPServer:
+    """Serve the stub from a daemon thread; ``port=0`` picks a free port (see ``server_port``)."""
+    handler = type("StubHandler", (_StubHandler,),
+                   {"state": state or StubState(), "config": config or StubConfig()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="stub-api", daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency-ms", type=float, default=0, help="Added to every API response")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="Uniform +/- jitter on the latency")
+    parser.add_argument("--failure-rate", type=float, default=0, help="Fraction of API requests that fail")
+    parser.add_argument("--failure-status", type=int, default=503)
+    parser.add_argument("--bandwidth-mbps", type=float, default=0, help="Request body read limit (0 = none)")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+    config = StubConfig(args.latency_ms, args.jitter_ms, args.failure_rate, args.failure_status,
+                        args.bandwidth_mbps, args.seed)
+    server = start_stub_api(args.port, args.host, config=config)
+    print(f"Stub Pipeline API on http://{args.host}:{server.server_port}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# exaPipelineDashboard/utils/__init__.py
@@ -0,0 +1,190 @@
+# exaPipelineDashboard/utils/backlog.py
+"""Stage dwell times, stuck documents, chunk backlogs and drain ETAs.
+
+The pipeline writes no timestamps of its own, so the first time a
+document's directory is seen in a stage its mtime is recorded in an index
+under the dashboard state directory. Later directory writes do not move
+that entry time. A document's dwell time is how long it has been waiting
+since it entered its furthest stage. Chunk throughput comes from the
+mtimes of recently written annotation and validation files.
+"""
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from utils import cache
+from utils.state import atomic_write_json, read_json, state_path
+
+# Document stages in pipeline order; ``train`` holds exports, not documents
+DOC_STAGES = ["uploads", "ingested", "classified", "chunks", "annotated", "synthetic", "validated"]
+
+CHUNK_PREFIX = "chunk_"
+ANNOTATION_SUFFIX = "_annotations.json"
+VALIDATED_SUFFIX = "_validated.json"
+
+_INDEX_LOCK = threading.Lock()
+
+
+def _index_path(state_dir: str) -> str:
+    return state_path(state_dir, "backlog", "stage_index.json")
+
+
+def update_stage_index(data_dir: str, state_dir: str) -> Dict[str, Dict[str, float]]:
+    """Record when each document was first seen in each stage; returns ``{doc_id: {stage: ts}}``."""
+    with _INDEX_LOCK:
+        index = read_json(_index_path(state_dir), {}) or {}
+        changed = False
+        present = set()
+        for stage in DOC_STAGES:
+            stage_dir = os.path.join(data_dir, stage)
+            for doc_id in cache.subdirs(stage_dir):
+                present.add(doc_id)
+                stages = index.setdefault(doc_id, {})
+                if stage not in stages:
+                    try:
+                        stages[stage] = min(os.stat(os.path.join(stage_dir, doc_id)).st_mtime, time.time())
+                    except OSError:
+                        stages[stage] = time.time()
+                    changed = True
+        # Forget documents that were cleaned up everywhere
+        for doc_id in [d for d in index if d not in present]:
+            del index[doc_id]
+            changed = True
+        if changed:
+            atomic_write_json(_index_path(state_dir), index, indent=None)
+        return index
+
+
+def _next_stage(stages: Dict[str, float]) -> Optional[str]:
+    furthest = max(DOC_STAGES.index(stage) for stage in stages)
+    return DOC_STAGES[furthest + 1] if furthest + 1 < len(DOC_STAGES) else None
+
+
+def dwell_times(index: Dict[str, Dict[str, float]], thresholds_minutes: Dict[str, float],
+                now: Optional[float] = None) -> List[Dict]:
+    """One row per unfinished document: the stage it waits for and for how long."""
+    now = now or time.time()
+    rows = []
+    for doc_id, stages in index.items():
+        if not stages:
+            continue
+        waiting_for = _next_stage(stages)
+        if waiting_for is None:
+            continue
+        current = DOC_STAGES[DOC_STAGES.index(waiting_for) - 1]
+        entered = stages[current]
+        minutes = (now - entered) / 60
+        threshold = thresholds_minutes.get(waiting_for)
+        rows.append({
+            "doc_id": doc_id,
+            "current_stage": current,
+            "waiting_for": waiting_for,
+            "entered": datetime.fromtimestamp(entered).isoformat(timespec="seconds"),
+            "dwell_minutes": round(minutes, 1),
+            "threshold_minutes": threshold,
+            "stuck": threshold is not None and minutes > threshold
+        })
+    rows.sort(key=lambda r: r["dwell_minutes"], reverse=True)
+    return rows
+
+
+def _chunk_files(stage_dir: str, doc_id: str, stage: str) -> List[str]:
+    doc_dir = os.path.join(stage_dir, doc_id)
+    if stage == "chunks":
+        return [f for f in cache.files(doc_dir, ".json") if f.startswith(CHUNK_PREFIX)]
+    return cache.files(doc_dir, ANNOTATION_SUFFIX if stage == "annotated" else VALIDATED_SUFFIX)
+
+
+def _recent(doc_dir: str, names: List[str], since: float) -> int:
+    count = 0
+    for name in names:
+        try:
+            if os.stat(os.path.join(doc_dir, name)).st_mtime >= since:
+                count += 1
+        except OSError:
+            continue
+    return count
+
+
+def chunk_backlog(data_dir: str, window_minutes: float = 60, now: Optional[float] = None) -> Dict:
+    """Chunks waiting for annotation and for validation, with recent throughput and ETAs.
+
+    A chunk waits for annotation while it is in ``chunks/`` but has no
+    ``_annotations.json``, and for validation while it is annotated but has
+    no ``_validated.json``. Throughput is the number of such files written
+    during the last ``window_minutes``.
+    """
+    now = now or time.time()
+    since = now - window_minutes * 60
+    counts = {"chunks": 0, "annotated": 0, "validated": 0}
+    waiting = {"annotation": 0, "validation": 0}
+    done_recently = {"annotation": 0, "validation": 0}
+    per_document = []
+    doc_ids = set(cache.subdirs(os.path.join(data_dir, "chunks")))
+    for doc_id in sorted(doc_ids):
+        files = {stage: _chunk_files(os.path.join(data_dir, stage), doc_id, stage)
+                 for stage in ("chunks", "annotated", "validated")}
+        n = {stage: len(names) for stage, names in files.items()}
+        for stage in counts:
+            counts[stage] += n[stage]
+        doc_waiting = {"annotation": max(0, n["chunks"] - n["annotated"]),
+                       "validation": max(0, n["annotated"] - n["validated"])}
+        for step in waiting:
+            waiting[step] += doc_waiting[step]
+        done_recently["annotation"] += _recent(os.path.join(data_dir, "annotated", doc_id), files["annotated"], since)
+        done_recently["validation"] += _recent(os.path.join(data_dir, "validated", doc_id), files["validated"], since)
+        if doc_waiting["annotation"] or doc_waiting["validation"]:
+            per_document.append({"doc_id": doc_id, **n, "awaiting_annotation": doc_waiting["annotation"],
+                                 "awaiting_validation": doc_waiting["validation"]})
+
+    steps = {}
+    for step in ("annotation", "validation"):
+        per_hour = done_recently[step] * 60 / window_minutes if window_minutes else 0
+        steps[step] = {
+            "waiting": waiting[step],
+            "done_in_window": done_recently[step],
+            "per_hour": round(per_hour, 1),
+            "eta_minutes": round(waiting[step] / per_hour * 60, 1) if per_hour else None
+        }
+    return {"counts": counts, "steps": steps, "documents": per_document, "window_minutes": window_minutes,
+            "eta_minutes": _drain_eta(steps)}
+
+
+def _drain_eta(steps: Dict[str, Dict]) -> Optional[float]:
+    """Minutes until every queued chunk is validated; ``None`` when nothing is moving.
+
+    Everything waiting for annotation still has to be validated afterwards,
+    so the queue drains no sooner than the slower of the two steps allows.
+    """
+    annotation, validation = steps["annotation"], steps["validation"]
+    total_waiting = annotation["waiting"] + validation["waiting"]
+    if not total_waiting:
+        return 0.0
+    if not validation["per_hour"] or (annotation["waiting"] and not annotation["per_hour"]):
+        return None
+    return round(max(annotation["eta_minutes"] or 0.0, total_waiting / validation["per_hour"] * 60), 1)
+
+
+def merge_chunk_backlogs(backlogs: Dict[str, Dict]) -> Dict:
+    """Combine per-instance ``chunk_backlog`` results; document rows gain an ``instance`` key."""
+    if len(backlogs) == 1:
+        return next(iter(backlogs.values()))
+    window = next(iter(backlogs.values()))["window_minutes"] if backlogs else 60
+    counts = {"chunks": 0, "annotated": 0, "validated": 0}
+    steps = {step: {"waiting": 0, "done_in_window": 0} for step in ("annotation", "validation")}
+    documents = []
+    for name, result in backlogs.items():
+        for stage in counts:
+            counts[stage] += result["counts"][stage]
+        for step in steps:
+            steps[step]["waiting"] += result["steps"][step]["waiting"]
+            steps[step]["done_in_window"] += result["steps"][step]["done_in_window"]
+        documents += [{"instance": name, **row} for row in result["documents"]]
+    for info in steps.values():
+        per_hour = info["done_in_window"] * 60 / window if window else 0
+        info["per_hour"] = round(per_hour, 1)
+        info["eta_minutes"] = round(info["waiting"] / per_hour * 60, 1) if per_hour else None
+    return {"counts": counts, "steps": steps, "documents": documents, "window_minutes": window,
+            "eta_minutes": _drain_eta(steps)}
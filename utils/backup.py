@@ -0,0 +1,239 @@
+# exaPipelineDashboard/utils/backup.py
+"""Incremental, content-addressed backups of the pipeline data directory.
+
+Layout under the backup location::
+
+    objects/ab/abcdef...   one copy of every distinct file content (sha256)
+    snapshots/<id>.json    manifest: relative path -> hash, size, mtime
+
+A new snapshot only hashes files whose size or mtime changed since the
+previous manifest, and only copies contents the object store lacks, so
+unchanged data costs nothing but a manifest entry.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils.state import atomic_write_json, read_json
+
+HASH_CHUNK = 1024 * 1024
+SKIP_PREFIXES = (".tmp_",)
+
+
+def hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_CHUNK), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _object_path(backup_dir: str, digest: str) -> str:
+    return os.path.join(backup_dir, "objects", digest[:2], digest)
+
+
+def _walk(data_dir: str, exclude: List[str]) -> Dict[str, os.stat_result]:
+    """Relative path -> stat for every regular file, skipping temp entries and excluded trees."""
+    files = {}
+    excluded = {os.path.realpath(path) for path in exclude}
+    stack = [data_dir]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.name.startswith(SKIP_PREFIXES):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                if os.path.realpath(entry.path) not in excluded:
+                    stack.append(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                files[os.path.relpath(entry.path, data_dir)] = entry.stat(follow_symlinks=False)
+    return files
+
+
+def list_snapshots(backup_dir: str) -> List[Dict]:
+    """Snapshot summaries (without the file tables), newest first."""
+    snapshots_dir = os.path.join(backup_dir, "snapshots")
+    if not os.path.isdir(snapshots_dir):
+        return []
+    snapshots = []
+    for file in os.listdir(snapshots_dir):
+        if file.endswith(".json") and not file.startswith(".tmp_"):
+            manifest = read_json(os.path.join(snapshots_dir, file))
+            if manifest:
+                snapshots.append({k: v for k, v in manifest.items() if k != "files"})
+    snapshots.sort(key=lambda s: s["created"], reverse=True)
+    return snapshots
+
+
+def load_manifest(backup_dir: str, snapshot_id: str) -> Optional[Dict]:
+    return read_json(os.path.join(backup_dir, "snapshots", f"{snapshot_id}.json"))
+
+
+def _store_object(backup_dir: str, source: str, digest: str) -> bool:
+    """Copy ``source`` into the object store unless the content is already there."""
+    target = _object_path(backup_dir, digest)
+    if os.path.exists(target):
+        return False
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", dir=os.path.dirname(target))
+    os.close(fd)
+    try:
+        shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, target)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return True
+
+
+def create_backup(data_dir: str, backup_dir: str, exclude: Optional[List[str]] = None,
+                  max_workers: int = 8, label: str = "manual",
+                  progress: Optional[Callable[[int, int], None]] = None) -> Dict:
+    """Take an incremental snapshot of ``data_dir`` and return its summary."""
+    started = time.monotonic()
+    exclude = list(exclude or []) + [backup_dir]
+    files = _walk(data_dir, exclude)
+
+    previous = {}
+    snapshots = list_snapshots(backup_dir)
+    if snapshots:
+        previous = (load_manifest(backup_dir, snapshots[0]["snapshot_id"]) or {}).get("files", {})
+
+    entries: Dict[str, Dict] = {}
+    to_hash: List[Tuple[str, os.stat_result]] = []
+    for rel_path, stat in files.items():
+        prev = previous.get(rel_path)
+        if prev and prev["size"] == stat.st_size and prev["mtime_ns"] == stat.st_mtime_ns:
+            entries[rel_path] = prev
+        else:
+            to_hash.append((rel_path, stat))
+
+    def process(item: Tuple[str, os.stat_result]) -> Tuple[str, Dict, bool]:
+        rel_path, stat = item
+        source = os.path.join(data_dir, rel_path)
+        digest = hash_file(source)
+        copied = _store_object(backup_dir, source, digest)
+        return rel_path, {"hash": digest, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}, copied
+
+    copied_files = copied_bytes = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for i, (rel_path, entry, copied) in enumerate(pool.map(process, to_hash), 1):
+            entries[rel_path] = entry
+            if copied:
+                copied_files += 1
+                copied_bytes += entry["size"]
+            if progress is not None:
+                progress(i, len(to_hash))
+
+    # The suffix stops same-label snapshots taken within one second overwriting each other
+    snapshot_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{label}_{uuid.uuid4().hex[:6]}"
+    manifest = {
+        "snapshot_id": snapshot_id,
+        "created": datetime.now().isoformat(),
+        "label": label,
+        "source": os.path.abspath(data_dir),
+        "statistics": {
+            "files": len(entries),
+            "bytes": sum(entry["size"] for entry in entries.values()),
+            "hashed_files": len(to_hash),
+            "copied_files": copied_files,
+            "copied_bytes": copied_bytes,
+            "duration_seconds": round(time.monotonic() - started, 2)
+        },
+        "files": entries
+    }
+    atomic_write_json(os.path.join(backup_dir, "snapshots", f"{snapshot_id}.json"), manifest, indent=None)
+    return {k: v for k, v in manifest.items() if k != "files"}
+
+
+def restore_snapshot(backup_dir: str, snapshot_id: str, target_dir: str, verify: bool = True,
+                     progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, int]:
+    """Recreate a snapshot's files under ``target_dir``."""
+    manifest = load_manifest(backup_dir, snapshot_id)
+    if not manifest:
+        raise FileNotFoundError(f"Snapshot not found: {snapshot_id}")
+    result = {"restored": 0, "missing": 0, "corrupt": 0}
+    files = manifest["files"]
+    for i, (rel_path, entry) in enumerate(files.items(), 1):
+        source = _object_path(backup_dir, entry["hash"])
+        if not os.path.exists(source):
+            result["missing"] += 1
+        elif verify and hash_file(source) != entry["hash"]:
+            result["corrupt"] += 1
+        else:
+            target = os.path.join(target_dir, rel_path)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(source, target)
+            os.utime(target, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+            result["restored"] += 1
+        if progress is not None:
+            progress(i, len(files))
+    return result
+
+
+# ----------------------------------------------------------------------
+# Daily auto-backup
+# ----------------------------------------------------------------------
+class AutoBackup(threading.Thread):
+    """Background thread that snapshots once per interval while enabled."""
+
+    def __init__(self, data_dir: str, backup_dir: str, exclude: List[str], interval: float = 86400):
+        super().__init__(name="auto-backup", daemon=True)
+        self.data_dir = data_dir
+        self.backup_dir = backup_dir
+        self.exclude = exclude
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.last_result: Optional[Dict] = None
+        self.last_error: Optional[str] = None
+
+    def _due_in(self) -> float:
+        last = next((s for s in list_snapshots(self.backup_dir) if s.get("label") == "auto"), None)
+        if not last:
+            return 0
+        elapsed = (datetime.now() - datetime.fromisoformat(last["created"])).total_seconds()
+        return max(0.0, self.interval - elapsed)
+
+    def run(self) -> None:
+        while not self.stop_event.wait(self._due_in()):
+            try:
+                self.last_result = create_backup(self.data_dir, self.backup_dir, self.exclude, label="auto")
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                # Try again in an hour rather than spinning on a persistent error
+                if self.stop_event.wait(3600):
+                    return
+
+
+_AUTO_BACKUP: Optional[AutoBackup] = None
+_AUTO_BACKUP_LOCK = threading.Lock()
+
+
+def set_auto_backup(enabled: bool, data_dir: str, backup_dir: str, exclude: Optional[List[str]] = None) -> None:
+    global _AUTO_BACKUP
+    with _AUTO_BACKUP_LOCK:
+        if _AUTO_BACKUP is not None:
+            _AUTO_BACKUP.stop_event.set()
+            _AUTO_BACKUP = None
+        if enabled:
+            _AUTO_BACKUP = AutoBackup(data_dir, backup_dir, list(exclude or []))
+            _AUTO_BACKUP.start()
+
+
+def auto_backup_status() -> Optional[AutoBackup]:
+    if _AUTO_BACKUP is not None and _AUTO_BACKUP.is_alive():
+        return _AUTO_BACKUP
+    return None
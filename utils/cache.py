@@ -0,0 +1,203 @@
+# exaPipelineDashboard/utils/cache.py
+"""Process-wide cache of directory listings and parsed JSON, shared by all sessions.
+
+Every entry remembers the ``(mtime_ns, size)`` of the paths it was built
+from and is rebuilt as soon as one of them changes, so a value is computed
+once per change instead of once per browser session. Entries are charged
+their approximate in-memory size and the least recently used ones are
+evicted once the global cap is exceeded.
+
+Cached values are shared between sessions: callers must treat them as
+read-only.
+"""
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from utils import metrics
+from utils.state import read_json as _read_json
+
+CACHE_EVENTS = metrics.Counter("dashboard_cache_events_total", "Shared cache hits, misses, invalidations and evictions")
+metrics.REGISTRY.append(CACHE_EVENTS)
+
+Fingerprint = Tuple[Optional[Tuple[int, int]], ...]
+
+
+def fingerprint(paths: Sequence[str]) -> Fingerprint:
+    """``(mtime_ns, size)`` per path, ``None`` for paths that do not exist."""
+    result = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            result.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            result.append(None)
+    return tuple(result)
+
+
+def deep_sizeof(value: Any, _seen: Optional[set] = None) -> int:
+    """Approximate memory held by a value built from dicts, lists, tuples, sets and scalars."""
+    seen = _seen if _seen is not None else set()
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in value)
+    return size
+
+
+class _Entry:
+    __slots__ = ("value", "signature", "size")
+
+    def __init__(self, value: Any, signature: Fingerprint, size: int):
+        self.value = value
+        self.signature = signature
+        self.size = size
+
+
+class SharedCache:
+    """LRU of filesystem-derived values with a global byte budget."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self.bytes = 0
+        self.lock = threading.Lock()
+        self.key_locks: Dict[Hashable, threading.Lock] = {}
+        self.counts = {"hits": 0, "misses": 0, "invalidations": 0, "evictions": 0}
+
+    def _count(self, event: str, kind: str) -> None:
+        self.counts[event] += 1
+        CACHE_EVENTS.inc(event=event, kind=kind)
+
+    def _lookup(self, key: Hashable, signature: Fingerprint) -> Tuple[bool, Any]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return False, None
+            if entry.signature != signature:
+                self._drop(key)
+                self._count("invalidations", key[0])
+                return False, None
+            self.entries.move_to_end(key)
+            self._count("hits", key[0])
+            return True, entry.value
+
+    def _drop(self, key: Hashable) -> None:
+        entry = self.entries.pop(key)
+        self.bytes -= entry.size
+
+    def get_or_compute(self, key: Tuple, deps: Sequence[str], compute: Callable[[], Any]) -> Any:
+        """Cached ``compute()`` for ``key``, rebuilt when any path in ``deps`` changes.
+
+        ``key[0]`` names the kind of entry and labels the cache metrics.
+        Concurrent sessions asking for the same stale key compute it once.
+        """
+        signature = fingerprint(deps)
+        found, value = self._lookup(key, signature)
+        if found:
+            return value
+        with self.lock:
+            key_lock = self.key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            found, value = self._lookup(key, signature)
+            if found:
+                return value
+            value = compute()
+            size = deep_sizeof(value)
+            with self.lock:
+                self._count("misses", key[0])
+                if key in self.entries:
+                    self._drop(key)
+                if size <= self.max_bytes:
+                    self.entries[key] = _Entry(value, signature, size)
+                    self.bytes += size
+                while self.bytes > self.max_bytes and self.entries:
+                    evicted = next(iter(self.entries))
+                    self._drop(evicted)
+                    self.key_locks.pop(evicted, None)
+                    self._count("evictions", evicted[0])
+        return value
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.key_locks.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict:
+        with self.lock:
+            by_kind: Dict[str, Dict[str, int]] = {}
+            for key, entry in self.entries.items():
+                kind = by_kind.setdefault(key[0], {"entries": 0, "bytes": 0})
+                kind["entries"] += 1
+                kind["bytes"] += entry.size
+            return {"entries": len(self.entries), "bytes": self.bytes, "max_bytes": self.max_bytes,
+                    "by_kind": by_kind, **self.counts}
+
+
+_CACHE = SharedCache(256 * 1024 * 1024)
+
+
+def configure(max_bytes: int) -> None:
+    """Set the global size cap; entries over the new cap are evicted on the next store."""
+    _CACHE.max_bytes = max_bytes
+
+
+def get_cache() -> SharedCache:
+    return _CACHE
+
+
+# ----------------------------------------------------------------------
+# Cached reads used by the pages
+# ----------------------------------------------------------------------
+def _scan(path: str) -> Tuple[Tuple[str, bool], ...]:
+    try:
+        with os.scandir(path) as it:
+            return tuple(sorted((entry.name, entry.is_dir()) for entry in it))
+    except OSError:
+        return ()
+
+
+def listdir(path: str) -> Tuple[Tuple[str, bool], ...]:
+    """Sorted ``(name, is_dir)`` pairs; refreshed when the directory's mtime changes."""
+    return _CACHE.get_or_compute(("listing", path), [path], lambda: _scan(path))
+
+
+def subdirs(path: str) -> List[str]:
+    return [name for name, is_dir in listdir(path) if is_dir]
+
+
+def files(path: str, suffix: str = "") -> List[str]:
+    return [name for name, is_dir in listdir(path) if not is_dir and name.endswith(suffix)]
+
+
+def read_json(path: str, default: Any = None) -> Any:
+    """Parsed JSON file, shared read-only; ``default`` if missing or unreadable."""
+    return _CACHE.get_or_compute(("json", path), [path], lambda: _read_json(path, default))
+
+
+def doc_metadata(data_dir: str, doc_id: str) -> Dict:
+    """The classifier's ``metadata.json`` for a document, ``{}`` if there is none."""
+    return read_json(os.path.join(data_dir, "classified", doc_id, "metadata.json"), {}) or {}
+
+
+def dataset_stats(validated_dir: str, synthetic_dir: str) -> Dict[str, int]:
+    """Counts shown on the Export page, built from cached per-document listings."""
+    validated_docs = subdirs(validated_dir)
+    validated_chunks = sum(len(files(os.path.join(validated_dir, d), '_validated.json')) for d in validated_docs)
+    synthetic = sum(
+        len([f for f in files(os.path.join(synthetic_dir, d), '.json') if 'syn' in f])
+        for d in subdirs(synthetic_dir)
+    )
+    return {
+        "Validated Documents": len(validated_docs),
+        "Validated Chunks": validated_chunks,
+        "Synthetic Samples": synthetic,
+        "Total Training Samples": validated_chunks + synthetic
+    }
@@ -0,0 +1,321 @@
+# exaPipelineDashboard/utils/chunk_search.py
+"""Ranked full-text search over chunk content, in an SQLite FTS5 index.
+
+The ``content`` of every ``chunks/<doc>/chunk_NNNN.json`` is indexed in
+``<state_dir>/chunk_search.sqlite3`` with each chunk file's mtime and size,
+and each document's directory mtime and doc_type. A refresh only re-lists
+documents whose directory changed (a chunk was added, removed or replaced)
+and only re-reads chunks that are new or changed. Files rewritten in place
+are picked up by a full rebuild. Documents are read concurrently; SQLite
+runs in WAL mode, so searches are not blocked while a refresh writes.
+
+Every chunk's doc_type is also indexed as a single hashed token in a
+second FTS column, so a doc_type filter is an exact match that FTS5
+intersects with the query before anything is ranked. Results are ranked
+by BM25 on content, with a snippet around the best match. Matched terms
+are wrapped in ``HIGHLIGHT_START`` / ``HIGHLIGHT_END``.
+
+Query cost is bounded by ``RANKED_MATCHES``: matches are counted up to it,
+and a query matching more chunks ranks only the most recently indexed
+``RANKED_MATCHES`` of them, so a term found in nearly every chunk stays
+in the tens of milliseconds.
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from utils import metrics
+from utils.state import read_json, state_path
+
+CHUNK_PREFIX = "chunk_"
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_END = "\x03"
+OPERATORS = ("AND", "OR", "NOT")
+# Documents per write transaction while refreshing
+BATCH_DOCS = 200
+# Stored as PRAGMA user_version; an index built with another schema is rebuilt
+INDEX_VERSION = 3
+# Matches counted and ranked per query; beyond this the newest chunks are ranked
+RANKED_MATCHES = 5000
+
+_DROP_SCHEMA = """
+DROP TABLE IF EXISTS chunk_text;
+DROP TABLE IF EXISTS chunks;
+DROP TABLE IF EXISTS docs;
+"""
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    doc_id TEXT PRIMARY KEY,
+    doc_type TEXT NOT NULL,
+    dir_mtime_ns INTEGER NOT NULL,
+    meta_mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    id INTEGER PRIMARY KEY,
+    doc_id TEXT NOT NULL,
+    chunk_file TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    UNIQUE (doc_id, chunk_file)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS chunk_text USING fts5(content, doc_key, tokenize = 'unicode61 remove_diacritics 2');
+"""
+
+_TOKEN = re.compile(r'"([^"]*)"?|(\S+)')
+_MARKDOWN_SPECIAL = re.compile(r"([\\`*_{}\[\]()<>#+\-.!|~$])")
+
+
+def to_fts_query(text: str) -> str:
+    """Turn what a reviewer types into an FTS5 query that cannot be a syntax error.
+
+    ``"quoted text"`` is a phrase; every other word is matched as a phrase
+    of its own tokens, so ``CO-184`` or ``05 12 00`` work as typed. A
+    trailing ``*`` makes a prefix match, and ``AND`` / ``OR`` / ``NOT``
+    between terms are kept as operators. Terms are otherwise ANDed.
+    """
+    parts: List[str] = []
+    for match in _TOKEN.finditer(text):
+        phrase, word = match.group(1), match.group(2)
+        if phrase is not None:
+            if phrase.strip():
+                parts.append('"' + phrase.replace('"', '""') + '"')
+        elif word in OPERATORS:
+            if parts and parts[-1] not in OPERATORS:
+                parts.append(word)
+        else:
+            prefix = word.endswith("*") and len(word) > 1
+            word = word.rstrip("*").replace('"', '""')
+            if word:
+                parts.append(f'"{word}"' + ("*" if prefix else ""))
+    while parts and parts[-1] in OPERATORS:
+        parts.pop()
+    return " ".join(parts)
+
+
+def doc_type_key(doc_type: str) -> str:
+    """The single token a doc_type is indexed as, so matching it is exact."""
+    return "t" + hashlib.blake2b(doc_type.encode(), digest_size=8).hexdigest()
+
+
+def highlight_markdown(snippet: str) -> str:
+    """Escape a snippet for ``st.markdown`` and bold its highlighted terms."""
+    text = _MARKDOWN_SPECIAL.sub(r"\\\1", " ".join(snippet.split()))
+    return text.replace(HIGHLIGHT_START, "**").replace(HIGHLIGHT_END, "**")
+
+
+def _mtime_ns(path: str) -> int:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return 0
+
+
+def _read_content(path: str) -> Optional[str]:
+    data = read_json(path)
+    if not isinstance(data, dict):
+        return None
+    content = data.get("content")
+    return content if isinstance(content, str) else None
+
+
+class ChunkSearchIndex:
+    """Persistent FTS5 index of the chunk stage, shared by all sessions."""
+
+    def __init__(self, data_dir: str, state_dir: str, max_workers: int = 8):
+        self.chunks_dir = os.path.join(data_dir, "chunks")
+        self.classified_dir = os.path.join(data_dir, "classified")
+        self.path = state_path(state_dir, "chunk_search.sqlite3")
+        self.max_workers = max_workers
+        self.refresh_lock = threading.Lock()
+        self.last_summary: Optional[Dict] = None
+        self.last_refresh = 0.0
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode = WAL")
+            if conn.execute("PRAGMA user_version").fetchone()[0] != INDEX_VERSION:
+                conn.executescript(_DROP_SCHEMA)
+            conn.executescript(_SCHEMA)
+            conn.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def latest(self, max_age: float = 60) -> Dict:
+        """Most recent refresh summary, refreshing if it is older than ``max_age`` seconds."""
+        if self.last_summary is None or time.monotonic() - self.last_refresh > max_age:
+            return self.refresh()
+        return self.last_summary
+
+    def _scan_document(self, doc_id: str, known: Dict[str, Tuple[int, int]]) -> Dict:
+        """Stat a document's chunk files and read the ones that are new or changed."""
+        doc_path = os.path.join(self.chunks_dir, doc_id)
+        try:
+            with os.scandir(doc_path) as it:
+                entries = [e for e in it if e.name.startswith(CHUNK_PREFIX) and e.name.endswith(".json")
+                           and e.is_file()]
+        except OSError:
+            entries = []
+        files, changed = {}, {}
+        for entry in entries:
+            stat = entry.stat()
+            files[entry.name] = (stat.st_mtime_ns, stat.st_size)
+            if known.get(entry.name) != files[entry.name]:
+                changed[entry.name] = _read_content(entry.path)
+        return {"files": files, "changed": changed}
+
+    @metrics.instrumented("chunk_index_refresh")
+    def refresh(self, full: bool = False) -> Dict:
+        """Bring the index up to date with ``chunks/``; ``full`` re-reads every chunk file."""
+        with self.refresh_lock:
+            started = time.monotonic()
+            try:
+                doc_ids = sorted(e.name for e in os.scandir(self.chunks_dir) if e.is_dir())
+            except OSError:
+                doc_ids = []
+            with closing(self._connect()) as conn:
+                indexed = {row["doc_id"]: row for row in conn.execute("SELECT * FROM docs")}
+                stale = [doc_id for doc_id in doc_ids if full or doc_id not in indexed
+                         or indexed[doc_id]["dir_mtime_ns"] != _mtime_ns(os.path.join(self.chunks_dir, doc_id))]
+                known: Dict[str, Dict[str, Tuple[int, int]]] = {}
+                for doc_id in ([] if full else stale):
+                    known[doc_id] = {row["chunk_file"]: (row["mtime_ns"], row["size"]) for row in conn.execute(
+                        "SELECT chunk_file, mtime_ns, size FROM chunks WHERE doc_id = ?", (doc_id,))}
+
+                parsed = 0
+                with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                    for start in range(0, len(stale), BATCH_DOCS):
+                        batch = stale[start:start + BATCH_DOCS]
+                        # Directory mtimes are taken before listing, so a chunk written
+                        # during the scan leaves the document stale for the next refresh
+                        dir_mtimes = {doc_id: _mtime_ns(os.path.join(self.chunks_dir, doc_id)) for doc_id in batch}
+                        scans = pool.map(lambda d: self._scan_document(d, known.get(d, {})), batch)
+                        with conn:
+                            for doc_id, scan in zip(batch, scans):
+                                parsed += len(scan["changed"])
+                                self._write_document(conn, doc_id, scan, dir_mtimes[doc_id])
+
+                # Documents removed from chunks/, and doc_types changed by reclassification
+                with conn:
+                    for doc_id in indexed.keys() - set(doc_ids):
+                        self._delete_chunks(conn, doc_id)
+                        conn.execute("DELETE FROM docs WHERE doc_id = ?", (doc_id,))
+                    for doc_id in set(doc_ids) - set(stale):
+                        meta_path = os.path.join(self.classified_dir, doc_id, "metadata.json")
+                        if _mtime_ns(meta_path) != indexed[doc_id]["meta_mtime_ns"]:
+                            doc_type, meta_mtime_ns = self._doc_type(doc_id)
+                            conn.execute("UPDATE docs SET doc_type = ?, meta_mtime_ns = ? WHERE doc_id = ?",
+                                         (doc_type, meta_mtime_ns, doc_id))
+                            conn.execute("UPDATE chunk_text SET doc_key = ? WHERE rowid IN "
+                                         "(SELECT id FROM chunks WHERE doc_id = ?)", (doc_type_key(doc_type), doc_id))
+                metrics.ITEMS.inc(parsed, operation="chunk_index_refresh")
+
+                chunks = conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+                doc_types = [row[0] for row in conn.execute("SELECT DISTINCT doc_type FROM docs ORDER BY doc_type")]
+            self.last_summary = {
+                "refreshed": datetime.now().isoformat(),
+                "duration_seconds": round(time.monotonic() - started, 3),
+                "documents": len(doc_ids),
+                "chunks": chunks,
+                "rescanned_documents": len(stale),
+                "parsed_chunks": parsed,
+                "doc_types": doc_types
+            }
+            self.last_refresh = time.monotonic()
+            return self.last_summary
+
+    def _doc_type(self, doc_id: str) -> Tuple[str, int]:
+        meta_path = os.path.join(self.classified_dir, doc_id, "metadata.json")
+        metadata = read_json(meta_path, {}) or {}
+        doc_type = str(metadata.get("doc_type") or "Unknown") if isinstance(metadata, dict) else "Unknown"
+        return doc_type, _mtime_ns(meta_path)
+
+    @staticmethod
+    def _delete_chunks(conn: sqlite3.Connection, doc_id: str, names: Optional[List[str]] = None) -> None:
+        where, params = "doc_id = ?", [doc_id]
+        if names is not None:
+            where += f" AND chunk_file IN ({','.join('?' * len(names))})"
+            params += names
+        conn.execute(f"DELETE FROM chunk_text WHERE rowid IN (SELECT id FROM chunks WHERE {where})", params)
+        conn.execute(f"DELETE FROM chunks WHERE {where}", params)
+
+    def _write_document(self, conn: sqlite3.Connection, doc_id: str, scan: Dict, dir_mtime_ns: int) -> None:
+        indexed = {row[0] for row in conn.execute("SELECT chunk_file FROM chunks WHERE doc_id = ?", (doc_id,))}
+        removed = list(indexed - scan["files"].keys())
+        replaced = [name for name in scan["changed"] if name in indexed]
+        if removed or replaced:
+            self._delete_chunks(conn, doc_id, removed + replaced)
+        doc_type, meta_mtime_ns = self._doc_type(doc_id)
+        previous = conn.execute("SELECT doc_type FROM docs WHERE doc_id = ?", (doc_id,)).fetchone()
+        if previous is not None and previous[0] != doc_type:
+            conn.execute("UPDATE chunk_text SET doc_key = ? WHERE rowid IN (SELECT id FROM chunks WHERE doc_id = ?)",
+                         (doc_type_key(doc_type), doc_id))
+        for name, content in scan["changed"].items():
+            mtime_ns, size = scan["files"][name]
+            chunk_id = conn.execute("INSERT INTO chunks (doc_id, chunk_file, mtime_ns, size) VALUES (?, ?, ?, ?)",
+                                    (doc_id, name, mtime_ns, size)).lastrowid
+            if content:
+                conn.execute("INSERT INTO chunk_text (rowid, content, doc_key) VALUES (?, ?, ?)",
+                             (chunk_id, content, doc_type_key(doc_type)))
+        conn.execute("INSERT OR REPLACE INTO docs (doc_id, doc_type, dir_mtime_ns, meta_mtime_ns) VALUES (?, ?, ?, ?)",
+                     (doc_id, doc_type, dir_mtime_ns, meta_mtime_ns))
+
+    @metrics.instrumented("chunk_search")
+    def search(self, text: str, doc_type: Optional[str] = None, limit: int = 20,
+               snippet_tokens: int = 32) -> Dict:
+        """Top ``limit`` chunks for a query by BM25, with the number of matches.
+
+        Each result has doc_id, chunk_file, doc_type, score (higher is better)
+        and a snippet. A query with no searchable terms returns no results.
+        ``total`` stops at ``RANKED_MATCHES``; ``capped`` says there were more,
+        in which case only the most recently indexed ``RANKED_MATCHES`` were
+        ranked. Snippets are only built for the returned rows.
+        """
+        query = to_fts_query(text)
+        if not query:
+            return {"query": query, "total": 0, "capped": False, "results": []}
+        match = f"content : ({query})"
+        if doc_type:
+            match += f' AND doc_key : "{doc_type_key(doc_type)}"'
+        with closing(self._connect()) as conn:
+            total = conn.execute("SELECT COUNT(*) FROM (SELECT 1 FROM chunk_text WHERE chunk_text MATCH ? LIMIT ?)",
+                                 (match, RANKED_MATCHES + 1)).fetchone()[0]
+            rows = [dict(row) for row in conn.execute(
+                "SELECT m.rowid, c.doc_id, c.chunk_file, d.doc_type, -m.rank AS score FROM ("
+                "SELECT rowid, rank FROM ("
+                "SELECT rowid, bm25(chunk_text, 1.0, 0.0) AS rank FROM chunk_text WHERE chunk_text MATCH ? "
+                "ORDER BY rowid DESC LIMIT ?) ORDER BY rank LIMIT ?) m "
+                "JOIN chunks c ON c.id = m.rowid JOIN docs d ON d.doc_id = c.doc_id ORDER BY m.rank",
+                (match, RANKED_MATCHES, limit)
+            )]
+            snippets = dict(conn.execute(
+                f"SELECT rowid, snippet(chunk_text, 0, ?, ?, ' … ', ?) FROM chunk_text "
+                f"WHERE chunk_text MATCH ? AND rowid IN ({','.join('?' * len(rows))})",
+                [HIGHLIGHT_START, HIGHLIGHT_END, snippet_tokens, match] + [row["rowid"] for row in rows]
+            )) if rows else {}
+        for row in rows:
+            row["snippet"] = snippets.get(row.pop("rowid"), "")
+        capped = total > RANKED_MATCHES
+        total = min(total, RANKED_MATCHES)
+        metrics.ITEMS.inc(total, operation="chunk_search")
+        return {"query": query, "total": total, "capped": capped, "results": rows}
+
+
+_INDEXES: Dict[Tuple[str, str], ChunkSearchIndex] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def get_index(data_dir: str, state_dir: str) -> ChunkSearchIndex:
+    """Process-wide index per data directory, so every session shares one refresh."""
+    with _INDEXES_LOCK:
+        key = (data_dir, state_dir)
+        if key not in _INDEXES:
+            _INDEXES[key] = ChunkSearchIndex(data_dir, state_dir)
+        return _INDEXES[key]
@@ -0,0 +1,199 @@
+# exaPipelineDashboard/utils/cleanup.py
+"""Cleanup engine for the Settings › Data tab.
+
+``plan_cleanup`` walks the stage directories in parallel and returns what
+would be removed per category without touching anything. ``apply_cleanup``
+then deletes exactly the planned paths, in batches.
+"""
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+TEMPORARY = "Temporary files"
+FAILED = "Failed processing results"
+LOW_QUALITY = "Low quality synthetic data"
+OLD_EXPORTS = "Old exports (>30 days)"
+CATEGORIES = [TEMPORARY, FAILED, LOW_QUALITY, OLD_EXPORTS]
+
+TEMP_PREFIXES = (".tmp_",)
+TEMP_SUFFIXES = (".tmp", ".part", ".partial", ".swp")
+
+
+def _scan_tree(path: str) -> Iterator[os.DirEntry]:
+    """Yield every file entry below ``path`` using ``os.scandir``."""
+    stack = [path]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry
+        except OSError:
+            continue
+
+
+def _tree_size(path: str) -> Tuple[int, int]:
+    files = size = 0
+    for entry in _scan_tree(path):
+        files += 1
+        size += entry.stat(follow_symlinks=False).st_size
+    return files, size
+
+
+def _load_json(path: str) -> Optional[Dict]:
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else None
+    except (OSError, ValueError):
+        return None
+
+
+def _scan_unit(category: str, path: str, cutoff: float, min_quality: float) -> List[Dict]:
+    """Collect candidates for one category inside one directory (usually one document)."""
+    candidates = []
+    if category == TEMPORARY:
+        candidates.extend(_temporary(path, cutoff))
+    elif category == FAILED:
+        for entry in _scan_tree(path):
+            if not entry.name.endswith('_annotations.json'):
+                continue
+            stat = entry.stat(follow_symlinks=False)
+            if stat.st_mtime >= cutoff:
+                continue
+            data = _load_json(entry.path)
+            annotations = (data or {}).get('annotations')
+            if data is None or (isinstance(annotations, dict) and 'error' in annotations):
+                candidates.append({"path": entry.path, "files": 1, "bytes": stat.st_size})
+    elif category == LOW_QUALITY:
+        for entry in _scan_tree(path):
+            if not (entry.name.endswith('.json') and 'syn' in entry.name):
+                continue
+            stat = entry.stat(follow_symlinks=False)
+            if stat.st_mtime >= cutoff:
+                continue
+            data = _load_json(entry.path)
+            score = ((data or {}).get('validation') or {}).get('score', 0.7)
+            if data is None or score < min_quality:
+                candidates.append({"path": entry.path, "files": 1, "bytes": stat.st_size})
+    return candidates
+
+
+def _temporary(path: str, cutoff: float) -> List[Dict]:
+    """Leftover temp files, and whole temp directories such as aborted exports."""
+    candidates = []
+    stack = [path]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        for entry in entries:
+            is_dir = entry.is_dir(follow_symlinks=False)
+            is_temp = entry.name.startswith(TEMP_PREFIXES) or entry.name.endswith(TEMP_SUFFIXES)
+            if is_temp and entry.stat(follow_symlinks=False).st_mtime < cutoff:
+                if is_dir:
+                    files, size = _tree_size(entry.path)
+                else:
+                    files, size = 1, entry.stat(follow_symlinks=False).st_size
+                candidates.append({"path": entry.path, "files": files, "bytes": size})
+            elif is_dir:
+                stack.append(entry.path)
+    return candidates
+
+
+def _old_exports(train_dir: str, cutoff: float) -> List[Dict]:
+    candidates = []
+    if not os.path.isdir(train_dir):
+        return candidates
+    with os.scandir(train_dir) as it:
+        for entry in it:
+            if entry.name.startswith('.'):
+                continue
+            stat = entry.stat(follow_symlinks=False)
+            if stat.st_mtime >= cutoff:
+                continue
+            if entry.is_dir(follow_symlinks=False) and os.path.exists(os.path.join(entry.path, "metadata.json")):
+                files, size = _tree_size(entry.path)
+                candidates.append({"path": entry.path, "files": files, "bytes": size})
+            elif entry.is_file(follow_symlinks=False) and entry.name.endswith('.zip'):
+                candidates.append({"path": entry.path, "files": 1, "bytes": stat.st_size})
+    return candidates
+
+
+def _doc_dirs(stage_dir: str) -> List[str]:
+    if not os.path.isdir(stage_dir):
+        return []
+    return [entry.path for entry in os.scandir(stage_dir) if entry.is_dir(follow_symlinks=False)]
+
+
+def plan_cleanup(data_dir: str, stages: List[str], categories: List[str], days_to_keep: int,
+                 min_quality: float = 0.7, max_workers: int = 8) -> Dict[str, Dict]:
+    """Dry run: per category, the paths that would be removed plus file and byte totals."""
+    cutoff = time.time() - days_to_keep * 86400
+    units: List[Tuple[str, str]] = []
+    if TEMPORARY in categories:
+        # One walk per stage tree; temp directories are taken whole
+        units += [(TEMPORARY, os.path.join(data_dir, stage)) for stage in stages
+                  if os.path.isdir(os.path.join(data_dir, stage))]
+    if FAILED in categories:
+        units += [(FAILED, d) for d in _doc_dirs(os.path.join(data_dir, "annotated"))]
+    if LOW_QUALITY in categories:
+        units += [(LOW_QUALITY, d) for d in _doc_dirs(os.path.join(data_dir, "synthetic"))]
+
+    plan = {category: {"items": [], "files": 0, "bytes": 0} for category in categories}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [(category, pool.submit(_scan_unit, category, path, cutoff, min_quality))
+                   for category, path in units]
+        if OLD_EXPORTS in categories:
+            futures.append((OLD_EXPORTS, pool.submit(_old_exports, os.path.join(data_dir, "train"), cutoff)))
+        for category, future in futures:
+            plan[category]["items"].extend(future.result())
+
+    for summary in plan.values():
+        summary["files"] = sum(item["files"] for item in summary["items"])
+        summary["bytes"] = sum(item["bytes"] for item in summary["items"])
+    return plan
+
+
+def apply_cleanup(data_dir: str, plan: Dict[str, Dict], batch_size: int = 500,
+                  progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, int]:
+    """Delete the planned paths in batches. Anything outside ``data_dir`` is refused."""
+    root = os.path.realpath(data_dir)
+    items = [item for summary in plan.values() for item in summary["items"]]
+    result = {"deleted": 0, "bytes": 0, "errors": 0}
+    for start in range(0, len(items), batch_size):
+        for item in items[start:start + batch_size]:
+            path = os.path.realpath(item["path"])
+            if os.path.commonpath([root, path]) != root or path == root:
+                result["errors"] += 1
+                continue
+            try:
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+                elif os.path.exists(path):
+                    os.remove(path)
+                else:
+                    continue
+                result["deleted"] += item["files"]
+                result["bytes"] += item["bytes"]
+            except OSError:
+                result["errors"] += 1
+        if progress is not None:
+            progress(min(start + batch_size, len(items)), len(items))
+    return result
+
+
+def format_bytes(size: float) -> str:
+    for unit in ["B", "KB", "MB", "GB"]:
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
@@ -0,0 +1,168 @@
+# exaPipelineDashboard/utils/disk_usage.py
+"""Per-stage and per-document disk usage with a cached, parallel scanner.
+
+Every directory's own file totals are cached together with its mtime. On
+the next scan a directory whose mtime is unchanged reuses its cached totals
+and only its subdirectories are checked, so a rescan costs roughly one
+``stat`` per directory plus a listing of the directories that changed.
+Files rewritten in place (same name) do not bump their directory's mtime;
+those are picked up by ``full=True``.
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from utils.state import atomic_write_json, read_json, state_path
+
+HISTORY_INTERVAL = 3600
+
+
+def _read_dir(path: str, mtime_ns: int) -> Dict:
+    entry = {"mtime_ns": mtime_ns, "files": 0, "bytes": 0, "dirs": []}
+    try:
+        with os.scandir(path) as it:
+            for item in it:
+                if item.is_dir(follow_symlinks=False):
+                    entry["dirs"].append(item.name)
+                elif item.is_file(follow_symlinks=False):
+                    entry["files"] += 1
+                    entry["bytes"] += item.stat(follow_symlinks=False).st_size
+    except OSError:
+        pass
+    return entry
+
+
+def _scan_dir(path: str, cache: Dict[str, Dict], new_cache: Dict[str, Dict], full: bool,
+              recursive: bool = True) -> Tuple[int, int]:
+    """Return ``(files, bytes)`` for ``path`` (and everything below it if ``recursive``)."""
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        return 0, 0
+    entry = cache.get(path)
+    if entry is None or full or entry["mtime_ns"] != mtime_ns:
+        entry = _read_dir(path, mtime_ns)
+    new_cache[path] = entry
+    files, size = entry["files"], entry["bytes"]
+    if recursive:
+        for name in entry["dirs"]:
+            sub_files, sub_bytes = _scan_dir(os.path.join(path, name), cache, new_cache, full)
+            files += sub_files
+            size += sub_bytes
+    return files, size
+
+
+class DiskUsageScanner:
+    """Scans ``data_dir`` stage by stage, document by document, across threads."""
+
+    def __init__(self, data_dir: str, stages: List[str], state_dir: str, max_workers: int = 8):
+        self.data_dir = data_dir
+        self.stages = stages
+        self.cache_path = state_path(state_dir, "disk_usage", "cache.json")
+        self.history_path = state_path(state_dir, "disk_usage", "history.jsonl")
+        self.max_workers = max_workers
+        self.lock = threading.Lock()
+        self.cache: Dict[str, Dict] = read_json(self.cache_path, {}) or {}
+        self.last_result: Optional[Dict] = None
+        self.last_scan = 0.0
+
+    def latest(self, max_age: float = 60) -> Dict:
+        """Most recent result, rescanning if it is older than ``max_age`` seconds."""
+        if self.last_result is None or time.monotonic() - self.last_scan > max_age:
+            return self.scan()
+        return self.last_result
+
+    def scan(self, full: bool = False) -> Dict:
+        started = time.monotonic()
+        units = []
+        for stage in self.stages:
+            stage_dir = os.path.join(self.data_dir, stage)
+            if not os.path.isdir(stage_dir):
+                continue
+            units.append((stage, None, stage_dir))
+            try:
+                with os.scandir(stage_dir) as it:
+                    units += [(stage, entry.name, entry.path) for entry in it if entry.is_dir(follow_symlinks=False)]
+            except OSError:
+                continue
+
+        with self.lock:
+            cache = self.cache
+        new_cache: Dict[str, Dict] = {}
+
+        def scan_unit(unit: Tuple[str, Optional[str], str]) -> Tuple[str, Optional[str], int, int]:
+            stage, doc_id, path = unit
+            local: Dict[str, Dict] = {}
+            # The stage directory itself only counts its own files; documents are separate units
+            files, size = _scan_dir(path, cache, local, full, recursive=doc_id is not None)
+            with self.lock:
+                new_cache.update(local)
+            return stage, doc_id, files, size
+
+        stages = {stage: {"files": 0, "bytes": 0, "documents": 0} for stage in self.stages}
+        documents = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for stage, doc_id, files, size in pool.map(scan_unit, units):
+                stages[stage]["files"] += files
+                stages[stage]["bytes"] += size
+                if doc_id is not None:
+                    stages[stage]["documents"] += 1
+                    documents.append({"stage": stage, "doc_id": doc_id, "files": files, "bytes": size})
+
+        with self.lock:
+            self.cache = new_cache
+        atomic_write_json(self.cache_path, new_cache, indent=None)
+
+        result = {
+            "scanned": datetime.now().isoformat(),
+            "duration_seconds": round(time.monotonic() - started, 3),
+            "stages": stages,
+            "documents": documents,
+            "total_bytes": sum(s["bytes"] for s in stages.values()),
+            "total_files": sum(s["files"] for s in stages.values())
+        }
+        self._record_history(result)
+        self.last_result = result
+        self.last_scan = time.monotonic()
+        return result
+
+    def _record_history(self, result: Dict) -> None:
+        history = self.history()
+        if history:
+            last = datetime.fromisoformat(history[-1]["timestamp"])
+            if (datetime.now() - last).total_seconds() < HISTORY_INTERVAL:
+                return
+        with open(self.history_path, 'a') as f:
+            f.write(json.dumps({
+                "timestamp": result["scanned"],
+                "stages": {stage: s["bytes"] for stage, s in result["stages"].items()}
+            }) + '\n')
+
+    def history(self) -> List[Dict]:
+        if not os.path.exists(self.history_path):
+            return []
+        entries = []
+        with open(self.history_path, 'r') as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue
+        return entries
+
+
+_SCANNERS: Dict[Tuple[str, str], DiskUsageScanner] = {}
+_SCANNERS_LOCK = threading.Lock()
+
+
+def get_scanner(data_dir: str, stages: List[str], state_dir: str) -> DiskUsageScanner:
+    """Process-wide scanner per data directory, so every session shares one cache."""
+    with _SCANNERS_LOCK:
+        key = (data_dir, state_dir)
+        if key not in _SCANNERS:
+            _SCANNERS[key] = DiskUsageScanner(data_dir, stages, state_dir)
+        return _SCANNERS[key]
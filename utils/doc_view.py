@@ -0,0 +1,143 @@
+# exaPipelineDashboard/utils/doc_view.py
+"""One consolidated view of all chunk annotations of a document.
+
+Every ``chunk_*_annotations.json`` of a document is merged into a single
+deduplicated entity set. Each value lists the chunks it was found in, and
+list-shaped tables with the same columns are concatenated. The merged
+result is stored under the dashboard state directory together with the
+document version it was built from: the names, mtimes and sizes of its
+annotation files. Opening an unchanged document therefore costs one
+``scandir`` and one small JSON read, however many chunks it has.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from utils import cache, metrics
+from utils.entity_stats import ANNOTATION_SUFFIX, ENTITY_TYPES, normalize
+from utils.state import atomic_write_json, read_json, state_path
+
+CACHE_VERSION = 1
+
+_MERGE_LOCKS: Dict[str, threading.Lock] = {}
+_MERGE_LOCKS_GUARD = threading.Lock()
+
+
+def chunk_name(file_name: str) -> str:
+    """``chunk_0003_annotations.json`` -> ``chunk_0003``"""
+    return file_name[:-len(ANNOTATION_SUFFIX)] if file_name.endswith(ANNOTATION_SUFFIX) else file_name
+
+
+def document_version(doc_path: str) -> Tuple[str, List[str]]:
+    """Digest of the document's annotation files (name, mtime, size), and their sorted names."""
+    try:
+        with os.scandir(doc_path) as it:
+            entries = sorted((e.name, e.stat().st_mtime_ns, e.stat().st_size)
+                             for e in it if e.name.endswith(ANNOTATION_SUFFIX) and e.is_file())
+    except OSError:
+        entries = []
+    digest = hashlib.blake2b(repr((CACHE_VERSION, entries)).encode(), digest_size=12).hexdigest()
+    return digest, [name for name, _mtime, _size in entries]
+
+
+def _as_list(value) -> list:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def merge_annotations(doc_path: str, file_names: List[str]) -> Dict:
+    """Merge the given annotation files of one document, in file order."""
+    entities: Dict[str, "OrderedDict[str, Dict]"] = {entity_type: OrderedDict() for entity_type in ENTITY_TYPES}
+    action_items: "OrderedDict[str, Dict]" = OrderedDict()
+    compliance: List[Dict] = []
+    tables: "OrderedDict[Tuple[str, ...], Dict]" = OrderedDict()
+    other_tables: List[Dict] = []
+    chunks: List[Dict] = []
+
+    for file_name in file_names:
+        chunk = chunk_name(file_name)
+        # Read directly: chunk files are only needed once per version, not worth LRU space
+        data = read_json(os.path.join(doc_path, file_name))
+        annotations = data.get("annotations", {}) if isinstance(data, dict) else {}
+        if not isinstance(annotations, dict) or not annotations or "error" in annotations:
+            error = annotations.get("error") if isinstance(annotations, dict) else None
+            chunks.append({"Chunk": chunk, "Entities": 0, "Tables": 0, "Error": str(error or "unreadable")})
+            continue
+
+        found = 0
+        for entity_type in ENTITY_TYPES:
+            for value in _as_list(annotations.get(entity_type)):
+                text = normalize(value)
+                if not text:
+                    continue
+                found += 1
+                entry = entities[entity_type].setdefault(text.casefold(), {"value": text, "mentions": 0, "chunks": []})
+                entry["mentions"] += 1
+                if entry["chunks"][-1:] != [chunk]:
+                    entry["chunks"].append(chunk)
+
+        for item in _as_list(annotations.get("action_items")):
+            text = normalize(item)
+            if text:
+                entry = action_items.setdefault(text.casefold(), {"item": text, "chunks": []})
+                if entry["chunks"][-1:] != [chunk]:
+                    entry["chunks"].append(chunk)
+
+        if annotations.get("compliance_status"):
+            compliance.append({"Chunk": chunk, "Status": normalize(annotations["compliance_status"])})
+
+        chunk_tables = _as_list(annotations.get("tables"))
+        for index, table in enumerate(chunk_tables, 1):
+            if isinstance(table, list) and table and all(isinstance(row, dict) for row in table):
+                columns = tuple(sorted({key for row in table for key in row}))
+                combined = tables.setdefault(columns, {"columns": list(columns), "rows": []})
+                combined["rows"] += [{"Chunk": chunk, "Table": index, **row} for row in table]
+            else:
+                other_tables.append({"chunk": chunk, "table": index, "data": table})
+
+        chunks.append({"Chunk": chunk, "Entities": found, "Tables": len(chunk_tables), "Error": ""})
+
+    return {
+        "entities": {entity_type: list(values.values()) for entity_type, values in entities.items()},
+        "action_items": list(action_items.values()),
+        "compliance": compliance,
+        "tables": list(tables.values()),
+        "other_tables": other_tables,
+        "chunks": chunks,
+        "failed_chunks": sum(1 for c in chunks if c["Error"])
+    }
+
+
+def _merge_lock(cache_path: str) -> threading.Lock:
+    with _MERGE_LOCKS_GUARD:
+        return _MERGE_LOCKS.setdefault(cache_path, threading.Lock())
+
+
+def consolidated(data_dir: str, state_dir: str, doc_id: str) -> Dict:
+    """The merged view of a document, rebuilt only when its annotation files change.
+
+    ``built`` is False when the result came from the on-disk cache.
+    """
+    doc_path = os.path.join(data_dir, "annotated", doc_id)
+    version, file_names = document_version(doc_path)
+    cache_path = state_path(state_dir, "doc_view", f"{doc_id}.json")
+
+    cached = cache.read_json(cache_path)
+    if isinstance(cached, dict) and cached.get("version") == version:
+        return {**cached, "built": False}
+    with _merge_lock(cache_path):
+        # Another session may have merged this version while we waited
+        cached = cache.read_json(cache_path)
+        if isinstance(cached, dict) and cached.get("version") == version:
+            return {**cached, "built": False}
+        with metrics.timed("document_merge"):
+            merged = merge_annotations(doc_path, file_names)
+        metrics.ITEMS.inc(len(file_names), operation="document_merge")
+        result = {"doc_id": doc_id, "version": version, "merged_at": datetime.now().isoformat(),
+                  "chunk_count": len(file_names), **merged}
+        atomic_write_json(cache_path, result, indent=None)
+    return {**result, "built": True}
@@ -0,0 +1,211 @@
+# exaPipelineDashboard/utils/entity_stats.py
+"""Corpus-wide entity frequencies aggregated from every ``_annotations.json``.
+
+Map: each chunk's entity lists are reduced to ``{entity_type: {value: count}}``
+and cached together with the chunk file's mtime and size. A document's
+chunk counters are merged into one per-document counter. Reduce: document
+counters are summed, optionally for one ``doc_type`` only.
+
+A refresh lists the annotated directories and stats every chunk, but only
+parses chunks that are new or changed since the cached entry; documents are
+mapped concurrently. The cache lives under the dashboard state directory so
+a restarted dashboard renders straight from it.
+"""
+import json
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from utils import metrics
+from utils.state import atomic_write_json, read_json, state_path
+
+ANNOTATION_SUFFIX = "_annotations.json"
+ENTITY_TYPES = ["companies", "people", "dates", "amounts"]
+CACHE_VERSION = 2
+
+
+def normalize(value) -> str:
+    """Collapse whitespace so ``ACME  Corp`` and ``ACME Corp`` count together."""
+    if not isinstance(value, str):
+        value = json.dumps(value, ensure_ascii=False, sort_keys=True)
+    return " ".join(value.split())
+
+
+def map_chunk(path: str) -> Dict:
+    """Entity counters for one chunk; ``error`` is set when the annotation failed."""
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {"counts": {}, "error": True}
+    annotations = data.get("annotations", {}) if isinstance(data, dict) else {}
+    if not isinstance(annotations, dict) or not annotations or "error" in annotations:
+        return {"counts": {}, "error": True}
+    counts = {}
+    for entity_type in ENTITY_TYPES:
+        values = annotations.get(entity_type) or []
+        if not isinstance(values, list):
+            values = [values]
+        counter = Counter(v for v in (normalize(value) for value in values) if v)
+        if counter:
+            counts[entity_type] = dict(counter)
+    return {"counts": counts, "error": False}
+
+
+def _merge(target: Dict[str, Counter], counts: Dict[str, Dict[str, int]]) -> None:
+    for entity_type, values in counts.items():
+        target.setdefault(entity_type, Counter()).update(values)
+
+
+def _doc_type(metadata_path: str) -> Tuple[str, int]:
+    try:
+        mtime_ns = os.stat(metadata_path).st_mtime_ns
+    except OSError:
+        return "Unknown", 0
+    metadata = read_json(metadata_path, {}) or {}
+    return str(metadata.get("doc_type") or "Unknown"), mtime_ns
+
+
+class EntityAnalytics:
+    """Incremental map-reduce over the annotated stage, shared by all sessions."""
+
+    def __init__(self, data_dir: str, state_dir: str, max_workers: int = 8):
+        self.annotated_dir = os.path.join(data_dir, "annotated")
+        self.classified_dir = os.path.join(data_dir, "classified")
+        self.cache_path = state_path(state_dir, "entity_stats", "cache.json")
+        self.max_workers = max_workers
+        self.lock = threading.Lock()
+        cache = read_json(self.cache_path, {}) or {}
+        self.docs: Dict[str, Dict] = cache.get("docs", {}) if cache.get("version") == CACHE_VERSION else {}
+        self.last_summary: Optional[Dict] = None
+        self.last_refresh = 0.0
+
+    def latest(self, max_age: float = 60) -> Dict:
+        """Most recent summary, refreshing if it is older than ``max_age`` seconds."""
+        if self.last_summary is None or time.monotonic() - self.last_refresh > max_age:
+            return self.refresh()
+        return self.last_summary
+
+    def _map_document(self, doc_id: str, cached: Optional[Dict], full: bool) -> Tuple[Dict, int]:
+        """Return the document's cache entry and how many chunks had to be parsed."""
+        doc_path = os.path.join(self.annotated_dir, doc_id)
+        doc_type, meta_mtime_ns = _doc_type(os.path.join(self.classified_dir, doc_id, "metadata.json"))
+        old_chunks = (cached or {}).get("chunks", {})
+        chunks, parsed = {}, 0
+        try:
+            with os.scandir(doc_path) as it:
+                entries = [e for e in it if e.name.endswith(ANNOTATION_SUFFIX) and e.is_file()]
+        except OSError:
+            entries = []
+        for entry in entries:
+            stat = entry.stat()
+            old = old_chunks.get(entry.name)
+            if not full and old and old["mtime_ns"] == stat.st_mtime_ns and old["size"] == stat.st_size:
+                chunks[entry.name] = old
+                continue
+            chunks[entry.name] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, **map_chunk(entry.path)}
+            parsed += 1
+        if cached and not parsed and chunks.keys() == old_chunks.keys():
+            # Nothing changed below this document; keep its merged counters
+            return {**cached, "doc_type": doc_type, "meta_mtime_ns": meta_mtime_ns}, 0
+        merged: Dict[str, Counter] = {}
+        for chunk in chunks.values():
+            _merge(merged, chunk["counts"])
+        return {
+            "doc_type": doc_type,
+            "meta_mtime_ns": meta_mtime_ns,
+            "chunks": chunks,
+            "counts": {entity_type: dict(counter) for entity_type, counter in merged.items()}
+        }, parsed
+
+    @metrics.instrumented("entity_analytics")
+    def refresh(self, full: bool = False) -> Dict:
+        started = time.monotonic()
+        try:
+            doc_ids = sorted(e.name for e in os.scandir(self.annotated_dir) if e.is_dir())
+        except OSError:
+            doc_ids = []
+        with self.lock:
+            cached = self.docs
+
+        docs: Dict[str, Dict] = {}
+        parsed = 0
+        if doc_ids:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(doc_ids))) as pool:
+                results = pool.map(lambda d: self._map_document(d, cached.get(d), full), doc_ids)
+                for doc_id, (entry, doc_parsed) in zip(doc_ids, results):
+                    if entry["chunks"]:
+                        docs[doc_id] = entry
+                    parsed += doc_parsed
+        metrics.ITEMS.inc(parsed, operation="entity_analytics")
+
+        with self.lock:
+            self.docs = docs
+        if parsed or docs.keys() != cached.keys():
+            atomic_write_json(self.cache_path, {"version": CACHE_VERSION, "docs": docs}, indent=None)
+
+        self.last_summary = {
+            "refreshed": datetime.now().isoformat(),
+            "duration_seconds": round(time.monotonic() - started, 3),
+            "documents": len(docs),
+            "chunks": sum(len(d["chunks"]) for d in docs.values()),
+            "parsed_chunks": parsed,
+            "failed_chunks": sum(c["error"] for d in docs.values() for c in d["chunks"].values()),
+            "doc_types": sorted({d["doc_type"] for d in docs.values()})
+        }
+        self.last_refresh = time.monotonic()
+        return self.last_summary
+
+    def frequencies(self, entity_type: str, doc_type: Optional[str] = None,
+                    limit: Optional[int] = 100) -> List[Dict]:
+        """Most frequent values of one entity type, with how many documents mention each."""
+        mentions: Counter = Counter()
+        documents: Counter = Counter()
+        with self.lock:
+            docs = list(self.docs.values())
+        for doc in docs:
+            if doc_type is not None and doc["doc_type"] != doc_type:
+                continue
+            values = doc["counts"].get(entity_type, {})
+            mentions.update(values)
+            documents.update(values.keys())
+        return [{"Value": value, "Mentions": count, "Documents": documents[value]}
+                for value, count in mentions.most_common(limit)]
+
+    def density(self) -> List[Dict]:
+        """Entities extracted per chunk, by document type."""
+        rows: Dict[str, Dict] = {}
+        with self.lock:
+            docs = list(self.docs.values())
+        for doc in docs:
+            row = rows.setdefault(doc["doc_type"], {"Document Type": doc["doc_type"], "Documents": 0,
+                                                    "Chunks": 0, "Failed Chunks": 0,
+                                                    **{t: 0 for t in ENTITY_TYPES}})
+            row["Documents"] += 1
+            row["Chunks"] += len(doc["chunks"])
+            row["Failed Chunks"] += sum(c["error"] for c in doc["chunks"].values())
+            for entity_type in ENTITY_TYPES:
+                row[entity_type] += sum(doc["counts"].get(entity_type, {}).values())
+        for row in rows.values():
+            chunks = max(row["Chunks"], 1)
+            row["Entities / Chunk"] = round(sum(row[t] for t in ENTITY_TYPES) / chunks, 2)
+            for entity_type in ENTITY_TYPES:
+                row[f"{entity_type.title()} / Chunk"] = round(row.pop(entity_type) / chunks, 2)
+        return sorted(rows.values(), key=lambda r: r["Chunks"], reverse=True)
+
+
+_ANALYTICS: Dict[Tuple[str, str], EntityAnalytics] = {}
+_ANALYTICS_LOCK = threading.Lock()
+
+
+def get_analytics(data_dir: str, state_dir: str) -> EntityAnalytics:
+    """Process-wide analytics per data directory, so every session shares one cache."""
+    with _ANALYTICS_LOCK:
+        key = (data_dir, state_dir)
+        if key not in _ANALYTICS:
+            _ANALYTICS[key] = EntityAnalytics(data_dir, state_dir)
+        return _ANALYTICS[key]
@@ -0,0 +1,918 @@
+# exaPipelineDashboard/utils/export.py
+"""Sample loading, format conversion and dataset writing for training exports.
+
+Kept free of Streamlit so the same code runs in the page and in export workers.
+"""
+import hashlib
+import json
+import math
+import multiprocessing
+import multiprocessing.spawn
+import os
+import random
+import re
+import zipfile
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from utils import metrics
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+_WORKER_PREFIX = "SpawnPoolWorker"
+
+
+def _worker_preparation_data(name: str, _prepare=multiprocessing.spawn.get_preparation_data) -> Dict:
+    """Spawn preparation data, without the ``__main__`` to re-run for pool workers."""
+    data = _prepare(name)
+    if name.startswith(_WORKER_PREFIX):
+        data.pop("init_main_from_path", None)
+        data.pop("init_main_from_name", None)
+    return data
+
+
+if not getattr(multiprocessing.spawn.get_preparation_data, "_spawn_pool", False):
+    _worker_preparation_data._spawn_pool = True
+    multiprocessing.spawn.get_preparation_data = _worker_preparation_data
+
+
+class _WorkerProcess(multiprocessing.context.SpawnProcess):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = f"{_WORKER_PREFIX}-{self.name}"
+
+
+class _WorkerContext(multiprocessing.context.SpawnContext):
+    Process = _WorkerProcess
+
+
+class SpawnPool(ProcessPoolExecutor):
+    """Process pool for work started from the dashboard.
+
+    Workers are spawned, never forked, so they do not inherit the Streamlit
+    server's threads and sockets. A spawned child normally re-runs the
+    parent's ``__main__``, and under Streamlit that is the running app
+    script, so the pool's workers are started without it. Nothing in the
+    dashboard process is swapped while they start, so concurrent sessions
+    are unaffected.
+    """
+
+    def __init__(self, max_workers: int):
+        super().__init__(max_workers=max_workers, mp_context=_WorkerContext())
+
+
+def _loads(raw: bytes):
+    """orjson when available; the stdlib also accepts what orjson rejects (NaN, huge ints)"""
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except ValueError:
+            pass
+    return json.loads(raw)
+
+
+EXPORT_FILES = ["train.jsonl", "validation.jsonl", "test.jsonl", "metadata.json", "README.md", "manifest.json"]
+MANIFEST_FILE = "manifest.json"
+SHARD_FILE = re.compile(r"(train|validation|test)-\d{5}\.jsonl")
+
+
+def iter_sample_files(validated_dir: str, synthetic_dir: str,
+                      include_synthetic: bool = True) -> Iterator[Tuple[str, str, str, str]]:
+    """Yield ``(source, doc_id, file_name, path)`` for every candidate sample file."""
+    if os.path.exists(validated_dir):
+        for doc_id in os.listdir(validated_dir):
+            doc_path = os.path.join(validated_dir, doc_id)
+            if os.path.isdir(doc_path):
+                for file in os.listdir(doc_path):
+                    if file.endswith('_validated.json'):
+                        yield 'validated', doc_id, file, os.path.join(doc_path, file)
+    if include_synthetic and os.path.exists(synthetic_dir):
+        for doc_id in os.listdir(synthetic_dir):
+            doc_path = os.path.join(synthetic_dir, doc_id)
+            if os.path.isdir(doc_path):
+                for file in os.listdir(doc_path):
+                    if file.endswith('.json') and 'syn' in file:
+                        yield 'synthetic', doc_id, file, os.path.join(doc_path, file)
+
+
+@metrics.instrumented("directory_scan")
+def list_sample_files(validated_dir: str, synthetic_dir: str,
+                      include_synthetic: bool = True) -> List[Tuple[str, str, str, str]]:
+    """Return ``(source, doc_id, file_name, path)`` for every candidate sample file."""
+    return list(iter_sample_files(validated_dir, synthetic_dir, include_synthetic))
+
+
+def _load_warning(source: str, path: str, error: Exception) -> str:
+    label = "synthetic " if source == 'synthetic' else ""
+    return f"Could not load {label}{path}: {error}"
+
+
+def _source_files(sources: List[Dict], include_synthetic: bool) -> Iterator[Tuple[Optional[str], str, str, str, str]]:
+    """``(instance, source, doc_id, file_name, path)`` across the sample sources of several instances"""
+    for sample_source in sources:
+        for entry in iter_sample_files(sample_source["validated_dir"], sample_source["synthetic_dir"],
+                                       include_synthetic):
+            yield (sample_source.get("instance"),) + entry
+
+
+@metrics.instrumented("load_samples")
+def load_samples(sources: List[Dict], min_quality: float = 0.7,
+                 include_synthetic: bool = True, warnings: Optional[List[str]] = None,
+                 progress: Optional[Callable[[int, int], None]] = None) -> List[Dict]:
+    """Load all samples from the validated and optionally synthetic directories of every
+    source (see ``federation.sample_sources``), as record dicts"""
+    samples = []
+    with metrics.timed("directory_scan"):
+        files = list(_source_files(sources, include_synthetic))
+    for i, (instance, source, doc_id, file, file_path) in enumerate(files):
+        try:
+            record = _read_record(source, doc_id, file_path, instance=instance)
+            if record.quality >= min_quality:
+                samples.append(record.as_dict())
+        except Exception as e:
+            if warnings is not None:
+                warnings.append(_load_warning(source, file_path, e))
+        if progress is not None:
+            progress(i + 1, len(files))
+    metrics.ITEMS.inc(len(files), operation="load_samples")
+    return samples
+
+
+# Stratified splitting over lightweight sample references
+class Reservoir:
+    """Uniform sample of at most ``capacity`` items from a stream (algorithm R)"""
+
+    def __init__(self, capacity: Optional[int], rng: random.Random):
+        self.capacity = capacity
+        self.rng = rng
+        self.items: List = []
+        self.seen = 0
+
+    def add(self, item) -> None:
+        self.seen += 1
+        if self.capacity is None or len(self.items) < self.capacity:
+            self.items.append(item)
+            return
+        slot = self.rng.randrange(self.seen)
+        if slot < self.capacity:
+            self.items[slot] = item
+
+
+def _doc_type_lookup(classified_dir: Optional[str]) -> Callable[[str], str]:
+    """doc_type from the classifier's metadata.json, read once per document"""
+    cache: Dict[str, str] = {}
+
+    def lookup(doc_id: str) -> str:
+        if doc_id not in cache:
+            doc_type = 'Unknown'
+            if classified_dir:
+                try:
+                    with open(os.path.join(classified_dir, doc_id, "metadata.json"), 'r') as f:
+                        doc_type = json.load(f).get('doc_type') or 'Unknown'
+                except (OSError, ValueError, AttributeError):
+                    pass
+            cache[doc_id] = doc_type
+        return cache[doc_id]
+    return lookup
+
+
+def iter_sample_refs(validated_dir: str, synthetic_dir: str, min_quality: float = 0.7,
+                     include_synthetic: bool = True, classified_dir: Optional[str] = None,
+                     warnings: Optional[List[str]] = None,
+                     progress: Optional[Callable[[int, int], None]] = None,
+                     instance: Optional[str] = None) -> Iterator[Dict]:
+    """Yield ``{source, doc_id, file_name, path, quality, doc_type, instance}`` for every sample
+    that passes the quality filter; each file is decoded straight into a ``SampleRecord``
+    and dropped as soon as it has been scored"""
+    files = list_sample_files(validated_dir, synthetic_dir, include_synthetic)
+    doc_type_of = _doc_type_lookup(classified_dir)
+    for i, (source, doc_id, file, file_path) in enumerate(files):
+        try:
+            record = _read_record(source, doc_id, file_path)
+            if record.quality >= min_quality:
+                yield {
+                    'source': source,
+                    'doc_id': doc_id,
+                    'file_name': file,
+                    'path': file_path,
+                    'quality': record.quality,
+                    'doc_type': record.metadata.get('doc_type') or doc_type_of(doc_id),
+                    'instance': instance
+                }
+        except Exception as e:
+            if warnings is not None:
+                warnings.append(_load_warning(source, file_path, e))
+        if progress is not None:
+            progress(i + 1, len(files))
+    metrics.ITEMS.inc(len(files), operation="sample_scan")
+
+
+def allocate_split(n: int, fractions: Tuple[float, float, float]) -> Tuple[int, int, int]:
+    """Split ``n`` items by ``fractions`` (largest remainder).
+
+    Every split with a non-zero fraction gets at least one item when there are
+    enough items to go round, so rare strata still reach validation and test.
+    Fractions are rounded first, so float residue such as ``1 - 0.7 - 0.3``
+    counts as an empty split:
+
+    >>> allocate_split(10, (0.7, 0.3, 1 - 0.7 - 0.3))
+    (7, 3, 0)
+    >>> allocate_split(3, (0.7, 0.3, 1 - 0.7 - 0.3))
+    (2, 1, 0)
+    >>> allocate_split(3, (0.57, 0.43, 1 - 0.57 - 0.43))
+    (2, 1, 0)
+    """
+    fractions = tuple(max(0.0, round(f, 9)) for f in fractions)
+    exact = [n * f for f in fractions]
+    counts = [int(x) for x in exact]
+    for i in sorted(range(3), key=lambda i: exact[i] - counts[i], reverse=True)[:n - sum(counts)]:
+        counts[i] += 1
+    wanted = [i for i in range(3) if fractions[i] > 0]
+    if n >= len(wanted):
+        for i in wanted:
+            if counts[i] == 0:
+                donor = max((j for j in range(3) if counts[j] > (j in wanted)), key=lambda j: counts[j])
+                counts[donor] -= 1
+                counts[i] += 1
+    return counts[0], counts[1], counts[2]
+
+
+@metrics.instrumented("stratified_split")
+def stratified_split(refs: Iterable[Dict], split_train: float, split_val: float,
+                     stratify: bool = True, max_per_type: Optional[int] = None,
+                     seed: Optional[int] = None) -> Tuple[List, List, List, Dict[str, Dict[str, int]]]:
+    """Single pass over sample references: cap each doc_type, then split every stratum.
+
+    Each doc_type keeps a reservoir of at most ``max_per_type`` references, so
+    capping needs no second pass and no more memory than the kept references.
+    With ``stratify`` the reservoirs are split per ``(doc_type, source)``;
+    otherwise everything is shuffled and cut as one group.
+    Returns train, validation and test references plus per-stratum counts.
+    """
+    rng = random.Random(seed)
+    reservoirs: Dict[str, Reservoir] = {}
+    for ref in refs:
+        doc_type = ref['doc_type']
+        if doc_type not in reservoirs:
+            reservoirs[doc_type] = Reservoir(max_per_type or None, rng)
+        reservoirs[doc_type].add(ref)
+
+    strata: Dict[str, List[Dict]] = defaultdict(list)
+    for doc_type in sorted(reservoirs):
+        for ref in reservoirs[doc_type].items:
+            strata[f"{doc_type}/{ref['source']}" if stratify else "all"].append(ref)
+
+    fractions = (split_train, split_val, 1 - split_train - split_val)
+    train, validation, test = [], [], []
+    counts = {}
+    for key in sorted(strata):
+        group = strata[key]
+        rng.shuffle(group)
+        n_train, n_val, _ = allocate_split(len(group), fractions)
+        train += group[:n_train]
+        validation += group[n_train:n_train + n_val]
+        test += group[n_train + n_val:]
+        counts[key] = {"train": n_train, "validation": n_val, "test": len(group) - n_train - n_val}
+    for split in (train, validation, test):
+        rng.shuffle(split)
+    return train, validation, test, counts
+
+
+class SampleRecord:
+    """The fields of a sample that the export formats read, and nothing else.
+
+    Samples on disk also carry the original chunk, raw model output and
+    validation details; an export holds one split of these at a time, so
+    only what the converters need is kept, in slots.
+    """
+    __slots__ = ("content", "annotations", "quality", "source", "doc_id", "doc_type",
+                 "instance", "metadata", "validation_score", "completeness")
+
+    def __init__(self, content: str, annotations: Dict, quality: float, source: str, doc_id: str,
+                 doc_type: str, instance: Optional[str], metadata: Dict,
+                 validation_score: float, completeness: float):
+        self.content = content
+        self.annotations = annotations
+        self.quality = quality
+        self.source = source
+        self.doc_id = doc_id
+        self.doc_type = doc_type
+        self.instance = instance
+        self.metadata = metadata
+        self.validation_score = validation_score
+        self.completeness = completeness
+
+    def as_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def decode_record(raw: bytes, source: str, doc_id: str, doc_type: str = "Unknown",
+                  instance: Optional[str] = None) -> SampleRecord:
+    """Decode one sample file's bytes straight into a ``SampleRecord``.
+
+    Uses orjson when it is installed. Everything outside the record's fields
+    is dropped as soon as the file is parsed.
+    """
+    data = _loads(raw)
+    if not isinstance(data, dict):
+        raise ValueError("sample is not a JSON object")
+    validation = data.get('validation') or {}
+    # Synthetic variations are not always re-validated; assume they passed
+    default_score = 0 if source == 'validated' else 0.7
+    return SampleRecord(
+        content=data.get('content') or '',
+        annotations=data.get('annotations') or {},
+        quality=validation.get('score', default_score),
+        source=source,
+        doc_id=doc_id,
+        doc_type=doc_type,
+        instance=instance,
+        metadata=data.get('metadata') or {},
+        validation_score=validation.get('score', 0),
+        completeness=validation.get('completeness', 0.5)
+    )
+
+
+def _read_record(source: str, doc_id: str, path: str, doc_type: str = "Unknown",
+                 instance: Optional[str] = None) -> SampleRecord:
+    with open(path, 'rb') as f:
+        return decode_record(f.read(), source, doc_id, doc_type, instance)
+
+
+def load_refs(refs: List[Dict], warnings: Optional[List[str]] = None) -> List[SampleRecord]:
+    """Decode the samples behind a list of references into compact records"""
+    records = []
+    for ref in refs:
+        try:
+            records.append(_read_record(ref['source'], ref['doc_id'], ref['path'], ref.get('doc_type', 'Unknown'),
+                                        ref.get('instance')))
+        except Exception as e:
+            if warnings is not None:
+                warnings.append(_load_warning(ref['source'], ref['path'], e))
+    return records
+
+
+# Quick preview from a bounded random sample of files
+def wilson_interval(successes: int, n: int, z: float = 1.96) -> Tuple[float, float]:
+    """95% Wilson score interval for a proportion; stays inside [0, 1] for small n"""
+    if n == 0:
+        return 0.0, 1.0
+    p = successes / n
+    denominator = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+@metrics.instrumented("sample_preview")
+def preview_samples(sources: List[Dict], min_quality: float = 0.7,
+                    include_synthetic: bool = True, sample_size: int = 200,
+                    warnings: Optional[List[str]] = None, seed: Optional[int] = None) -> Dict:
+    """Estimate what ``load_samples`` would return by parsing at most ``sample_size`` files.
+
+    File counts per source come straight from the directory listings; the
+    files to parse are drawn uniformly with a reservoir while listing, across
+    the directories of every instance in ``sources``. Quality
+    pass rates and the quality histogram are estimated from the parsed files,
+    each with a 95% interval.
+    """
+    rng = random.Random(seed)
+    reservoir = Reservoir(sample_size, rng)
+    files_per_source: Dict[str, int] = defaultdict(int)
+    for entry in _source_files(sources, include_synthetic):
+        files_per_source[entry[1]] += 1
+        reservoir.add(entry)
+
+    parsed: Dict[str, int] = defaultdict(int)
+    passed: Dict[str, int] = defaultdict(int)
+    samples = []
+    qualities = []
+    for instance, source, doc_id, file, file_path in reservoir.items:
+        try:
+            record = _read_record(source, doc_id, file_path, instance=instance)
+        except Exception as e:
+            if warnings is not None:
+                warnings.append(_load_warning(source, file_path, e))
+            continue
+        parsed[source] += 1
+        qualities.append(record.quality)
+        if record.quality >= min_quality:
+            passed[source] += 1
+            samples.append(record.as_dict())
+    metrics.ITEMS.inc(len(reservoir.items), operation="sample_preview")
+
+    sources = {}
+    for source, n_files in files_per_source.items():
+        low, high = wilson_interval(passed[source], parsed[source])
+        sources[source] = {
+            "files": n_files,
+            "parsed": parsed[source],
+            "pass_rate": passed[source] / parsed[source] if parsed[source] else None,
+            "pass_rate_ci": (low, high),
+            "estimated_samples": round(n_files * passed[source] / parsed[source]) if parsed[source] else None,
+            "estimated_samples_ci": (int(n_files * low), math.ceil(n_files * high))
+        }
+
+    n = len(qualities)
+    histogram = []
+    for i in range(10):
+        low_edge, high_edge = i / 10, (i + 1) / 10
+        hits = sum(1 for q in qualities if low_edge <= q < high_edge or (i == 9 and q >= 1))
+        ci = wilson_interval(hits, n)
+        histogram.append({"Quality": f"{low_edge:.1f}-{high_edge:.1f}", "Share": hits / n if n else 0.0,
+                          "Low": ci[0], "High": ci[1]})
+
+    mean = sum(qualities) / n if n else 0.0
+    stderr = math.sqrt(sum((q - mean) ** 2 for q in qualities) / (n - 1) / n) if n > 1 else 0.0
+    return {
+        "files": sum(files_per_source.values()),
+        "parsed": n,
+        "sources": sources,
+        "estimated_samples": sum(s["estimated_samples"] or 0 for s in sources.values()),
+        "estimated_samples_ci": (sum(s["estimated_samples_ci"][0] for s in sources.values()),
+                                 sum(s["estimated_samples_ci"][1] for s in sources.values())),
+        "mean_quality": mean,
+        "mean_quality_ci": (mean - 1.96 * stderr, mean + 1.96 * stderr),
+        "histogram": histogram,
+        "samples": samples
+    }
+
+
+# Helper functions for format conversion
+def simplify_annotations(annotations: Dict) -> Dict:
+    """Flatten ``{"value": ...}`` / ``{"text": ...}`` annotation objects to their values"""
+    simplified = {}
+    for key, value in annotations.items():
+        if isinstance(value, dict):
+            # Extract simple values
+            if 'value' in value:
+                simplified[key] = value['value']
+            elif 'text' in value:
+                simplified[key] = value['text']
+            else:
+                simplified[key] = str(value)
+        else:
+            simplified[key] = value
+    return simplified
+
+
+def convert_to_sft_format(sample: SampleRecord, instruction_template, simplify=True):
+    """Convert a sample to SFT format"""
+    annotations = sample.annotations
+
+    # Simplify annotations if requested
+    if simplify and annotations:
+        annotations = simplify_annotations(annotations)
+
+    return {
+        "instruction": instruction_template,
+        "input": sample.content,
+        "output": json.dumps(annotations, ensure_ascii=False),
+        "source": sample.source,
+        "quality": sample.quality,
+        "metadata": sample.metadata
+    }
+
+
+def convert_to_rlaif_format(sample: SampleRecord, score_field='quality'):
+    """Convert a sample to RLAIF format"""
+    # Determine score
+    if score_field == 'quality':
+        score = sample.quality
+    elif score_field == 'validation_score':
+        score = sample.validation_score
+    elif score_field == 'composite':
+        # Composite score calculation
+        score = (0.5 * sample.quality + 0.3 * sample.validation_score + 0.2 * sample.completeness)
+    else:
+        score = getattr(sample, score_field, 0) if score_field in SampleRecord.__slots__ else 0
+
+    return {
+        "prompt": f"Extract information from: {sample.content[:200]}...",
+        "response": json.dumps(sample.annotations, ensure_ascii=False),
+        "score": float(score),
+        "source": sample.source,
+        "metadata": sample.metadata
+    }
+
+
+def convert_to_rlhf_format(samples: List[SampleRecord], method='quality', min_diff=0.1):
+    """Convert samples to RLHF comparison format"""
+    comparisons = []
+
+    # Group by document for fair comparisons (doc ids are only unique within an instance)
+    doc_groups = defaultdict(list)
+    for sample in samples:
+        doc_groups[(sample.instance, sample.doc_id)].append(sample)
+
+    for (_instance, doc_id), doc_samples in doc_groups.items():
+        if len(doc_samples) < 2:
+            continue
+
+        # Sort by quality
+        doc_samples.sort(key=lambda x: x.quality, reverse=True)
+
+        # Create comparisons
+        for i in range(min(len(doc_samples), 5)):
+            for j in range(i + 1, min(len(doc_samples), 5)):
+                chosen = doc_samples[i]
+                rejected = doc_samples[j]
+
+                # Check quality difference
+                if chosen.quality - rejected.quality >= min_diff:
+                    comparisons.append({
+                        "prompt": f"Extract information from this construction document",
+                        "chosen": json.dumps(chosen.annotations, ensure_ascii=False),
+                        "rejected": json.dumps(rejected.annotations, ensure_ascii=False),
+                        "chosen_quality": chosen.quality,
+                        "rejected_quality": rejected.quality,
+                        "doc_id": doc_id
+                    })
+
+    return comparisons
+
+
+QWEN3_SYSTEM_PROMPT = ("You extract structured information from construction documents. "
+                       "Reply with a single JSON object and nothing else.")
+QWEN3_USER_TEMPLATE = "Extract structured information from this {doc_type} document:\n\n{content}"
+TEMPLATE_FIELDS = re.compile(r"\{(content|doc_type|doc_id|source)\}")
+
+
+def fill_template(template: str, sample: SampleRecord) -> str:
+    """Substitute ``{content}``, ``{doc_type}``, ``{doc_id}`` and ``{source}``; other braces are left alone"""
+    return TEMPLATE_FIELDS.sub(lambda m: str(getattr(sample, m.group(1))), template)
+
+
+def convert_to_qwen3_format(sample: SampleRecord, system_prompt: str = QWEN3_SYSTEM_PROMPT,
+                            user_template: str = QWEN3_USER_TEMPLATE, simplify=True, include_metadata=True):
+    """Convert a sample to a Qwen3 chat ``messages`` record (system message omitted when empty)"""
+    annotations = simplify_annotations(sample.annotations) if simplify and sample.annotations else sample.annotations
+    messages = [{"role": "system", "content": system_prompt}] if system_prompt else []
+    messages += [
+        {"role": "user", "content": fill_template(user_template, sample)},
+        {"role": "assistant", "content": json.dumps(annotations, ensure_ascii=False)}
+    ]
+    record = {"messages": messages}
+    if include_metadata:
+        record.update(source=sample.source, quality=sample.quality,
+                      metadata={**sample.metadata, "doc_id": sample.doc_id, "doc_type": sample.doc_type})
+    return record
+
+
+def convert_sample(sample: SampleRecord, config: Dict) -> Dict:
+    """Convert one sample to a per-sample export format (everything but RLHF)"""
+    export_format = config["export_format"]
+    if export_format == "sft":
+        return convert_to_sft_format(sample, config["instruction_template"], config["simplify_annotations"])
+    if export_format == "rlaif":
+        return convert_to_rlaif_format(sample, config["score_field"])
+    if export_format == "qwen3":
+        return convert_to_qwen3_format(sample, config["system_prompt"], config["user_template"],
+                                       config["simplify_annotations"], config["include_metadata"])
+    # Default format (keep the record fields)
+    return sample.as_dict()
+
+
+@metrics.instrumented("format_conversion")
+def convert_samples(samples: List[SampleRecord], config: Dict) -> List[Dict]:
+    """Convert one split to the configured export format"""
+    if config["export_format"] == "rlhf":
+        # RLHF requires comparisons
+        return convert_to_rlhf_format(samples, config["comparison_method"], config["min_quality_diff"])
+    return [convert_sample(s, config) for s in samples]
+
+
+def _convert_slice(refs: List[Dict], config: Dict) -> Tuple[List[str], List[str]]:
+    """Worker task: decode a slice of references and return its JSONL lines and load warnings"""
+    warnings: List[str] = []
+    lines = [json.dumps(convert_sample(s, config), ensure_ascii=False) + '\n' for s in load_refs(refs, warnings)]
+    return lines, warnings
+
+
+def _slice_results(slices: Iterator[List[Dict]], config: Dict,
+                   workers: int) -> Iterator[Tuple[List[str], List[str]]]:
+    """``_convert_slice`` results in order, from a pool with at most two slices per worker in flight"""
+    pool = SpawnPool(workers)
+    pending: deque = deque()
+    try:
+        for refs_slice in slices:
+            pending.append(pool.submit(_convert_slice, refs_slice, config))
+            while len(pending) >= 2 * workers or (pending and pending[0].done()):
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        # Also reached when the consumer stops early (cancelled export)
+        for future in pending:
+            future.cancel()
+        pool.shutdown(wait=True)
+
+
+def iter_converted_lines(refs: List[Dict], config: Dict, workers: int = 1, slice_size: int = 500,
+                         warnings: Optional[List[str]] = None) -> Iterator[str]:
+    """JSONL lines of a per-sample format, in reference order, as they are converted.
+
+    With ``workers > 1`` (capped at the CPU count) slices of ``slice_size``
+    references are decoded and converted in a process pool, so memory holds
+    a few slices rather than the whole split. RLHF pairs samples across a
+    document and goes through ``convert_samples`` instead.
+    """
+    slices = (refs[i:i + slice_size] for i in range(0, len(refs), slice_size))
+    workers = min(workers, os.cpu_count() or 1)
+    if workers > 1 and len(refs) > slice_size:
+        results = _slice_results(slices, config, workers)
+    else:
+        results = (_convert_slice(refs_slice, config) for refs_slice in slices)
+    for lines, slice_warnings in results:
+        if warnings is not None:
+            warnings.extend(slice_warnings)
+        metrics.ITEMS.inc(len(lines), operation="format_conversion")
+        yield from lines
+
+
+class HashingWriter:
+    """Text file writer that tracks size, line count and sha256 of what it writes"""
+
+    def __init__(self, path: str):
+        self.f = open(path, 'wb')
+        self.sha256 = hashlib.sha256()
+        self.bytes = 0
+        self.lines = 0
+
+    def write(self, text: str) -> None:
+        data = text.encode('utf-8')
+        self.f.write(data)
+        self.sha256.update(data)
+        self.bytes += len(data)
+        self.lines += data.count(b'\n')
+
+    def close(self) -> Dict:
+        self.f.close()
+        return {"bytes": self.bytes, "lines": self.lines, "sha256": self.sha256.hexdigest()}
+
+    def __enter__(self) -> "HashingWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.f.close()
+
+
+@metrics.instrumented("dataset_write")
+def save_lines(lines: Iterable[str], directory: str, split: str, shard_size: Optional[int] = None) -> Dict[str, Dict]:
+    """Stream JSONL lines to ``<split>.jsonl``, or to ``<split>-NNNNN.jsonl`` files of at most
+    ``shard_size`` lines each; returns the manifest entry of every file written"""
+    files: Dict[str, Dict] = {}
+    name = f"{split}.jsonl" if not shard_size else f"{split}-{0:05d}.jsonl"
+    writer = HashingWriter(os.path.join(directory, name))
+    try:
+        for line in lines:
+            if shard_size and writer.lines >= shard_size:
+                files[name] = writer.close()
+                name = f"{split}-{len(files):05d}.jsonl"
+                writer = HashingWriter(os.path.join(directory, name))
+            writer.write(line)
+        files[name] = writer.close()
+    finally:
+        writer.f.close()
+    return files
+
+
+def split_files(export_dir: str, split: str) -> List[str]:
+    """File names holding one split of an export: ``<split>.jsonl`` or its shards in order"""
+    if os.path.exists(os.path.join(export_dir, f"{split}.jsonl")):
+        return [f"{split}.jsonl"]
+    if not os.path.isdir(export_dir):
+        return []
+    return sorted(f for f in os.listdir(export_dir) if SHARD_FILE.fullmatch(f) and f.startswith(f"{split}-"))
+
+
+def save_text(text: str, path: str) -> Dict:
+    with HashingWriter(path) as writer:
+        writer.write(text)
+        return writer.close()
+
+
+def build_manifest(export_name: str, files: Dict[str, Dict]) -> Dict:
+    return {
+        "export_name": export_name,
+        "created": datetime.now().isoformat(),
+        "algorithm": "sha256",
+        "files": files
+    }
+
+
+def build_metadata(export_name: str, config: Dict, n_samples: int, counts: Dict[str, int],
+                   stats: Dict[str, int], strata: Optional[Dict[str, Dict[str, int]]] = None,
+                   files: Optional[Dict[str, List[str]]] = None) -> Dict:
+    export_format = config["export_format"]
+    # Unsharded splits keep their single file name as a string
+    files = {split: names[0] if len(names) == 1 and not config.get("shard_size") else names
+             for split, names in files.items()} if files else {}
+    return {
+        "export_name": export_name,
+        "format": export_format,
+        "created": datetime.now().isoformat(),
+        "statistics": {
+            "total_samples": n_samples,
+            "train_samples": counts["train"],
+            "validation_samples": counts["validation"],
+            "test_samples": counts["test"],
+            "validated_samples": stats["Validated Chunks"],
+            "synthetic_samples": stats["Synthetic Samples"]
+        },
+        "configuration": {
+            "include_synthetic": config["include_synthetic"],
+            "min_quality": config["min_quality"],
+            "split_train": config["split_train"],
+            "split_val": config["split_val"],
+            "split_test": config["split_test"],
+            "batch_size": config["batch_size"],
+            "shard_size": config.get("shard_size"),
+            "stratify": config.get("stratify", False),
+            "max_per_type": config.get("max_per_type"),
+            **({"instances": config["instances"]} if config.get("instances") else {}),
+            "format_settings": {
+                "export_format": export_format,
+                **({"max_length": config["max_length"]} if export_format == "sft" else {}),
+                **({"score_field": config["score_field"]} if export_format == "rlaif" else {}),
+                **({"comparison_method": config["comparison_method"]} if export_format == "rlhf" else {}),
+                **({"system_prompt": config["system_prompt"], "user_template": config["user_template"]}
+                   if export_format == "qwen3" else {})
+            }
+        },
+        "strata": strata or {},
+        "files": {
+            "train": files.get("train", "train.jsonl"),
+            "validation": files.get("validation", "validation.jsonl"),
+            "test": files.get("test", "test.jsonl")
+        }
+    }
+
+
+def build_readme(export_name: str, config: Dict, format_label: str, n_samples: int,
+                 counts: Dict[str, int], stats: Dict[str, int],
+                 files: Optional[Dict[str, List[str]]] = None) -> str:
+    export_format = config["export_format"]
+    min_quality = config["min_quality"]
+    files = files or {}
+
+    def contents(split: str) -> str:
+        names = files.get(split) or [f"{split}.jsonl"]
+        if len(names) == 1 and not config.get("shard_size"):
+            return f"`{names[0]}`"
+        return f"`{split}-*.jsonl` ({len(names)} files of up to {config['shard_size']} lines)"
+
+    return f"""# Training Data Export: {export_name}
+
+## Summary
+- **Format**: {export_format.upper()} ({format_label})
+- **Created**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+- **Total Samples**: {n_samples}
+- **Train/Val/Test Split**: {counts['train']}/{counts['validation']}/{counts['test']}
+
+## Contents
+1. {contents('train')} - Training dataset ({counts['train']} samples)
+2. {contents('validation')} - Validation dataset ({counts['validation']} samples)
+3. {contents('test')} - Test dataset ({counts['test']} samples)
+4. `metadata.json` - Complete metadata and configuration
+
+## Statistics
+- Validated documents: {stats['Validated Documents']}
+- Validated chunks: {stats['Validated Chunks']}
+- Synthetic samples: {stats['Synthetic Samples']}
+- Minimum quality score: {min_quality}
+
+## Usage
+This dataset is ready for training with:
+- Transformers library for SFT/RLAIF
+- TRL library for RLHF
+- Qwen3 chat templates (`messages` format)
+- Custom training scripts
+
+## Notes
+- Data is shuffled before splitting{' (stratified by document type and source)' if config.get('stratify') else ''}
+{f"- At most {config['max_per_type']} samples per document type{chr(10)}" if config.get('max_per_type') else ''}- Quality filtering applied: ≥ {min_quality}
+- Synthetic data included: {config['include_synthetic']}
+"""
+
+
+@metrics.instrumented("zip_creation")
+def create_zip(export_dir: str, zip_path: str) -> str:
+    shards = sorted(f for f in os.listdir(export_dir) if SHARD_FILE.fullmatch(f))
+    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        for file in shards + EXPORT_FILES:
+            file_path = os.path.join(export_dir, file)
+            if os.path.exists(file_path):
+                zipf.write(file_path, file)
+    return zip_path
+
+
+def list_exports(train_dir: str) -> List[Dict]:
+    """Finished exports under ``train/``, newest first"""
+    export_dirs = []
+    if not os.path.exists(train_dir):
+        return export_dirs
+    for item in os.listdir(train_dir):
+        item_path = os.path.join(train_dir, item)
+        if item.startswith('.') or not os.path.isdir(item_path):
+            continue
+        metadata_path = os.path.join(item_path, "metadata.json")
+        if os.path.exists(metadata_path):
+            try:
+                with open(metadata_path, 'r') as f:
+                    export_dirs.append({
+                        'name': item,
+                        'path': item_path,
+                        'metadata': json.load(f)
+                    })
+            except Exception:
+                pass
+    export_dirs.sort(key=lambda x: x['metadata'].get('created', ''), reverse=True)
+    return export_dirs
+
+
+# Integrity verification
+def verify_export(export_dir: str) -> Dict:
+    """Check an export against its manifest and parse every JSONL line.
+
+    Status is ``ok``, ``corrupted``, or ``unverified`` for exports written
+    before manifests existed (their JSONL files are still parsed).
+    """
+    problems: List[str] = []
+    manifest = None
+    manifest_path = os.path.join(export_dir, MANIFEST_FILE)
+    if os.path.exists(manifest_path):
+        try:
+            with open(manifest_path, 'r') as f:
+                manifest = json.load(f)
+        except ValueError as e:
+            problems.append(f"{MANIFEST_FILE}: unreadable ({e})")
+    expected = (manifest or {}).get("files", {})
+    names = list(expected) or [f for f in EXPORT_FILES if f.endswith('.jsonl')]
+    lines_checked = 0
+    for name in names:
+        path = os.path.join(export_dir, name)
+        if not os.path.exists(path):
+            problems.append(f"{name}: missing")
+            continue
+        digest = hashlib.sha256()
+        size = lines = 0
+        bad_lines: List[int] = []
+        last = b''
+        with open(path, 'rb') as f:
+            for line in f:
+                digest.update(line)
+                size += len(line)
+                lines += line.endswith(b'\n')
+                last = line
+                if name.endswith('.jsonl') and line.strip():
+                    try:
+                        json.loads(line)
+                    except ValueError:
+                        bad_lines.append(lines + (not line.endswith(b'\n')))
+        if name.endswith('.jsonl'):
+            lines_checked += lines
+            if last and not last.endswith(b'\n'):
+                problems.append(f"{name}: last line has no newline (truncated write?)")
+            if bad_lines:
+                shown = ", ".join(str(n) for n in bad_lines[:5])
+                problems.append(f"{name}: {len(bad_lines)} invalid JSON line(s) (line {shown}"
+                                f"{', ...' if len(bad_lines) > 5 else ''})")
+        entry = expected.get(name)
+        if entry:
+            if size != entry["bytes"]:
+                problems.append(f"{name}: {size:,} bytes, manifest says {entry['bytes']:,}")
+            if lines != entry["lines"]:
+                problems.append(f"{name}: {lines:,} lines, manifest says {entry['lines']:,}")
+            if digest.hexdigest() != entry["sha256"]:
+                problems.append(f"{name}: sha256 mismatch")
+    if problems:
+        status = "corrupted"
+    else:
+        status = "ok" if manifest else "unverified"
+    return {"name": os.path.basename(export_dir), "status": status, "problems": problems,
+            "files": len(names), "lines": lines_checked}
+
+
+@metrics.instrumented("export_verify")
+def verify_exports(export_dirs: List[str], max_workers: int = 4) -> List[Dict]:
+    """Verify several exports concurrently in worker processes; results keep the input order.
+
+    The workers come from a ``SpawnPool``, so they do not re-run the app
+    script. If a worker dies anyway, the exports are verified in-process
+    rather than failing the whole check.
+    """
+    if len(export_dirs) <= 1:
+        return [verify_export(d) for d in export_dirs]
+    try:
+        with SpawnPool(min(max_workers, len(export_dirs))) as pool:
+            return list(pool.map(verify_export, export_dirs))
+    except BrokenProcessPool:
+        return [verify_export(d) for d in export_dirs]
@@ -0,0 +1,146 @@
+# exaPipelineDashboard/utils/export_diff.py
+"""Sample-level diff between two training exports, in bounded memory.
+
+Each line of ``train/validation/test.jsonl`` (or their shards) is hashed as it is read and the
+hash is appended, with its split, doc_type and source, to one of N bucket
+files chosen by the hash itself. Both exports use the same bucketing, so a
+sample can only ever match within the same bucket pair; buckets are then
+compared one at a time. Memory is bounded by the largest bucket, not by the
+size of the exports.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from collections import Counter, defaultdict
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from utils import export, metrics
+
+SPLITS = ("train", "validation", "test")
+DEFAULT_BUCKETS = 128
+MAX_EXAMPLES = 20
+
+
+def sample_key(line: str) -> Tuple[str, str, str]:
+    """``(hash, doc_type, source)`` of one JSONL line; key order does not affect the hash."""
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return hashlib.blake2b(line.strip().encode(), digest_size=16).hexdigest(), "Unknown", "unknown"
+    canonical = json.dumps(record, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    digest = hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
+    if not isinstance(record, dict):
+        return digest, "Unknown", "unknown"
+    metadata = record.get("metadata") if isinstance(record.get("metadata"), dict) else {}
+    return digest, str(metadata.get("doc_type", "Unknown")), str(record.get("source", "unknown"))
+
+
+def _partition(export_dir: str, out_dir: str, buckets: int,
+               progress: Optional[Callable[[int], None]] = None) -> int:
+    """Stream every split into bucket files ``out_dir/NNN``; returns the number of lines."""
+    handles = [open(os.path.join(out_dir, f"{i:03d}"), 'w', encoding='utf-8') for i in range(buckets)]
+    lines = 0
+    try:
+        for split in SPLITS:
+            for file in export.split_files(export_dir, split):
+                with open(os.path.join(export_dir, file), 'r', encoding='utf-8') as f:
+                    for line_no, line in enumerate(f, 1):
+                        if not line.strip():
+                            continue
+                        digest, doc_type, source = sample_key(line)
+                        bucket = int(digest[:8], 16) % buckets
+                        handles[bucket].write(f"{digest}\t{split}\t{file}:{line_no}\t{doc_type}\t{source}\n")
+                        lines += 1
+                        if progress is not None and lines % 10000 == 0:
+                            progress(lines)
+    finally:
+        for handle in handles:
+            handle.close()
+    return lines
+
+
+def _read_bucket(path: str) -> Dict[str, List[Tuple[str, str, str, str]]]:
+    entries: Dict[str, List[Tuple[str, str, str, str]]] = defaultdict(list)
+    with open(path, 'r', encoding='utf-8') as f:
+        for row in f:
+            digest, split, location, doc_type, source = row.rstrip('\n').split('\t')
+            entries[digest].append((split, location, doc_type, source))
+    return entries
+
+
+def _match(old: List[Tuple], new: List[Tuple]) -> Iterator[Tuple[str, Optional[Tuple], Optional[Tuple]]]:
+    """Pair up copies of one sample: same split first, then moves, then adds/removes."""
+    old, new = list(old), list(new)
+    for entry in list(new):
+        same = next((o for o in old if o[0] == entry[0]), None)
+        if same is not None:
+            old.remove(same)
+            new.remove(entry)
+            yield "unchanged", same, entry
+    while old and new:
+        yield "moved", old.pop(), new.pop()
+    for entry in old:
+        yield "removed", entry, None
+    for entry in new:
+        yield "added", None, entry
+
+
+@metrics.instrumented("export_diff")
+def diff_exports(old_dir: str, new_dir: str, work_dir: str, buckets: int = DEFAULT_BUCKETS,
+                 progress: Optional[Callable[[str], None]] = None) -> Dict:
+    """Compare two export directories sample by sample.
+
+    Returns totals, per ``(doc_type, source)`` counts, split-to-split moves
+    and a few example lines (file and line number) per change.
+    """
+    os.makedirs(work_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=".tmp_diff_", dir=work_dir)
+    try:
+        sides = {}
+        for side, export_dir in (("old", old_dir), ("new", new_dir)):
+            os.makedirs(os.path.join(tmp_dir, side))
+            on_lines = (lambda n, side=side: progress(f"Hashing {side} export: {n:,} lines")) if progress else None
+            sides[side] = _partition(export_dir, os.path.join(tmp_dir, side), buckets, on_lines)
+        metrics.ITEMS.inc(sides["old"] + sides["new"], operation="export_diff")
+
+        totals = Counter()
+        groups: Dict[Tuple[str, str], Counter] = defaultdict(Counter)
+        moves = Counter()
+        examples: Dict[str, List[Dict]] = {"added": [], "removed": [], "moved": []}
+        for i in range(buckets):
+            if progress is not None and i % 16 == 0:
+                progress(f"Comparing bucket {i + 1}/{buckets}")
+            old = _read_bucket(os.path.join(tmp_dir, "old", f"{i:03d}"))
+            new = _read_bucket(os.path.join(tmp_dir, "new", f"{i:03d}"))
+            for digest in old.keys() | new.keys():
+                for change, before, after in _match(old.get(digest, []), new.get(digest, [])):
+                    entry = after or before
+                    totals[change] += 1
+                    groups[(entry[2], entry[3])][change] += 1
+                    if change == "moved":
+                        moves[(before[0], after[0])] += 1
+                    if change != "unchanged" and len(examples[change]) < MAX_EXAMPLES:
+                        examples[change].append({
+                            "Doc Type": entry[2],
+                            "Source": entry[3],
+                            "Before": before[1] if before else "",
+                            "After": after[1] if after else ""
+                        })
+            del old, new
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    return {
+        "old_lines": sides["old"],
+        "new_lines": sides["new"],
+        "totals": {change: totals[change] for change in ("added", "removed", "moved", "unchanged")},
+        "groups": sorted((
+            {"Doc Type": doc_type, "Source": source, "Added": c["added"], "Removed": c["removed"],
+             "Moved": c["moved"], "Unchanged": c["unchanged"]}
+            for (doc_type, source), c in groups.items()
+        ), key=lambda row: row["Added"] + row["Removed"] + row["Moved"], reverse=True),
+        "moves": [{"From": src, "To": dst, "Samples": n} for (src, dst), n in moves.most_common()],
+        "examples": examples
+    }
@@ -0,0 +1,259 @@
+# exaPipelineDashboard/utils/export_jobs.py
+"""Training exports as background jobs in a worker process pool.
+
+Each job has a status file under ``<state_dir>/exports/``. The worker writes
+into a hidden ``train/.tmp_<name>`` directory and renames it into place only
+once every file is complete and the zip is in place, so ``train/`` never
+holds a half-written export or one without its zip. Cancelling drops a flag file the worker polls.
+"""
+import functools
+import json
+import itertools
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from utils import export
+from utils.state import atomic_write_json, read_json, state_path
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINAL_STATES = (COMPLETED, FAILED, CANCELLED)
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+def _job_path(state_dir: str, job_id: str) -> str:
+    return state_path(state_dir, "exports", f"{job_id}.json")
+
+
+def _cancel_path(state_dir: str, job_id: str) -> str:
+    return state_path(state_dir, "exports", f"{job_id}.cancel")
+
+
+# ----------------------------------------------------------------------
+# Worker side
+# ----------------------------------------------------------------------
+class _JobReporter:
+    """Writes progress to the job file, at most a few times per second."""
+
+    def __init__(self, state_dir: str, job: Dict):
+        self.state_dir = state_dir
+        self.job = job
+        self.last_write = 0.0
+
+    def update(self, force: bool = False, **fields) -> None:
+        self.job.update(fields, updated=datetime.now().isoformat())
+        now = time.monotonic()
+        if force or now - self.last_write >= 0.5:
+            self.last_write = now
+            atomic_write_json(_job_path(self.state_dir, self.job["job_id"]), self.job)
+
+    def check_cancelled(self) -> None:
+        if os.path.exists(_cancel_path(self.state_dir, self.job["job_id"])):
+            raise ExportCancelled()
+
+    def track(self, lines: Iterable[str], start: int, span: int, total: int) -> Iterator[str]:
+        """Pass lines through, moving progress from ``start`` towards ``start + span`` and
+        checking for cancellation every 1000 lines"""
+        for n, line in enumerate(lines, 1):
+            if n % 1000 == 0:
+                self.check_cancelled()
+                self.update(progress=start + int(span * min(n / max(total, 1), 1)))
+            yield line
+
+
+def run_export_job(state_dir: str, job: Dict) -> Dict:
+    """Worker entry point: load, split, convert, write, zip, then publish atomically."""
+    reporter = _JobReporter(state_dir, job)
+    config = job["config"]
+    paths = job["paths"]
+    export_name = job["export_name"]
+    tmp_dir = os.path.join(paths["train_dir"], f".tmp_{export_name}")
+    tmp_zip = os.path.join(paths["train_dir"], f".tmp_{export_name}.zip")
+    warnings: List[str] = []
+
+    try:
+        reporter.update(force=True, state=RUNNING, started=datetime.now().isoformat(),
+                        phase="Loading samples", progress=0)
+
+        # Federated exports list one source per pipeline instance
+        sources = paths.get("sources") or [{
+            "instance": None, "validated_dir": paths["validated_dir"],
+            "synthetic_dir": paths["synthetic_dir"], "classified_dir": paths.get("classified_dir")
+        }]
+
+        def on_load(index: int, done: int, total: int) -> None:
+            if done % 200 == 0 or done == total:
+                reporter.check_cancelled()
+                reporter.update(progress=int(40 * (index + done / max(total, 1)) / len(sources)))
+
+        refs = itertools.chain.from_iterable(
+            export.iter_sample_refs(source["validated_dir"], source["synthetic_dir"],
+                                    config["min_quality"], config["include_synthetic"],
+                                    classified_dir=source.get("classified_dir"), warnings=warnings,
+                                    progress=functools.partial(on_load, index), instance=source["instance"])
+            for index, source in enumerate(sources)
+        )
+        *ref_splits, strata = export.stratified_split(refs, config["split_train"], config["split_val"],
+                                                      config.get("stratify", False), config.get("max_per_type"))
+        n_samples = sum(len(split) for split in ref_splits)
+        if not n_samples:
+            raise ValueError("No samples found matching criteria")
+
+        reporter.update(force=True, phase=f"Converting {n_samples} samples to {config['export_format'].upper()}",
+                        progress=45, warnings=warnings[-20:])
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        counts = {}
+        split_files = {}
+        manifest_files = {}
+        # Per-sample formats are converted in slices across worker processes and
+        # streamed to disk; RLHF pairs samples within a document, so it holds one
+        # split's samples at a time. Sizes, line counts and hashes for the
+        # manifest are taken while writing.
+        for i, (name, split) in enumerate(zip(("train", "validation", "test"), ref_splits)):
+            reporter.check_cancelled()
+            if config["export_format"] == "rlhf":
+                converted = export.convert_samples(export.load_refs(split, warnings), config)
+                lines = (json.dumps(item, ensure_ascii=False) + '\n' for item in converted)
+            else:
+                lines = export.iter_converted_lines(split, config, job.get("convert_workers", 1), warnings=warnings)
+            files = export.save_lines(reporter.track(lines, 45 + 15 * i, 15, len(split)),
+                                      tmp_dir, name, config.get("shard_size"))
+            manifest_files.update(files)
+            split_files[name] = list(files)
+            counts[name] = sum(entry["lines"] for entry in files.values())
+            ref_splits[i] = converted = lines = None
+            reporter.update(progress=45 + 15 * (i + 1))
+
+        metadata = export.build_metadata(export_name, config, n_samples, counts, job["stats"], strata, split_files)
+        manifest_files["metadata.json"] = export.save_text(json.dumps(metadata, indent=2, ensure_ascii=False),
+                                                           os.path.join(tmp_dir, "metadata.json"))
+        manifest_files["README.md"] = export.save_text(
+            export.build_readme(export_name, config, job["format_label"], n_samples, counts, job["stats"],
+                                split_files),
+            os.path.join(tmp_dir, "README.md")
+        )
+        atomic_write_json(os.path.join(tmp_dir, export.MANIFEST_FILE),
+                          export.build_manifest(export_name, manifest_files))
+
+        reporter.check_cancelled()
+        reporter.update(force=True, phase="Creating ZIP archive", progress=90)
+        export.create_zip(tmp_dir, tmp_zip)
+
+        reporter.check_cancelled()
+        export_dir = os.path.join(paths["train_dir"], export_name)
+        # The zip goes first: renaming the directory is what publishes the export
+        os.replace(tmp_zip, os.path.join(paths["train_dir"], f"{export_name}.zip"))
+        os.rename(tmp_dir, export_dir)
+
+        reporter.update(force=True, state=COMPLETED, phase="Done", progress=100,
+                        finished=datetime.now().isoformat(), export_dir=export_dir,
+                        metadata=metadata, warnings=warnings[-20:])
+    except ExportCancelled:
+        reporter.update(force=True, state=CANCELLED, phase="Cancelled", finished=datetime.now().isoformat())
+    except Exception as e:
+        reporter.update(force=True, state=FAILED, phase="Failed", error=str(e),
+                        finished=datetime.now().isoformat(), warnings=warnings[-20:])
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if os.path.exists(tmp_zip):
+            os.remove(tmp_zip)
+    return reporter.job
+
+
+# ----------------------------------------------------------------------
+# Dashboard side
+# ----------------------------------------------------------------------
+_EXECUTOR: Optional[export.SpawnPool] = None
+_EXECUTOR_LOCK = threading.Lock()
+_FUTURES: Dict[str, Future] = {}
+
+
+def _executor(max_workers: int) -> export.SpawnPool:
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = export.SpawnPool(max_workers)
+        return _EXECUTOR
+
+
+def submit_export(state_dir: str, paths: Dict[str, str], config: Dict, stats: Dict[str, int],
+                  format_label: str, max_workers: int = 2, convert_workers: int = 1) -> Dict:
+    """Persist a new job and hand it to the worker pool.
+
+    ``convert_workers`` processes are started by the job itself to convert
+    per-sample formats. Up to ``max_workers`` jobs run at once, so it is
+    capped to keep ``max_workers * convert_workers`` within the CPU count.
+    """
+    convert_workers = max(1, min(convert_workers, (os.cpu_count() or 1) // max_workers))
+    job_id = uuid.uuid4().hex[:10]
+    job = {
+        "job_id": job_id,
+        "export_name": f"{config['export_format']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{job_id[:4]}",
+        "state": QUEUED,
+        "phase": "Waiting for a worker",
+        "progress": 0,
+        "created": datetime.now().isoformat(),
+        "updated": datetime.now().isoformat(),
+        "config": config,
+        "paths": paths,
+        "stats": stats,
+        "format_label": format_label,
+        "convert_workers": convert_workers
+    }
+    atomic_write_json(_job_path(state_dir, job_id), job)
+    _FUTURES[job_id] = _executor(max_workers).submit(run_export_job, state_dir, job)
+    return job
+
+
+def cancel_export(state_dir: str, job_id: str) -> None:
+    future = _FUTURES.get(job_id)
+    if future is not None and future.cancel():
+        job = read_json(_job_path(state_dir, job_id), {})
+        job.update(state=CANCELLED, phase="Cancelled", finished=datetime.now().isoformat())
+        atomic_write_json(_job_path(state_dir, job_id), job)
+        return
+    with open(_cancel_path(state_dir, job_id), 'w') as f:
+        f.write(datetime.now().isoformat())
+
+
+def list_export_jobs(state_dir: str) -> List[Dict]:
+    """All jobs, newest first. Jobs left running by a dead process are marked interrupted."""
+    jobs_dir = os.path.join(state_dir, "exports")
+    if not os.path.exists(jobs_dir):
+        return []
+    jobs = []
+    for file in os.listdir(jobs_dir):
+        if not file.endswith(".json") or file.startswith(".tmp_"):
+            continue
+        job = read_json(os.path.join(jobs_dir, file))
+        if not job:
+            continue
+        if job.get("state") not in FINAL_STATES and job["job_id"] not in _FUTURES:
+            job["state"] = "interrupted"
+        jobs.append(job)
+    jobs.sort(key=lambda j: j.get("created", ""), reverse=True)
+    return jobs
+
+
+def has_active_jobs() -> bool:
+    return any(not future.done() for future in _FUTURES.values())
+
+
+def remove_export_job(state_dir: str, job_id: str) -> None:
+    for path in (_job_path(state_dir, job_id), _cancel_path(state_dir, job_id)):
+        if os.path.exists(path):
+            os.remove(path)
+    _FUTURES.pop(job_id, None)
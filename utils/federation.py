@@ -0,0 +1,79 @@
+# exaPipelineDashboard/utils/federation.py
+"""Several exaPipeline backends, each with its own data directory, seen as one fleet.
+
+Instances come from ``PIPELINE_INSTANCES`` (a JSON list of
+``{"name", "api_url", "data_dir"}``). Without it the single
+``PIPELINE_API_URL`` / ``PIPELINE_DATA_DIR`` pair is the only instance, so
+a one-backend deployment behaves exactly as before.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, TypeVar
+
+import requests
+
+from utils import cache, metrics
+
+T = TypeVar("T")
+
+
+def instances(settings) -> List[Dict[str, str]]:
+    """Configured instances, falling back to the session's single API URL and data dir."""
+    if settings.PIPELINE_INSTANCES:
+        return [{"name": i["name"], "api_url": i.get("api_url", settings.PIPELINE_API_URL),
+                 "data_dir": i["data_dir"]} for i in settings.PIPELINE_INSTANCES]
+    return [{"name": "default", "api_url": settings.PIPELINE_API_URL, "data_dir": settings.PIPELINE_DATA_DIR}]
+
+
+def instance_state_dir(state_dir: str, instance: Dict[str, str], fleet: List[Dict[str, str]]) -> str:
+    """Per-instance dashboard state; a lone instance keeps using the top-level directory."""
+    if len(fleet) == 1:
+        return state_dir
+    return os.path.join(state_dir, "instances", instance["name"])
+
+
+def map_instances(fleet: List[Dict[str, str]], func: Callable[[Dict[str, str]], T],
+                  max_workers: int = 8) -> List[T]:
+    """Run ``func`` for every instance concurrently; results keep the fleet order."""
+    if len(fleet) == 1:
+        return [func(fleet[0])]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(fleet))) as pool:
+        return list(pool.map(func, fleet))
+
+
+def stage_counts(instance: Dict[str, str], stages: List[str]) -> Dict[str, int]:
+    """Documents per stage (export files for ``train``) in one instance's data dir."""
+    counts = {}
+    for stage in stages:
+        stage_dir = os.path.join(instance["data_dir"], stage)
+        if stage == "train":
+            counts[stage] = len(cache.files(stage_dir, '.jsonl'))
+        else:
+            counts[stage] = len(cache.subdirs(stage_dir))
+    return counts
+
+
+def document_ids(instance: Dict[str, str], stages: List[str]) -> List[str]:
+    doc_ids = set()
+    for stage in stages:
+        doc_ids.update(cache.subdirs(os.path.join(instance["data_dir"], stage)))
+    return sorted(doc_ids)
+
+
+def check_health(instance: Dict[str, str], timeout: float = 5) -> Dict:
+    try:
+        response = metrics.api_call(requests, "get", f"{instance['api_url']}/health", "health", timeout=timeout)
+        return {"name": instance["name"], "ok": response.status_code == 200,
+                "detail": f"HTTP {response.status_code}"}
+    except Exception as e:
+        return {"name": instance["name"], "ok": False, "detail": str(e)}
+
+
+def sample_sources(fleet: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """Export source directories for every instance, as stored in an export job's ``paths``."""
+    return [{
+        "instance": instance["name"],
+        "validated_dir": os.path.join(instance["data_dir"], "validated"),
+        "synthetic_dir": os.path.join(instance["data_dir"], "synthetic"),
+        "classified_dir": os.path.join(instance["data_dir"], "classified")
+    } for instance in fleet]
@@ -0,0 +1,156 @@
+# exaPipelineDashboard/utils/log_tail.py
+"""Tail, follow and page through large log files without reading them whole.
+
+``LogReader`` keeps an index of line-start byte offsets that only grows on
+demand: backwards from the end as the user pages to older lines, forwards
+as new lines are appended. Showing the last N lines of a multi-GB log reads
+a few blocks from its end.
+"""
+import json
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+LEVELS = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
+_LEVEL_ALIASES = {"WARN": "WARNING", "FATAL": "CRITICAL"}
+_LEVEL_RE = re.compile(r'\b(DEBUG|INFO|WARNING|WARN|ERROR|CRITICAL|FATAL)\b')
+
+
+def line_level(line: str) -> Optional[str]:
+    """Level of a log record line, or None for continuation lines such as tracebacks."""
+    if line.startswith('{'):
+        try:
+            record = json.loads(line)
+            level = str(record.get('levelname') or record.get('level') or '').upper()
+            level = _LEVEL_ALIASES.get(level, level)
+            if level in LEVELS:
+                return level
+        except ValueError:
+            pass
+    match = _LEVEL_RE.search(line[:200])
+    if match:
+        return _LEVEL_ALIASES.get(match.group(1), match.group(1))
+    return None
+
+
+class LogReader:
+    BLOCK_SIZE = 64 * 1024
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self._reset()
+
+    def _reset(self, size: int = 0, inode: int = 0) -> None:
+        self.inode = inode
+        self.end = size          # bytes of the file covered by the index
+        self.scanned_from = size  # lowest byte offset scanned so far
+        self.line_starts: List[int] = []
+
+    def refresh(self) -> None:
+        """Pick up appended data; start over if the file was rotated or truncated."""
+        stat = os.stat(self.path)
+        if stat.st_ino != self.inode or stat.st_size < self.end:
+            self._reset(stat.st_size, stat.st_ino)
+            return
+        if stat.st_size == self.end:
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(self.end)
+            data = f.read(stat.st_size - self.end)
+        if not self.line_starts and self.scanned_from == self.end:
+            # Nothing indexed yet; the new data is reached by scanning backwards
+            self.end = self.scanned_from = stat.st_size
+            return
+        starts = [self.end + m.end() for m in re.finditer(b'\n', data)]
+        self.line_starts.extend(s for s in starts if s < stat.st_size)
+        if self.end > 0 and self.end not in self.line_starts and self._ends_with_newline(self.end):
+            self.line_starts.append(self.end)
+            self.line_starts.sort()
+        self.end = stat.st_size
+
+    def _ends_with_newline(self, offset: int) -> bool:
+        with open(self.path, 'rb') as f:
+            f.seek(offset - 1)
+            return f.read(1) == b'\n'
+
+    def _extend_back(self) -> bool:
+        """Index one more block towards the start of the file. False once at offset 0."""
+        if self.scanned_from == 0:
+            return False
+        start = max(0, self.scanned_from - self.BLOCK_SIZE)
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            data = f.read(self.scanned_from - start)
+        first_known = self.line_starts[0] if self.line_starts else self.end
+        found = [start + m.end() for m in re.finditer(b'\n', data)]
+        found = [s for s in found if s < first_known and s < self.end]
+        if start == 0:
+            found.insert(0, 0)
+        self.line_starts = found + self.line_starts
+        self.scanned_from = start
+        return True
+
+    def _read_line(self, f, index: int) -> str:
+        start = self.line_starts[index]
+        stop = self.line_starts[index + 1] if index + 1 < len(self.line_starts) else self.end
+        f.seek(start)
+        return f.read(stop - start).decode('utf-8', errors='replace').rstrip('\r\n')
+
+    def tail(self, count: int = 50, min_level: str = "DEBUG",
+             before: Optional[int] = None) -> Tuple[List[str], Optional[int]]:
+        """Last ``count`` records at or above ``min_level`` that start before byte ``before``.
+
+        Returns the lines (oldest first) and the cursor to pass as ``before``
+        for the next older page, or None when the start of the file is reached.
+        """
+        threshold = LEVELS.index(min_level) if min_level in LEVELS else 0
+        records: List[List[str]] = []
+        pending: List[str] = []
+        with self.lock:
+            self.refresh()
+            limit = self.end if before is None else before
+            with open(self.path, 'rb') as f:
+                index = _last_index_before(self.line_starts, limit)
+                while len(records) < count and limit > 0:
+                    while index < 0 and self._extend_back():
+                        index = _last_index_before(self.line_starts, limit)
+                    if index < 0:
+                        break
+                    line = self._read_line(f, index)
+                    limit = self.line_starts[index]
+                    index -= 1
+                    level = line_level(line)
+                    if level is None and threshold > 0:
+                        # Continuation (e.g. traceback) — belongs to the next older record
+                        pending.insert(0, line)
+                        continue
+                    if level is None or LEVELS.index(level) >= threshold:
+                        records.insert(0, [line] + pending)
+                    pending = []
+        return [line for record in records for line in record], (limit if limit > 0 else None)
+
+
+def _last_index_before(starts: List[int], limit: int) -> int:
+    lo, hi = 0, len(starts)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if starts[mid] < limit:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo - 1
+
+
+_READERS: Dict[str, LogReader] = {}
+_READERS_LOCK = threading.Lock()
+
+
+def get_reader(path: str) -> LogReader:
+    """Process-wide reader per log file so its offset index is shared across reruns."""
+    path = os.path.abspath(path)
+    with _READERS_LOCK:
+        if path not in _READERS:
+            _READERS[path] = LogReader(path)
+        return _READERS[path]
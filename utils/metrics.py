@@ -0,0 +1,198 @@
+# exaPipelineDashboard/utils/metrics.py
+"""In-process timing histograms and counters for the dashboard's hot paths.
+
+Metrics are kept per process (export workers report to their own process
+and are not merged back). ``render_prometheus`` produces the Prometheus
+text exposition format; set ``METRICS_PORT`` to also serve it on
+``/metrics`` for an existing scraper.
+"""
+import bisect
+import contextlib
+import functools
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self.series: Dict[LabelKey, Dict] = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            series["counts"][bisect.bisect_left(self.buckets, value)] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def quantile(self, key: LabelKey, q: float) -> float:
+        """Estimate a quantile from bucket counts (linear interpolation inside the bucket)."""
+        series = self.series[key]
+        target = q * series["count"]
+        seen = 0
+        for i, count in enumerate(series["counts"]):
+            if seen + count >= target and count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (target - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for key, series in sorted(self.series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series["counts"]):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_format_labels(key, ('le', repr(bound)))} {cumulative}")
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', '+Inf'))} {series['count']}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {series['sum']}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {series['count']}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self.series: Dict[LabelKey, float] = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = _label_key(labels)
+        with self.lock:
+            self.series[key] = self.series.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for key, value in sorted(self.series.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+PAGE_RENDER = Histogram("dashboard_page_render_seconds", "Time to execute a dashboard page script")
+OPERATION = Histogram("dashboard_operation_seconds", "Time spent in instrumented dashboard operations")
+API_REQUEST = Histogram("dashboard_api_request_seconds", "Pipeline API request latency")
+OPERATION_ERRORS = Counter("dashboard_operation_errors_total", "Instrumented operations that raised")
+ITEMS = Counter("dashboard_items_processed_total", "Files or samples handled by instrumented operations")
+
+REGISTRY = [PAGE_RENDER, OPERATION, API_REQUEST, OPERATION_ERRORS, ITEMS]
+
+
+@contextlib.contextmanager
+def timed(operation: str, histogram: Histogram = OPERATION, **labels):
+    """Time a block: ``with metrics.timed("load_samples"): ...``"""
+    labels = {"operation": operation, **labels} if histogram is OPERATION else labels
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException as e:
+        # Streamlit's st.stop()/st.rerun() are control flow, not failures
+        if not type(e).__name__.endswith(("StopException", "RerunException")):
+            OPERATION_ERRORS.inc(operation=operation)
+        raise
+    finally:
+        histogram.observe(time.perf_counter() - started, **labels)
+
+
+def instrumented(operation: str):
+    """Decorator form of ``timed``."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(operation):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def api_call(session_or_module, method: str, url: str, endpoint: str, **kwargs):
+    """Issue a ``requests`` call and record its latency by endpoint and status."""
+    started = time.perf_counter()
+    status = "error"
+    try:
+        response = getattr(session_or_module, method)(url, **kwargs)
+        status = str(response.status_code)
+        return response
+    finally:
+        API_REQUEST.observe(time.perf_counter() - started, endpoint=endpoint, status=status)
+
+
+def render_prometheus() -> str:
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def summary() -> List[Dict]:
+    """Rows for the diagnostics table: count, mean and estimated p50/p95 per series."""
+    rows = []
+    for histogram in (PAGE_RENDER, OPERATION, API_REQUEST):
+        with histogram.lock:
+            for key, series in sorted(histogram.series.items()):
+                rows.append({
+                    "Metric": histogram.name,
+                    "Labels": ", ".join(f"{k}={v}" for k, v in key),
+                    "Count": series["count"],
+                    "Mean (ms)": round(1000 * series["sum"] / series["count"], 1),
+                    "p50 (ms)": round(1000 * histogram.quantile(key, 0.5), 1),
+                    "p95 (ms)": round(1000 * histogram.quantile(key, 0.95), 1)
+                })
+    return rows
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_SERVER: Optional[ThreadingHTTPServer] = None
+_SERVER_LOCK = threading.Lock()
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0") -> None:
+    """Serve ``/metrics`` from a daemon thread; safe to call on every rerun."""
+    global _SERVER
+    with _SERVER_LOCK:
+        if _SERVER is not None:
+            return
+        _SERVER = ThreadingHTTPServer((host, port), _MetricsHandler)
+        threading.Thread(target=_SERVER.serve_forever, name="metrics-server", daemon=True).start()
@@ -0,0 +1,44 @@
+# exaPipelineDashboard/utils/polling.py
+"""Timed reruns for pages that poll (auto-refresh, running jobs, log follow).
+
+A page asks for its next run with ``rerun_after(seconds)``. Under ``app.py``
+the page render is wrapped in ``deferred()`` and the wait happens in
+``run_pending()`` after the render has been timed, so the ``page_render``
+histogram measures rendering, not polling. A page run on its own sleeps
+and reruns straight away, as before.
+"""
+import time
+from contextlib import contextmanager
+
+import streamlit as st
+
+_DEFER_KEY = "_poll_deferred"
+_PENDING_KEY = "_poll_after"
+
+
+def rerun_after(seconds: float) -> None:
+    """Rerun the script in ``seconds``; returns at once while deferred."""
+    if st.session_state.get(_DEFER_KEY):
+        st.session_state[_PENDING_KEY] = seconds
+        return
+    time.sleep(seconds)
+    st.rerun()
+
+
+@contextmanager
+def deferred():
+    """Collect rerun requests made inside the block instead of sleeping on them."""
+    st.session_state.pop(_PENDING_KEY, None)
+    st.session_state[_DEFER_KEY] = True
+    try:
+        yield
+    finally:
+        st.session_state[_DEFER_KEY] = False
+
+
+def run_pending() -> None:
+    """Sleep for and perform the rerun requested inside ``deferred()``, if any."""
+    seconds = st.session_state.pop(_PENDING_KEY, None)
+    if seconds is not None:
+        time.sleep(seconds)
+        st.rerun()
@@ -0,0 +1,167 @@
+# exaPipelineDashboard/utils/profiler.py
+"""One-shot profiling of a single dashboard page run.
+
+An admin arms the profiler for a page; the next execution of that page is
+wrapped in either ``cProfile`` (deterministic) plus ``tracemalloc``, or a
+lightweight stack sampler. When nothing is armed the page runs untouched.
+"""
+import cProfile
+import io
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+DETERMINISTIC = "Deterministic (cProfile + allocations)"
+SAMPLING = "Sampling (low overhead)"
+MODES = [DETERMINISTIC, SAMPLING]
+
+TOP_N = 25
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Samples one thread's Python stack every ``interval`` seconds."""
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        self.thread.join()
+
+    def _run(self) -> None:
+        while not self.stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[tuple(reversed(stack))] += 1
+                self.samples += 1
+
+    def hotspots(self) -> List[Dict]:
+        own: Counter = Counter()
+        cumulative: Counter = Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for label in set(stack):
+                cumulative[label] += count
+        total = max(self.samples, 1)
+        return [{
+            "Function": label,
+            "Cumulative %": round(100 * count / total, 1),
+            "Own %": round(100 * own[label] / total, 1),
+            "Samples": count
+        } for label, count in cumulative.most_common(TOP_N)]
+
+    def collapsed(self) -> str:
+        """Folded stacks (``a;b;c count``), the input format of flamegraph tools."""
+        return "\n".join(f"{';'.join(stack)} {count}" for stack, count in self.stacks.most_common())
+
+
+class PageProfiler:
+    """Context manager wrapping one page execution; hands the report to ``on_finish``."""
+
+    def __init__(self, page: str, mode: str, on_finish: Callable[[Dict], None]):
+        self.page = page
+        self.mode = mode
+        self.on_finish = on_finish
+        self.profile: Optional[cProfile.Profile] = None
+        self.sampler: Optional[StackSampler] = None
+        self.started = 0.0
+
+    def __enter__(self) -> "PageProfiler":
+        if self.mode == SAMPLING:
+            self.sampler = StackSampler(threading.get_ident())
+            self.sampler.start()
+        else:
+            tracemalloc.start()
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        duration = time.perf_counter() - self.started
+        report = {
+            "page": self.page,
+            "mode": self.mode,
+            "captured": datetime.now().isoformat(),
+            "duration_seconds": round(duration, 3)
+        }
+        if self.sampler is not None:
+            self.sampler.stop()
+            report["hotspots"] = self.sampler.hotspots()
+            report["samples"] = self.sampler.samples
+            report["raw"] = self.sampler.collapsed().encode()
+            report["raw_name"] = "profile.folded"
+        else:
+            self.profile.disable()
+            snapshot = tracemalloc.take_snapshot()
+            _current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            report["peak_memory_kb"] = round(peak / 1024, 1)
+            report["hotspots"] = _cprofile_hotspots(self.profile)
+            report["allocations"] = _allocation_hotspots(snapshot)
+            report["raw"] = _dump_stats(self.profile)
+            report["raw_name"] = "profile.prof"
+        self.on_finish(report)
+        return False
+
+
+def _cprofile_hotspots(profile: cProfile.Profile) -> List[Dict]:
+    stats = pstats.Stats(profile, stream=io.StringIO())
+    rows = []
+    for (file, line, func), (cc, nc, tt, ct, _callers) in stats.stats.items():
+        rows.append({
+            "Function": f"{func} ({os.path.basename(file)}:{line})",
+            "Calls": nc,
+            "Cumulative (ms)": round(ct * 1000, 2),
+            "Own (ms)": round(tt * 1000, 2)
+        })
+    rows.sort(key=lambda r: r["Cumulative (ms)"], reverse=True)
+    return rows[:TOP_N]
+
+
+def _allocation_hotspots(snapshot: tracemalloc.Snapshot) -> List[Dict]:
+    snapshot = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>")
+    ])
+    return [{
+        "Location": f"{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+        "Size (KB)": round(stat.size / 1024, 1),
+        "Blocks": stat.count
+    } for stat in snapshot.statistics("lineno")[:TOP_N]]
+
+
+def _dump_stats(profile: cProfile.Profile) -> bytes:
+    """Serialise in the ``pstats`` format understood by snakeviz and ``python -m pstats``."""
+    fd, path = tempfile.mkstemp(suffix=".prof")
+    os.close(fd)
+    try:
+        profile.dump_stats(path)
+        with open(path, 'rb') as f:
+            return f.read()
+    finally:
+        os.remove(path)
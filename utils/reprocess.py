@@ -0,0 +1,277 @@
+# exaPipelineDashboard/utils/reprocess.py
+"""Batch requeue of annotated chunks through the Pipeline API.
+
+A job is a JSON file under ``<state_dir>/reprocess/`` listing every chunk and
+its submission status. Runners live in background threads inside the
+Streamlit process, so they survive reruns; if the process itself restarts,
+the job file is enough to resume the chunks that are still pending.
+"""
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+import requests
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
+
+from utils import metrics
+from utils.state import atomic_write_json, read_json, state_path
+
+ANNOTATION_SUFFIX = "_annotations.json"
+
+PENDING = "pending"
+SUBMITTED = "submitted"
+FAILED = "failed"
+
+
+class RetryableSubmitError(Exception):
+    """Backend answered with a status worth retrying (429 / 5xx)."""
+
+
+def find_chunks(annotated_dir: str, doc_ids: Optional[Iterable[str]] = None,
+                only_errors: bool = False) -> List[Dict[str, str]]:
+    """List annotated chunks, optionally limited to documents or failed annotations."""
+    items = []
+    if not os.path.exists(annotated_dir):
+        return items
+    wanted = set(doc_ids) if doc_ids is not None else None
+    for doc_id in sorted(os.listdir(annotated_dir)):
+        if wanted is not None and doc_id not in wanted:
+            continue
+        doc_path = os.path.join(annotated_dir, doc_id)
+        if not os.path.isdir(doc_path):
+            continue
+        for file in sorted(os.listdir(doc_path)):
+            if not file.endswith(ANNOTATION_SUFFIX):
+                continue
+            if only_errors and not _has_error(os.path.join(doc_path, file)):
+                continue
+            items.append({
+                "doc_id": doc_id,
+                "chunk_id": file[:-len(ANNOTATION_SUFFIX)],
+                "status": PENDING
+            })
+    return items
+
+
+def _has_error(path: str) -> bool:
+    data = read_json(path, default=None)
+    if not isinstance(data, dict):
+        return True
+    annotations = data.get("annotations", {})
+    return not annotations or (isinstance(annotations, dict) and "error" in annotations)
+
+
+class RateLimiter:
+    """Token bucket shared by all workers of a job."""
+
+    def __init__(self, rate_per_sec: float, burst: Optional[int] = None):
+        self.rate = max(rate_per_sec, 0.01)
+        self.capacity = burst or max(1, int(self.rate))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, stop_event: Optional[threading.Event] = None) -> bool:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if stop_event is not None and stop_event.wait(wait):
+                return False
+            if stop_event is None:
+                time.sleep(wait)
+
+
+# ----------------------------------------------------------------------
+# Job files
+# ----------------------------------------------------------------------
+def _job_path(state_dir: str, job_id: str) -> str:
+    return state_path(state_dir, "reprocess", f"{job_id}.json")
+
+
+def create_job(state_dir: str, items: List[Dict[str, str]], description: str) -> Dict:
+    job = {
+        "job_id": datetime.now().strftime("%Y%m%d_%H%M%S_") + uuid.uuid4().hex[:6],
+        "description": description,
+        "created": datetime.now().isoformat(),
+        "updated": datetime.now().isoformat(),
+        "state": "queued",
+        "items": items
+    }
+    atomic_write_json(_job_path(state_dir, job["job_id"]), job, indent=None)
+    return job
+
+
+def load_job(state_dir: str, job_id: str) -> Optional[Dict]:
+    return read_json(_job_path(state_dir, job_id))
+
+
+def list_jobs(state_dir: str) -> List[Dict]:
+    """All known jobs, newest first. Running jobs report their in-memory state."""
+    jobs_dir = os.path.join(state_dir, "reprocess")
+    if not os.path.exists(jobs_dir):
+        return []
+    jobs = []
+    for file in os.listdir(jobs_dir):
+        if not file.endswith(".json") or file.startswith(".tmp_"):
+            continue
+        job_id = file[:-len(".json")]
+        runner = _RUNNERS.get(job_id)
+        job = runner.snapshot() if runner is not None else load_job(state_dir, job_id)
+        if job:
+            jobs.append(job)
+    jobs.sort(key=lambda j: j.get("created", ""), reverse=True)
+    return jobs
+
+
+def job_progress(job: Dict) -> Dict[str, int]:
+    counts = {PENDING: 0, SUBMITTED: 0, FAILED: 0}
+    for item in job.get("items", []):
+        counts[item.get("status", PENDING)] = counts.get(item.get("status", PENDING), 0) + 1
+    counts["total"] = len(job.get("items", []))
+    return counts
+
+
+def retry_failed(state_dir: str, job_id: str) -> None:
+    job = load_job(state_dir, job_id)
+    if not job:
+        return
+    for item in job["items"]:
+        if item["status"] == FAILED:
+            item["status"] = PENDING
+            item.pop("error", None)
+    job["state"] = "paused"
+    atomic_write_json(_job_path(state_dir, job_id), job, indent=None)
+
+
+# ----------------------------------------------------------------------
+# Runner
+# ----------------------------------------------------------------------
+class ReprocessRunner(threading.Thread):
+    """Submits the pending items of one job with bounded concurrency."""
+
+    SAVE_INTERVAL = 1.0
+
+    def __init__(self, state_dir: str, job: Dict, api_url: str, endpoint: str,
+                 max_concurrency: int = 4, rate_per_sec: float = 5.0):
+        super().__init__(name=f"reprocess-{job['job_id']}", daemon=True)
+        self.state_dir = state_dir
+        self.job = job
+        self.url = f"{api_url.rstrip('/')}/{endpoint.lstrip('/')}"
+        self.max_concurrency = max(1, max_concurrency)
+        self.limiter = RateLimiter(rate_per_sec)
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+        self.last_save = 0.0
+        self.session = requests.Session()
+
+    def snapshot(self) -> Dict:
+        with self.lock:
+            return {**self.job, "items": [dict(item) for item in self.job["items"]]}
+
+    def pause(self) -> None:
+        self.stop_event.set()
+
+    def _save(self, force: bool = False) -> None:
+        with self.lock:
+            now = time.monotonic()
+            if not force and now - self.last_save < self.SAVE_INTERVAL:
+                return
+            self.last_save = now
+            self.job["updated"] = datetime.now().isoformat()
+            atomic_write_json(_job_path(self.state_dir, self.job["job_id"]), self.job, indent=None)
+
+    @retry(retry=retry_if_exception_type((requests.ConnectionError, requests.Timeout, RetryableSubmitError)),
+           stop=stop_after_attempt(4), wait=wait_exponential(multiplier=0.5, max=8), reraise=True)
+    def _submit(self, item: Dict) -> None:
+        response = metrics.api_call(
+            self.session, "post", self.url, "reprocess",
+            json={"doc_id": item["doc_id"], "chunk_id": item["chunk_id"], "stage": "annotated"},
+            timeout=30
+        )
+        if response.status_code == 429 or response.status_code >= 500:
+            raise RetryableSubmitError(f"HTTP {response.status_code}")
+        if response.status_code >= 400:
+            raise requests.HTTPError(f"HTTP {response.status_code}: {response.text[:200]}")
+
+    def _worker(self, work: "queue.Queue[int]") -> None:
+        while not self.stop_event.is_set():
+            try:
+                index = work.get_nowait()
+            except queue.Empty:
+                return
+            if not self.limiter.acquire(self.stop_event):
+                return
+            item = self.job["items"][index]
+            try:
+                self._submit(item)
+                status, error = SUBMITTED, None
+            except Exception as e:
+                status, error = FAILED, str(e)
+            with self.lock:
+                item["status"] = status
+                if error:
+                    item["error"] = error
+            self._save()
+
+    def run(self) -> None:
+        work: "queue.Queue[int]" = queue.Queue()
+        for index, item in enumerate(self.job["items"]):
+            if item["status"] == PENDING:
+                work.put(index)
+        with self.lock:
+            self.job["state"] = "running"
+        self._save(force=True)
+
+        workers = [threading.Thread(target=self._worker, args=(work,), daemon=True)
+                   for _ in range(min(self.max_concurrency, work.qsize() or 1))]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        with self.lock:
+            self.job["state"] = "paused" if self.stop_event.is_set() else "finished"
+        self._save(force=True)
+        with _RUNNERS_LOCK:
+            _RUNNERS.pop(self.job["job_id"], None)
+
+
+_RUNNERS: Dict[str, ReprocessRunner] = {}
+_RUNNERS_LOCK = threading.Lock()
+
+
+def start_job(state_dir: str, job_id: str, api_url: str, endpoint: str,
+              max_concurrency: int = 4, rate_per_sec: float = 5.0) -> Optional[ReprocessRunner]:
+    """Start (or resume) a job. Returns the already-running runner if there is one."""
+    with _RUNNERS_LOCK:
+        runner = _RUNNERS.get(job_id)
+        if runner is not None and runner.is_alive():
+            return runner
+        job = load_job(state_dir, job_id)
+        if not job:
+            return None
+        runner = ReprocessRunner(state_dir, job, api_url, endpoint, max_concurrency, rate_per_sec)
+        _RUNNERS[job_id] = runner
+        runner.start()
+        return runner
+
+
+def pause_job(job_id: str) -> None:
+    runner = _RUNNERS.get(job_id)
+    if runner is not None:
+        runner.pause()
+
+
+def is_running(job_id: str) -> bool:
+    runner = _RUNNERS.get(job_id)
+    return runner is not None and runner.is_alive()
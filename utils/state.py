@@ -0,0 +1,40 @@
+# exaPipelineDashboard/utils/state.py
+"""Small helpers for the dashboard's own on-disk state (jobs, indexes, caches)."""
+import json
+import os
+import tempfile
+from typing import Any, Optional
+
+
+def state_path(state_dir: str, *parts: str) -> str:
+    """Return a path under the dashboard state directory, creating its parent."""
+    path = os.path.join(state_dir, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def atomic_write_json(path: str, data: Any, indent: Optional[int] = 2) -> None:
+    """Write JSON next to the target and rename it into place.
+
+    Readers never observe a half-written file, even if the process dies mid-write.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=indent, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def read_json(path: str, default: Any = None) -> Any:
+    """Load a JSON file, returning ``default`` if it is missing or unreadable."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
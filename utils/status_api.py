@@ -0,0 +1,142 @@
+# exaPipelineDashboard/utils/status_api.py
+"""Read-only JSON status endpoint served next to the dashboard.
+
+    GET /status                 stage counts, per instance and in total
+    GET /documents[?instance=]  which stages every document has reached
+    GET /exports                finished training exports and their statistics
+
+Responses carry an ``ETag`` derived from the mtimes of the directories they
+are built from, and ``If-None-Match`` is checked before any listing is
+read, so a poller that sees nothing new gets an empty ``304`` for the cost
+of a few ``stat`` calls. Bodies are built from the shared listing cache.
+"""
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from utils import cache, export, federation
+
+
+class StatusService:
+    """Builds the endpoint payloads for a fixed fleet of instances."""
+
+    def __init__(self, fleet: List[Dict[str, str]], stages: List[str], train_dir: str):
+        self.fleet = fleet
+        self.stages = stages
+        self.train_dir = train_dir
+
+    def _stage_dirs(self) -> List[str]:
+        return [os.path.join(instance["data_dir"], stage) for instance in self.fleet for stage in self.stages]
+
+    def dependencies(self, route: str) -> List[str]:
+        """Directories whose mtimes determine the response; they also make up its ETag."""
+        if route == "/exports":
+            return [self.train_dir]
+        return self._stage_dirs()
+
+    def status(self, query: Dict[str, List[str]]) -> Dict:
+        per_instance = federation.map_instances(self.fleet, lambda i: federation.stage_counts(i, self.stages))
+        return {
+            "instances": {instance["name"]: counts for instance, counts in zip(self.fleet, per_instance)},
+            "totals": {stage: sum(counts[stage] for counts in per_instance) for stage in self.stages}
+        }
+
+    def documents(self, query: Dict[str, List[str]]) -> Dict:
+        wanted = set(query.get("instance", [])) or None
+        doc_stages = [stage for stage in self.stages if stage != "train"]
+        documents = []
+        for instance in self.fleet:
+            if wanted is not None and instance["name"] not in wanted:
+                continue
+            present = {stage: set(cache.subdirs(os.path.join(instance["data_dir"], stage))) for stage in doc_stages}
+            for doc_id in sorted(set().union(*present.values())):
+                documents.append({
+                    "instance": instance["name"],
+                    "doc_id": doc_id,
+                    "stages": {stage: doc_id in present[stage] for stage in doc_stages}
+                })
+        return {"count": len(documents), "documents": documents}
+
+    def exports(self, query: Dict[str, List[str]]) -> Dict:
+        return {"exports": [{
+            "name": item["name"],
+            "format": item["metadata"].get("format"),
+            "created": item["metadata"].get("created"),
+            "statistics": item["metadata"].get("statistics", {})
+        } for item in export.list_exports(self.train_dir)]}
+
+    def routes(self) -> Dict[str, Callable[[Dict[str, List[str]]], Dict]]:
+        return {"/status": self.status, "/documents": self.documents, "/exports": self.exports}
+
+
+def etag_for(route: str, query: str, deps: List[str]) -> Tuple[str, Optional[float]]:
+    """Weak ETag over the route, query and dependency fingerprints, plus the newest mtime."""
+    prints = cache.fingerprint(deps)
+    digest = hashlib.blake2b(repr((route, query, prints)).encode(), digest_size=12).hexdigest()
+    mtimes = [p[0] / 1e9 for p in prints if p is not None]
+    return f'W/"{digest}"', max(mtimes) if mtimes else None
+
+
+class _StatusHandler(BaseHTTPRequestHandler):
+    service: StatusService = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        handler = self.service.routes().get(url.path.rstrip('/') or '/')
+        if handler is None:
+            self._send_json(404, {"error": "not found", "routes": sorted(self.service.routes())})
+            return
+        etag, last_modified = etag_for(url.path, url.query, self.service.dependencies(url.path))
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if last_modified is not None:
+            headers["Last-Modified"] = format_datetime(datetime.fromtimestamp(last_modified, timezone.utc), usegmt=True)
+        if etag in [tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")]:
+            self._send(304, b"", headers)
+            return
+        try:
+            payload = handler(parse_qs(url.query))
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+            return
+        payload["generated"] = datetime.now().isoformat()
+        self._send_json(200, payload, headers)
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def _send_json(self, status: int, payload: Dict, headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode()
+        self._send(status, body, {"Content-Type": "application/json; charset=utf-8", **(headers or {})})
+
+    def _send(self, status: int, body: bytes, headers: Dict[str, str]) -> None:
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD" and body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_SERVER: Optional[ThreadingHTTPServer] = None
+_SERVER_LOCK = threading.Lock()
+
+
+def start_status_server(port: int, service: StatusService, host: str = "0.0.0.0") -> None:
+    """Serve the status routes from a daemon thread; safe to call on every rerun."""
+    global _SERVER
+    with _SERVER_LOCK:
+        if _SERVER is not None:
+            return
+        handler = type("StatusHandler", (_StatusHandler,), {"service": service})
+        _SERVER = ThreadingHTTPServer((host, port), handler)
+        threading.Thread(target=_SERVER.serve_forever, name="status-server", daemon=True).start()
@@ -0,0 +1,78 @@
+# exaPipelineDashboard/utils/upload_index.py
+"""Persistent content-hash index of files already sent to ``/api/v1/ingest``."""
+import hashlib
+import json
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+from typing import BinaryIO, Dict, Iterable, List, Optional
+
+from utils.state import state_path
+
+HASH_CHUNK = 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS uploads (
+    sha256 TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    file_name TEXT NOT NULL,
+    doc_ids TEXT NOT NULL DEFAULT '[]',
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    upload_count INTEGER NOT NULL DEFAULT 1
+)
+"""
+
+
+def hash_stream(stream: BinaryIO) -> str:
+    """sha256 of a file-like object, read in 1 MB blocks; the position is restored."""
+    position = stream.tell()
+    stream.seek(0)
+    digest = hashlib.sha256()
+    for block in iter(lambda: stream.read(HASH_CHUNK), b''):
+        digest.update(block)
+    stream.seek(position)
+    return digest.hexdigest()
+
+
+class UploadIndex:
+    def __init__(self, state_dir: str):
+        self.path = state_path(state_dir, "upload_index.sqlite3")
+        with closing(self._connect()) as conn, conn:
+            conn.execute(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def lookup(self, hashes: Iterable[str]) -> Dict[str, Dict]:
+        hashes = list(set(hashes))
+        if not hashes:
+            return {}
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                f"SELECT * FROM uploads WHERE sha256 IN ({','.join('?' * len(hashes))})", hashes
+            ).fetchall()
+        return {row["sha256"]: {**dict(row), "doc_ids": json.loads(row["doc_ids"])} for row in rows}
+
+    def record(self, sha256: str, size: int, file_name: str, doc_ids: Optional[List[str]] = None) -> None:
+        now = datetime.now().isoformat()
+        with closing(self._connect()) as conn, conn:
+            existing = conn.execute("SELECT doc_ids FROM uploads WHERE sha256 = ?", (sha256,)).fetchone()
+            if existing is None:
+                conn.execute(
+                    "INSERT INTO uploads (sha256, size, file_name, doc_ids, first_seen, last_seen) VALUES (?, ?, ?, ?, ?, ?)",
+                    (sha256, size, file_name, json.dumps(doc_ids or []), now, now)
+                )
+            else:
+                known = json.loads(existing["doc_ids"])
+                merged = known + [d for d in (doc_ids or []) if d not in known]
+                conn.execute(
+                    "UPDATE uploads SET doc_ids = ?, last_seen = ?, upload_count = upload_count + 1 WHERE sha256 = ?",
+                    (json.dumps(merged), now, sha256)
+                )
+
+    def count(self) -> int:
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM uploads").fetchone()[0]